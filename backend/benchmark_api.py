@@ -0,0 +1,166 @@
+"""
+Before/after benchmark for the API response layer.
+
+Serves representative payloads through three minimal FastAPI apps and drives
+them in-process over ASGI (no server, no DB):
+  before - default JSONResponse, full response_model validation, no compression
+  orjson - ORJSONResponse and trusted() DB documents, no compression
+  after  - orjson plus the compression middleware
+and reports latency and bytes on the wire for each payload, so the
+serialization win and the compression cost/saving show up separately.
+
+Payloads: a stories record (the /api/stories shape), the assessment
+curriculum (/api/test/curriculum) and a 500-row sounds page (/api/content/sounds).
+
+Usage: python benchmark_api.py [RUNS]
+"""
+import asyncio
+import random
+import statistics
+import string
+import sys
+import time
+from datetime import datetime, timedelta
+from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
+from schemas import StoryListResponse
+from services.curriculum import load_curriculum
+from services.responses import add_compression, trusted
+
+RUNS = 200
+
+
+# --- Payloads ---
+def _text(words: int) -> str:
+    return " ".join("".join(random.choices(string.ascii_lowercase, k=random.randint(2, 8))) for _ in range(words))
+
+
+def stories_payload(stories: int = 5, pages: int = 8) -> dict:
+    return {
+        "stories": [
+            {
+                "id": s,
+                "title": _text(4).title(),
+                "theme": "adventure",
+                "cover_image_prompt": _text(25),
+                "cover_image_url": f"http://localhost:8000/images/cover_{s}.png",
+                "focus_letters": ["b", "d"],
+                "pages": [
+                    {
+                        "text": _text(60),
+                        "image_prompt": _text(25),
+                        "image_url": f"http://localhost:8000/images/page_{s}_{p}.png",
+                        "audio_url": f"http://localhost:8000/audio/story_{s}_{p}.wav",
+                    }
+                    for p in range(pages)
+                ],
+            }
+            for s in range(stories)
+        ],
+        "generated_at": datetime.utcnow(),
+    }
+
+
+def sounds_payload(rows: int = 500) -> dict:
+    now = datetime.utcnow()
+    return {
+        "sounds": [
+            {
+                "id": f"{i:024x}",
+                "word": _text(1),
+                "sound": _text(1),
+                "difficulty": random.choice(["easy", "medium", "hard"]),
+                "category": random.choice(["animals", "food", "objects"]),
+                "created_at": (now - timedelta(minutes=i)).isoformat(),
+            }
+            for i in range(rows)
+        ],
+        "next_cursor": "abc",
+    }
+
+
+# --- Apps ---
+def build_apps(stories: dict, curriculum: list, sounds: dict):
+    before = FastAPI()
+
+    @before.get("/stories", response_model=StoryListResponse)
+    async def before_stories():
+        return stories
+
+    @before.get("/curriculum")
+    async def before_curriculum():
+        return curriculum
+
+    @before.get("/sounds")
+    async def before_sounds():
+        return sounds
+
+    def orjson_app(compress: bool) -> FastAPI:
+        app = FastAPI(default_response_class=ORJSONResponse)
+        if compress:
+            add_compression(app)
+
+        @app.get("/stories", response_model=StoryListResponse)
+        async def after_stories():
+            return trusted(stories, trust=True)
+
+        # Like the real routes, these return ORJSONResponse directly
+        @app.get("/curriculum")
+        async def after_curriculum():
+            return ORJSONResponse(curriculum)
+
+        @app.get("/sounds")
+        async def after_sounds():
+            return ORJSONResponse(sounds)
+
+        return app
+
+    return {"before": before, "orjson": orjson_app(False), "after": orjson_app(True)}
+
+
+async def call(app, path: str) -> int:
+    """One GET over ASGI; returns the body size as sent."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": b"", "root_path": "", "server": ("test", 80), "client": ("test", 1),
+        "headers": [(b"host", b"test"), (b"accept-encoding", b"br, gzip")],
+    }
+    size = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal size
+        if message["type"] == "http.response.body":
+            size += len(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return size
+
+
+async def measure(app, path: str, runs: int):
+    size = await call(app, path)  # warm up
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        await call(app, path)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1], size
+
+
+async def main(runs: int):
+    random.seed(7)
+    apps = build_apps(stories_payload(), load_curriculum().assessment_items, sounds_payload())
+
+    print(f"{'endpoint':<12} {'':<7} {'p50 ms':>8} {'p95 ms':>8} {'bytes':>9}")
+    for path in ("/stories", "/curriculum", "/sounds"):
+        for name, app in apps.items():
+            p50, p95, size = await measure(app, path, runs)
+            print(f"{path:<12} {name:<7} {p50:8.3f} {p95:8.3f} {size:9d}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else RUNS))
@@ -0,0 +1,91 @@
+"""
+Seed a large activity log and benchmark the dashboard endpoints.
+
+Builds on seed_sample_data.py: the small sample set is seeded first, then
+LOG_COUNT synthetic attempts spread over the last DAYS days are bulk inserted,
+the rollup job rebuilds the buckets, and both dashboard endpoints are timed.
+A raw scan over the logs is timed too, for comparison.
+
+Usage: python benchmark_dashboard.py [LOG_COUNT] [DAYS]
+"""
+import asyncio
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from services.log_store import find_logs, insert_logs, ensure_log_storage
+from seed_sample_data import seed_sample_data
+from services.rollups import ensure_rollup_indexes, rebuild_rollups
+from routes.dashboard import get_learning_issues, get_activity_history
+
+USER_ID = "child_123"
+MODULES = ["sound_safari", "sound_slicer", "word_builder", "twin_letters"]
+RUNS = 50
+
+
+async def seed_bulk_logs(count: int, days: int) -> int:
+    now = datetime.utcnow()
+    batch = []
+    inserted = 0
+    for _ in range(count):
+        batch.append({
+            "user_id": USER_ID,
+            "module_id": random.choice(MODULES),
+            "level": random.randint(1, 3),
+            "epoch": random.randint(0, 5),
+            "selected_id": str(random.randint(0, 2)),
+            "is_correct": random.random() < 0.7,
+            "response_time_ms": random.randint(800, 6000),
+            "timestamp": now - timedelta(seconds=random.randint(0, days * 86400)),
+        })
+        if len(batch) == 5000:
+            await insert_logs(batch)
+            inserted += len(batch)
+            batch = []
+    if batch:
+        await insert_logs(batch)
+        inserted += len(batch)
+    return inserted
+
+
+async def time_it(fn, *args) -> list[float]:
+    samples = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        await fn(*args)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def report(name: str, samples: list[float]):
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"{name:<28} p50={statistics.median(samples):7.2f} ms  p95={p95:7.2f} ms  max={samples[-1]:7.2f} ms")
+
+
+async def raw_scan(user_id: str):
+    # What the dashboard would cost without the buckets
+    return await find_logs({"user_id": user_id})
+
+
+async def main(count: int, days: int):
+    await ensure_log_storage()
+    await ensure_rollup_indexes()
+    await seed_sample_data()
+    inserted = await seed_bulk_logs(count, days)
+    print(f"✅ Inserted {inserted} synthetic logs over {days} days")
+
+    start = time.perf_counter()
+    buckets = await rebuild_rollups(user_id=USER_ID)
+    print(f"✅ Rebuilt {buckets} rollup buckets in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    report("learning-issues (buckets)", await time_it(get_learning_issues, USER_ID, 30))
+    report("activity-history (buckets)", await time_it(get_activity_history, USER_ID, 20))
+    report("raw log scan", await time_it(raw_scan, USER_ID))
+
+
+if __name__ == "__main__":
+    log_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    asyncio.run(main(log_count, days))
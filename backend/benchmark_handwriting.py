@@ -0,0 +1,307 @@
+"""
+Accuracy, calibration and CPU throughput benchmark for the handwriting models.
+
+Replays a directory of labelled canvas PNGs through the same preprocessing
+and model path as /api/test/analyze/writing (routes/test.py), then reports:
+  quality     - top-1 / top-k accuracy, per-class accuracy, the confusion
+                matrix and the most frequent confusions
+  calibration - ECE, NLL, Brier score and reliability bins at the configured
+                temperature, plus the temperature that minimizes NLL on this
+                set (put it in WRITING_TEMPERATURE_EN / _NE)
+  speed       - preprocessing latency per drawing, and model latency
+                (p50/p95/p99 per batch) and throughput (drawings/s) for
+                every batch size x torch thread count, on CPU
+Everything is written to one JSON file so runs can be compared before a
+preprocessing or model change ships (--compare OLD.json prints the deltas).
+
+Data layout: DATA_DIR/<label>/*.png, where <label> is the class name the
+model uses ("b", "ka", "waw", ...).
+
+Usage: python benchmark_handwriting.py DATA_DIR [--language english|nepali]
+         [--weights PATH] [--batches 1,2,4,8,16,32,64] [--threads 1,2,4]
+         [--runs 50] [--out FILE.json] [--compare OLD.json]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime
+import numpy as np
+import torch
+import torch.nn.functional as F
+import routes.test as writing
+from services.analysis_cache import file_fingerprint
+from services.handwriting_scoring import WRITING_TOP_K
+
+BATCH_SIZES = [1, 2, 4, 8, 16, 32, 64]
+RUNS = 50
+CALIBRATION_BINS = 15
+
+
+def percentiles(samples: list[float]) -> dict:
+    ordered = sorted(samples)
+
+    def pick(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))], 4)
+
+    return {"p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99), "mean": round(statistics.fmean(ordered), 4)}
+
+
+def default_threads() -> list[int]:
+    cpus = os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 < cpus:
+        counts.append(counts[-1] * 2)
+    return counts + [cpus] if cpus > 1 else counts
+
+
+# --- Data ---
+def load_dataset(data_dir: str, language: str, labels: dict):
+    """Preprocesses every PNG exactly like the route; returns (inputs, targets, files, preprocess_ms)."""
+    inputs, targets, files, preprocess_ms, skipped = [], [], [], [], []
+    for label in sorted(os.listdir(data_dir)):
+        folder = os.path.join(data_dir, label)
+        if not os.path.isdir(folder):
+            continue
+        if label.lower() not in labels:
+            skipped.append(label)
+            continue
+        for name in sorted(os.listdir(folder)):
+            if not name.lower().endswith(".png"):
+                continue
+            path = os.path.join(folder, name)
+            with open(path, "rb") as f:
+                data = f.read()
+            start = time.perf_counter()
+            tensor = writing._drawing_tensor(data, language)
+            preprocess_ms.append((time.perf_counter() - start) * 1000)
+            inputs.append(tensor)
+            targets.append(labels[label.lower()])
+            files.append(path)
+    if skipped:
+        print(f"⚠️ Skipped folders with no matching class: {', '.join(skipped)}")
+    if not inputs:
+        raise SystemExit(f"No labelled PNGs found under {data_dir}")
+    return torch.cat(inputs), torch.tensor(targets), files, preprocess_ms
+
+
+# --- Quality ---
+def predict_logits(model, inputs: torch.Tensor, batch_size: int = 64) -> torch.Tensor:
+    with torch.no_grad():
+        return torch.cat([model(inputs[i:i + batch_size]) for i in range(0, len(inputs), batch_size)])
+
+
+def quality_report(probs: torch.Tensor, targets: torch.Tensor, class_names: list[str]) -> dict:
+    n_classes = len(class_names)
+    predicted = probs.argmax(dim=1)
+    k = min(WRITING_TOP_K, n_classes)
+    in_top_k = (probs.topk(k, dim=1).indices == targets[:, None]).any(dim=1)
+
+    matrix = np.zeros((n_classes, n_classes), dtype=int)
+    np.add.at(matrix, (targets.numpy(), predicted.numpy()), 1)
+
+    per_class = {}
+    for i, name in enumerate(class_names):
+        total = int(matrix[i].sum())
+        if total:
+            per_class[name] = {"n": total, "accuracy": round(matrix[i, i] / total, 4)}
+
+    off_diagonal = matrix.copy()
+    np.fill_diagonal(off_diagonal, 0)
+    top = np.argsort(off_diagonal, axis=None)[::-1][:10]
+    confusions = [
+        {"target": class_names[t], "predicted": class_names[p], "count": int(off_diagonal[t, p])}
+        for t, p in zip(*np.unravel_index(top, matrix.shape)) if off_diagonal[t, p]
+    ]
+
+    return {
+        "samples": len(targets),
+        "accuracy": round((predicted == targets).float().mean().item(), 4),
+        f"top_{k}_accuracy": round(in_top_k.float().mean().item(), 4),
+        "per_class": per_class,
+        "top_confusions": confusions,
+        "confusion_matrix": {"labels": class_names, "rows_are": "target", "matrix": matrix.tolist()},
+    }
+
+
+def calibration_report(logits: torch.Tensor, targets: torch.Tensor, temperature: float) -> dict:
+    probs = F.softmax(logits / temperature, dim=1)
+    confidence, predicted = probs.max(dim=1)
+    correct = (predicted == targets).float()
+
+    bins, ece = [], 0.0
+    edges = torch.linspace(0, 1, CALIBRATION_BINS + 1)
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        mask = (confidence > lo) & (confidence <= hi)
+        if mask.any():
+            acc, conf = correct[mask].mean().item(), confidence[mask].mean().item()
+            ece += mask.float().mean().item() * abs(acc - conf)
+            bins.append({"range": [round(lo.item(), 3), round(hi.item(), 3)], "n": int(mask.sum()),
+                         "accuracy": round(acc, 4), "confidence": round(conf, 4)})
+
+    one_hot = F.one_hot(targets, logits.shape[1]).float()
+    return {
+        "temperature": temperature,
+        "ece": round(ece, 4),
+        "nll": round(F.cross_entropy(logits / temperature, targets).item(), 4),
+        "brier": round(((probs - one_hot) ** 2).sum(dim=1).mean().item(), 4),
+        "reliability": bins,
+    }
+
+
+def fit_temperature(logits: torch.Tensor, targets: torch.Tensor) -> float:
+    """Temperature scaling: the T minimizing NLL on this set."""
+    log_t = torch.zeros(1, requires_grad=True)
+    optimizer = torch.optim.LBFGS([log_t], lr=0.1, max_iter=200)
+
+    def closure():
+        optimizer.zero_grad()
+        loss = F.cross_entropy(logits / log_t.exp(), targets)
+        loss.backward()
+        return loss
+
+    optimizer.step(closure)
+    return round(log_t.exp().item(), 4)
+
+
+# --- Speed ---
+def speed_report(model, inputs: torch.Tensor, batch_sizes: list[int], threads: list[int], runs: int) -> list[dict]:
+    original_threads = torch.get_num_threads()
+    rows = []
+    try:
+        for n_threads in threads:
+            torch.set_num_threads(n_threads)
+            for batch_size in batch_sizes:
+                # Cycle the real drawings to fill the batch
+                index = torch.arange(batch_size) % len(inputs)
+                batch = inputs[index]
+                with torch.no_grad():
+                    for _ in range(3):  # warm up
+                        model(batch)
+                    samples = []
+                    for _ in range(runs):
+                        start = time.perf_counter()
+                        model(batch)
+                        samples.append((time.perf_counter() - start) * 1000)
+                rows.append({
+                    "threads": n_threads,
+                    "batch_size": batch_size,
+                    "latency_ms": percentiles(samples),
+                    "throughput_per_s": round(batch_size * runs / (sum(samples) / 1000), 1),
+                })
+                print(f"  threads={n_threads:<3} batch={batch_size:<3} "
+                      f"p50={rows[-1]['latency_ms']['p50']:.3f}ms p99={rows[-1]['latency_ms']['p99']:.3f}ms "
+                      f"{rows[-1]['throughput_per_s']:.0f}/s")
+    finally:
+        torch.set_num_threads(original_threads)
+    return rows
+
+
+# --- Run ---
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def compare(old: dict, new: dict):
+    print(f"\nCompared with {old['meta']['created_at']} ({old['meta'].get('git_commit') or 'unknown commit'}):")
+    for key in ("accuracy", f"top_{WRITING_TOP_K}_accuracy"):
+        if key in old["quality"] and key in new["quality"]:
+            print(f"  {key:<18} {old['quality'][key]:.4f} -> {new['quality'][key]:.4f}")
+    print(f"  {'ece':<18} {old['calibration']['ece']:.4f} -> {new['calibration']['ece']:.4f}")
+    print(f"  {'preprocess p50':<18} {old['preprocess_ms']['p50']:.3f} -> {new['preprocess_ms']['p50']:.3f} ms")
+    old_speed = {(r["threads"], r["batch_size"]): r for r in old["speed"]}
+    for row in new["speed"]:
+        before = old_speed.get((row["threads"], row["batch_size"]))
+        if before:
+            print(f"  threads={row['threads']:<3} batch={row['batch_size']:<3} "
+                  f"{before['throughput_per_s']:.0f}/s -> {row['throughput_per_s']:.0f}/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("data_dir")
+    parser.add_argument("--language", default="english", choices=["english", "nepali"])
+    parser.add_argument("--weights", help="weights to load instead of the model path in routes/test.py")
+    parser.add_argument("--batches", default=",".join(map(str, BATCH_SIZES)))
+    parser.add_argument("--threads", default=",".join(map(str, default_threads())))
+    parser.add_argument("--runs", type=int, default=RUNS)
+    parser.add_argument("--out")
+    parser.add_argument("--compare")
+    args = parser.parse_args()
+
+    if args.language == "nepali":
+        network, weights, attr = writing.nepali_model, writing.NEPALI_MODEL_PATH, "active_nepali_model"
+    else:
+        network, weights, attr = writing.english_model, writing.ENGLISH_MODEL_PATH, "active_english_model"
+    if args.weights:
+        weights = args.weights
+        setattr(writing, attr, writing.load_weights(network, weights))
+    model, scorer, _, _ = writing._writing_config(args.language)
+    if model is None:
+        raise SystemExit(f"No weights at {weights}; pass --weights")
+    model = model.to("cpu").eval()
+
+    inputs, targets, files, preprocess_ms = load_dataset(args.data_dir, args.language, scorer.index)
+    print(f"✅ {len(files)} drawings, {len(set(targets.tolist()))} classes")
+
+    logits = predict_logits(model, inputs)
+    probs = scorer.probabilities(logits)
+    fitted = fit_temperature(logits, targets)
+
+    print("⏱️ Model speed (CPU):")
+    speed = speed_report(
+        model, inputs,
+        [int(b) for b in args.batches.split(",")],
+        [int(t) for t in args.threads.split(",")],
+        args.runs,
+    )
+
+    now = datetime.now()
+    result = {
+        "meta": {
+            "created_at": now.isoformat(timespec="seconds"),
+            "git_commit": git_commit(),
+            "language": args.language,
+            "model": type(model).__name__,
+            "weights": weights,
+            "weights_fingerprint": file_fingerprint(weights),
+            "data_dir": os.path.abspath(args.data_dir),
+            "torch": torch.__version__,
+            "cpu": platform.processor() or platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "scorer": scorer.version,
+        },
+        "quality": quality_report(probs, targets, scorer.labels),
+        "calibration": {
+            **calibration_report(logits, targets, scorer.temperature),
+            "fitted_temperature": fitted,
+            "at_fitted_temperature": calibration_report(logits, targets, fitted),
+        },
+        "preprocess_ms": percentiles(preprocess_ms),
+        "speed": speed,
+    }
+
+    out = args.out or f"handwriting_{args.language}_{now:%Y%m%d-%H%M%S}.json"
+    with open(out, "w") as f:
+        json.dump(result, f, indent=2)
+
+    quality, calibration = result["quality"], result["calibration"]
+    print(f"🎯 accuracy {quality['accuracy']:.4f}, top-{WRITING_TOP_K} {quality[f'top_{WRITING_TOP_K}_accuracy']:.4f}")
+    print(f"📐 ECE {calibration['ece']:.4f} at T={calibration['temperature']}, "
+          f"{calibration['at_fitted_temperature']['ece']:.4f} at fitted T={fitted}")
+    print(f"🖼️ preprocessing p50 {result['preprocess_ms']['p50']:.3f} ms, p99 {result['preprocess_ms']['p99']:.3f} ms")
+    print(f"💾 Saved {out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), result)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,143 @@
 import os
+import importlib.util
+import threading
+from collections import defaultdict
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReadPreference, monitoring
 from dotenv import load_dotenv
 
 load_dotenv()
 
 MONGO_URL = os.getenv("MONGO_URL", "mongodb://localhost:27017")
-client = AsyncIOMotorClient(MONGO_URL)
-db = client.akshara_db  # This is your database instance
\ No newline at end of file
+DB_NAME = os.getenv("MONGO_DB", "akshara_db")
+
+# Pool & timeout tuning (defaults suit a single uvicorn worker)
+MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "50"))
+MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "5"))
+MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000"))
+SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000"))
+SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "20000"))
+
+# Wire compression in order of preference. zstd needs `zstandard` and snappy
+# needs `python-snappy`; whichever isn't installed is skipped.
+COMPRESSORS = os.getenv("MONGO_COMPRESSORS", "zstd,snappy,zlib")
+_COMPRESSOR_MODULES = {"zstd": "zstandard", "snappy": "snappy", "zlib": "zlib"}
+
+
+def _available_compressors(names: str) -> list[str]:
+    available = []
+    for name in filter(None, (n.strip() for n in names.split(","))):
+        module = _COMPRESSOR_MODULES.get(name)
+        if module and importlib.util.find_spec(module):
+            available.append(name)
+    return available
+
+
+class PoolStats(monitoring.ConnectionPoolListener):
+    """
+    Counts pool events so /health/db can report pool usage.
+    pymongo calls the listeners from its own threads, so every access holds _lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.open = defaultdict(int)
+        self.checked_out = defaultdict(int)
+        self.checkouts = 0
+        self.checkout_failures = 0
+
+    def pool_created(self, event): pass
+    def pool_ready(self, event): pass
+    def pool_cleared(self, event): pass
+    def pool_closed(self, event): pass
+    def connection_ready(self, event): pass
+    def connection_check_out_started(self, event): pass
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open[event.address] += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open[event.address] -= 1
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.checkout_failures += 1
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self.checked_out[event.address] += 1
+            self.checkouts += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out[event.address] -= 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            open_, checked_out = dict(self.open), dict(self.checked_out)
+            checkouts, checkout_failures = self.checkouts, self.checkout_failures
+        return {
+            "max_pool_size": MAX_POOL_SIZE,
+            "min_pool_size": MIN_POOL_SIZE,
+            "servers": {
+                f"{host}:{port}": {"open": count, "in_use": checked_out.get((host, port), 0)}
+                for (host, port), count in open_.items()
+            },
+            "total_checkouts": checkouts,
+            "checkout_failures": checkout_failures,
+        }
+
+
+pool_stats = PoolStats()
+
+client_options = {
+    "maxPoolSize": MAX_POOL_SIZE,
+    "minPoolSize": MIN_POOL_SIZE,
+    "maxIdleTimeMS": MAX_IDLE_TIME_MS,
+    "serverSelectionTimeoutMS": SERVER_SELECTION_TIMEOUT_MS,
+    "connectTimeoutMS": CONNECT_TIMEOUT_MS,
+    "socketTimeoutMS": SOCKET_TIMEOUT_MS,
+    "event_listeners": [pool_stats],
+}
+compressors = _available_compressors(COMPRESSORS)
+if compressors:
+    client_options["compressors"] = compressors
+
+client = AsyncIOMotorClient(MONGO_URL, **client_options)
+db = client[DB_NAME]  # This is your database instance
+
+# Read-heavy routes (analytics, dashboard, content listings) can tolerate
+# slightly stale data, so they read from a secondary when there is one.
+read_db = client.get_database(DB_NAME, read_preference=ReadPreference.SECONDARY_PREFERRED)
+
+
+async def ensure_ttl_index(collection, field: str, expire_after_s: int, name: str, **options):
+    """
+    Keeps a TTL index in step with its setting: created when missing, retuned
+    with collMod when the value changed (create_index would raise
+    IndexOptionsConflict), dropped when the setting is 0.
+    """
+    current = (await collection.index_information()).get(name)
+    if not expire_after_s:
+        if current is not None:
+            await collection.drop_index(name)
+        return
+    if current is None:
+        await collection.create_index(field, expireAfterSeconds=expire_after_s, name=name, **options)
+    elif current.get("expireAfterSeconds") != expire_after_s:
+        await collection.database.command(
+            "collMod", collection.name, index={"name": name, "expireAfterSeconds": expire_after_s}
+        )
+
+
+async def connect_db():
+    """Fails fast at startup if MongoDB can't be reached."""
+    await client.admin.command("ping")
+    print(f"✅ Connected to MongoDB ({DB_NAME}), pool {MIN_POOL_SIZE}-{MAX_POOL_SIZE}")
+
+
+def close_db():
+    client.close()
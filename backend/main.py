@@ -1,14 +1,53 @@
 import os
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from routes import test, stories, modules, admin_sound_safari, admin_ar, ar_route, dashboard, content  # assuming you put seed in admin.py
+from fastapi.responses import ORJSONResponse
+from routes import test, stories, modules, admin_sound_safari, admin_ar, ar_route, dashboard, content, health  # assuming you put seed in admin.py
+from database import connect_db, close_db
+from services.rollups import ensure_rollup_indexes
+from services.log_store import ensure_log_storage
+from services.ingest import progress_buffer, ensure_ingest_indexes
+from routes.content import ensure_content_indexes
+from services.assessments import ensure_assessment_indexes
+from services.analysis_cache import ensure_analysis_cache_indexes
+from services.curriculum import get_curriculum
+from services.speech_assessment import check_speech_backend
+from services.ar_index import refresh_distractor_index
+from services.model_assets import ImmutableStaticFiles, MODEL_ASSET_DIR, MODEL_URL_PREFIX
+from services.responses import add_compression
+from services.executors import shutdown_executors, ExecutorBusy
+from services.uploads import UploadLimitMiddleware
 
 if not os.path.exists("images"):
     os.makedirs("images")
 
-app = FastAPI(title="Akshara Play API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup: check the DB, prepare collections, start background writers
+    await connect_db()
+    curriculum = await get_curriculum()  # validate the curriculum package once, fail fast
+    print(f"✅ Curriculum v{curriculum.version} loaded")
+    check_speech_backend()  # a misconfigured backend would fail every speaking test
+    await ensure_log_storage()
+    await ensure_rollup_indexes()
+    await ensure_ingest_indexes()
+    await ensure_content_indexes()
+    await ensure_assessment_indexes()
+    await ensure_analysis_cache_indexes()
+    await refresh_distractor_index()
+    await progress_buffer.start()
+    yield
+    # Shutdown: drain buffered writes before the client goes away
+    await progress_buffer.stop()
+    shutdown_executors()
+    close_db()
 
+app = FastAPI(title="Akshara Play API", lifespan=lifespan, default_response_class=ORJSONResponse)
+
+# Added before CORS so the 413s still carry CORS headers
+app.add_middleware(UploadLimitMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -16,10 +55,16 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+add_compression(app)
 
+@app.exception_handler(ExecutorBusy)
+async def executor_busy(request: Request, exc: ExecutorBusy):
+    # A task class hit its EXECUTOR_<NAME>_MAX_QUEUE; ask the client to retry shortly
+    return ORJSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
 
 app.mount("/audio", StaticFiles(directory="audio"), name="audio")
 app.mount("/images", StaticFiles(directory="images"), name="images")
+app.mount(MODEL_URL_PREFIX, ImmutableStaticFiles(directory=MODEL_ASSET_DIR), name="models")
 
 app.include_router(test.router)
 app.include_router(stories.router)
@@ -28,4 +73,5 @@ app.include_router(admin_sound_safari.router)
 app.include_router(admin_ar.router)
 app.include_router(ar_route.router)
 app.include_router(dashboard.router)
-app.include_router(content.router)
\ No newline at end of file
+app.include_router(content.router)
+app.include_router(health.router)
\ No newline at end of file
@@ -0,0 +1,41 @@
+"""
+Move attempt logs from the classic `logs` collection into the time-series layout.
+
+Run with LOG_STORAGE=timeseries (and LOG_RAW_RETENTION_DAYS if raw events
+should expire). Steps:
+  1. rebuild all rollup buckets from `logs`, so history outside the raw
+     retention window is kept as buckets
+  2. copy the raw events inside the retention window into the time-series
+     collection with the compact field encoding (safe to re-run: an
+     interrupted copy resumes where it stopped, without duplicates)
+  3. with --archive, rename `logs` to `logs_archive` once the copy is done
+
+Usage: LOG_STORAGE=timeseries python migrate_logs.py [--archive]
+"""
+import asyncio
+import sys
+from datetime import datetime, timedelta
+from database import db
+from services.log_store import RAW_RETENTION_DAYS, TIMESERIES, TIMESERIES_COLLECTION, migrate_classic_to_timeseries
+from services.rollups import ensure_rollup_indexes, rebuild_rollups
+
+async def migrate(archive: bool):
+    if not TIMESERIES:
+        print("⚠️ Set LOG_STORAGE=timeseries to migrate.")
+        return
+
+    await ensure_rollup_indexes()
+    buckets = await rebuild_rollups(classic=True)
+    print(f"✅ Rebuilt {buckets} rollup buckets from logs")
+
+    # Events older than the retention window would expire right away
+    since = datetime.utcnow() - timedelta(days=RAW_RETENTION_DAYS) if RAW_RETENTION_DAYS else None
+    copied = await migrate_classic_to_timeseries(since=since)
+    print(f"✅ Copied {copied} raw events into {TIMESERIES_COLLECTION}")
+
+    if archive:
+        await db.logs.rename("logs_archive")
+        print("✅ Renamed logs -> logs_archive")
+
+if __name__ == "__main__":
+    asyncio.run(migrate("--archive" in sys.argv))
@@ -1,8 +1,16 @@
-from fastapi import APIRouter, HTTPException
+import asyncio
+import json
+import time
+from bson import ObjectId
+from fastapi import APIRouter, HTTPException, Query, UploadFile, File, BackgroundTasks
+from fastapi.responses import StreamingResponse, ORJSONResponse
 from pydantic import BaseModel
-from database import db
+from pymongo import ASCENDING
+from pymongo.errors import DuplicateKeyError, OperationFailure
+from database import db, read_db
+from services.content_import import iter_upload_rows, import_rows, generate_sound_audio
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Literal
 
 router = APIRouter(prefix="/api/content", tags=["content"])
 
@@ -19,6 +27,109 @@ class LetterData(BaseModel):
     difficulty: str = "easy"
     imageUrl: Optional[str] = None
 
+# Content stats cache (short TTL, cleared whenever sounds or letters change)
+STATS_TTL_SECONDS = 30
+DEFAULT_DIFFICULTIES = ["easy", "medium", "hard"]
+
+_stats_cache = {"value": None, "expires_at": 0.0}
+
+def invalidate_stats_cache():
+    _stats_cache["value"] = None
+    _stats_cache["expires_at"] = 0.0
+
+# Listing: keyset pagination on _id with server-side projection
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+EXPORT_BATCH_SIZE = 500
+
+SOUND_PROJECTION = {"word": 1, "sound": 1, "difficulty": 1, "category": 1, "created_at": 1}
+LETTER_PROJECTION = {"letterPair": 1, "description": 1, "difficulty": 1, "imageUrl": 1, "created_at": 1}
+
+async def ensure_content_indexes():
+    # Trailing _id lets filtered listings walk the index in cursor order
+    await db.sounds.create_index(
+        [("is_active", ASCENDING), ("category", ASCENDING), ("difficulty", ASCENDING), ("_id", ASCENDING)],
+        name="active_category_difficulty"
+    )
+    await db.sounds.create_index(
+        [("is_active", ASCENDING), ("difficulty", ASCENDING), ("_id", ASCENDING)],
+        name="active_difficulty"
+    )
+    await db.letter_pairs.create_index(
+        [("is_active", ASCENDING), ("difficulty", ASCENDING), ("_id", ASCENDING)],
+        name="active_difficulty"
+    )
+
+    # One active entry per word / letter pair; imports rely on this to dedupe
+    for collection, field in ((db.sounds, "word"), (db.letter_pairs, "letterPair")):
+        try:
+            await collection.create_index(
+                field, unique=True, partialFilterExpression={"is_active": True}, name=f"unique_active_{field}"
+            )
+        except OperationFailure as e:
+            print(f"⚠️ Could not create unique index on {collection.name}.{field} (existing duplicates?): {e}")
+
+def _sound_doc(sound_data: SoundData) -> dict:
+    return {
+        "word": sound_data.word.lower(),
+        "sound": sound_data.sound,
+        "difficulty": sound_data.difficulty,
+        "category": sound_data.category,
+        "created_at": datetime.utcnow(),
+        "is_active": True
+    }
+
+def _letter_doc(letter_data: LetterData) -> dict:
+    return {
+        "letterPair": letter_data.letterPair.upper(),
+        "description": letter_data.description,
+        "difficulty": letter_data.difficulty,
+        "imageUrl": letter_data.imageUrl,
+        "created_at": datetime.utcnow(),
+        "is_active": True
+    }
+
+def _sound_out(sound: dict) -> dict:
+    return {
+        "id": str(sound["_id"]),
+        "word": sound["word"],
+        "sound": sound["sound"],
+        "difficulty": sound["difficulty"],
+        "category": sound["category"],
+        "created_at": sound.get("created_at").isoformat() if sound.get("created_at") else None
+    }
+
+def _letter_out(letter: dict) -> dict:
+    return {
+        "id": str(letter["_id"]),
+        "letterPair": letter["letterPair"],
+        "description": letter["description"],
+        "difficulty": letter["difficulty"],
+        "imageUrl": letter.get("imageUrl"),
+        "created_at": letter.get("created_at").isoformat() if letter.get("created_at") else None
+    }
+
+async def _fetch_page(collection, query: dict, projection: dict, limit: int, cursor: Optional[str]):
+    """Returns (docs, next_cursor); next_cursor is None on the last page."""
+    if cursor:
+        if not ObjectId.is_valid(cursor):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = {**query, "_id": {"$gt": ObjectId(cursor)}}
+
+    # Read one extra document to know whether another page exists
+    docs = await collection.find(query, projection).sort("_id", ASCENDING).limit(limit + 1).to_list(limit + 1)
+    if len(docs) > limit:
+        docs = docs[:limit]
+        return docs, str(docs[-1]["_id"])
+    return docs, None
+
+def _ndjson_export(collection, query: dict, projection: dict, shape) -> StreamingResponse:
+    async def lines():
+        async for doc in collection.find(query, projection).sort("_id", ASCENDING).batch_size(EXPORT_BATCH_SIZE):
+            yield json.dumps(shape(doc), ensure_ascii=False) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
 # Sound Safari Endpoints
 @router.post("/sounds")
 async def add_sound(sound_data: SoundData):
@@ -26,17 +137,11 @@ async def add_sound(sound_data: SoundData):
     
     try:
         # Create sound document
-        sound_doc = {
-            "word": sound_data.word.lower(),
-            "sound": sound_data.sound,
-            "difficulty": sound_data.difficulty,
-            "category": sound_data.category,
-            "created_at": datetime.utcnow(),
-            "is_active": True
-        }
+        sound_doc = _sound_doc(sound_data)
         
         # Insert into sounds collection
         result = await db.sounds.insert_one(sound_doc)
+        invalidate_stats_cache()
         
         return {
             "id": str(result.inserted_id),
@@ -44,39 +149,48 @@ async def add_sound(sound_data: SoundData):
             "sound": sound_doc
         }
     
+    except DuplicateKeyError:
+        raise HTTPException(status_code=409, detail=f"Sound '{sound_data.word}' already exists")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error adding sound: {str(e)}")
 
 
 @router.get("/sounds")
-async def get_sounds(category: Optional[str] = None, difficulty: Optional[str] = None):
-    """Get all sounds, optionally filtered by category and difficulty"""
+async def get_sounds(
+    category: Optional[str] = None,
+    difficulty: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    format: Literal["json", "ndjson"] = "json"
+):
+    """
+    Get sounds, optionally filtered by category and difficulty.
+    Pages are keyset-paginated on _id: pass `next_cursor` back as `cursor`.
+    `format=ndjson` streams every matching sound (admin export).
+    """
+    
+    query = {"is_active": True}
+    
+    if category:
+        query["category"] = category
+    if difficulty:
+        query["difficulty"] = difficulty
+
+    if format == "ndjson":
+        return _ndjson_export(read_db.sounds, query, SOUND_PROJECTION, _sound_out)
     
     try:
-        query = {"is_active": True}
-        
-        if category:
-            query["category"] = category
-        if difficulty:
-            query["difficulty"] = difficulty
+        sounds, next_cursor = await _fetch_page(read_db.sounds, query, SOUND_PROJECTION, limit, cursor)
         
-        sounds = await db.sounds.find(query).to_list(1000)
-        
-        return {
+        # Rows are already JSON-safe; skip jsonable_encoder
+        return ORJSONResponse({
             "total": len(sounds),
-            "sounds": [
-                {
-                    "id": str(sound["_id"]),
-                    "word": sound["word"],
-                    "sound": sound["sound"],
-                    "difficulty": sound["difficulty"],
-                    "category": sound["category"],
-                    "created_at": sound.get("created_at").isoformat() if sound.get("created_at") else None
-                }
-                for sound in sounds
-            ]
-        }
+            "next_cursor": next_cursor,
+            "sounds": [_sound_out(sound) for sound in sounds]
+        })
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching sounds: {str(e)}")
 
@@ -95,6 +209,7 @@ async def delete_sound(sound_id: str):
         
         if result.matched_count == 0:
             raise HTTPException(status_code=404, detail="Sound not found")
+        invalidate_stats_cache()
         
         return {"message": "Sound deleted successfully"}
     
@@ -102,6 +217,34 @@ async def delete_sound(sound_id: str):
         raise HTTPException(status_code=500, detail=f"Error deleting sound: {str(e)}")
 
 
+@router.post("/sounds/import")
+async def import_sounds(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    generate_audio: bool = True
+):
+    """
+    Bulk import sounds from a CSV, JSON array or NDJSON upload.
+    Rows are validated like POST /sounds; words that already exist are
+    reported as duplicates. Audio is generated in the background.
+    """
+    rows = iter_upload_rows(file.file, file.filename, file.content_type)
+    result = await import_rows(db.sounds, rows, SoundData, _sound_doc)
+
+    if result["inserted"]:
+        invalidate_stats_cache()
+        if generate_audio:
+            background_tasks.add_task(generate_sound_audio, db.sounds, result["inserted"])
+
+    return {
+        "received": result["received"],
+        "inserted": len(result["inserted"]),
+        "failed": len(result["errors"]),
+        "errors": result["errors"],
+        "audio": "queued" if generate_audio and result["inserted"] else "skipped"
+    }
+
+
 # Twin Letters AR Endpoints
 @router.post("/letters")
 async def add_letter_pair(letter_data: LetterData):
@@ -109,17 +252,11 @@ async def add_letter_pair(letter_data: LetterData):
     
     try:
         # Create letter pair document
-        letter_doc = {
-            "letterPair": letter_data.letterPair.upper(),
-            "description": letter_data.description,
-            "difficulty": letter_data.difficulty,
-            "imageUrl": letter_data.imageUrl,
-            "created_at": datetime.utcnow(),
-            "is_active": True
-        }
+        letter_doc = _letter_doc(letter_data)
         
         # Insert into letter_pairs collection
         result = await db.letter_pairs.insert_one(letter_doc)
+        invalidate_stats_cache()
         
         return {
             "id": str(result.inserted_id),
@@ -127,37 +264,44 @@ async def add_letter_pair(letter_data: LetterData):
             "letter": letter_doc
         }
     
+    except DuplicateKeyError:
+        raise HTTPException(status_code=409, detail=f"Letter pair '{letter_data.letterPair}' already exists")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error adding letter pair: {str(e)}")
 
 
 @router.get("/letters")
-async def get_letters(difficulty: Optional[str] = None):
-    """Get all letter pairs, optionally filtered by difficulty"""
+async def get_letters(
+    difficulty: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    format: Literal["json", "ndjson"] = "json"
+):
+    """
+    Get letter pairs, optionally filtered by difficulty.
+    Keyset-paginated on _id like /sounds; `format=ndjson` streams everything.
+    """
+    
+    query = {"is_active": True}
+    
+    if difficulty:
+        query["difficulty"] = difficulty
+
+    if format == "ndjson":
+        return _ndjson_export(read_db.letter_pairs, query, LETTER_PROJECTION, _letter_out)
     
     try:
-        query = {"is_active": True}
-        
-        if difficulty:
-            query["difficulty"] = difficulty
-        
-        letters = await db.letter_pairs.find(query).to_list(1000)
+        letters, next_cursor = await _fetch_page(read_db.letter_pairs, query, LETTER_PROJECTION, limit, cursor)
         
-        return {
+        # Rows are already JSON-safe; skip jsonable_encoder
+        return ORJSONResponse({
             "total": len(letters),
-            "letters": [
-                {
-                    "id": str(letter["_id"]),
-                    "letterPair": letter["letterPair"],
-                    "description": letter["description"],
-                    "difficulty": letter["difficulty"],
-                    "imageUrl": letter.get("imageUrl"),
-                    "created_at": letter.get("created_at").isoformat() if letter.get("created_at") else None
-                }
-                for letter in letters
-            ]
-        }
+            "next_cursor": next_cursor,
+            "letters": [_letter_out(letter) for letter in letters]
+        })
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching letter pairs: {str(e)}")
 
@@ -176,6 +320,7 @@ async def delete_letter(letter_id: str):
         
         if result.matched_count == 0:
             raise HTTPException(status_code=404, detail="Letter pair not found")
+        invalidate_stats_cache()
         
         return {"message": "Letter pair deleted successfully"}
     
@@ -183,35 +328,72 @@ async def delete_letter(letter_id: str):
         raise HTTPException(status_code=500, detail=f"Error deleting letter pair: {str(e)}")
 
 
+@router.post("/letters/import")
+async def import_letters(file: UploadFile = File(...)):
+    """Bulk import letter pairs from a CSV, JSON array or NDJSON upload."""
+    rows = iter_upload_rows(file.file, file.filename, file.content_type)
+    result = await import_rows(db.letter_pairs, rows, LetterData, _letter_doc)
+
+    if result["inserted"]:
+        invalidate_stats_cache()
+
+    return {
+        "received": result["received"],
+        "inserted": len(result["inserted"]),
+        "failed": len(result["errors"]),
+        "errors": result["errors"]
+    }
+
+
 # Content Statistics Endpoints
+def _count_by(field: str) -> list:
+    return [{"$group": {"_id": f"${field}", "count": {"$sum": 1}}}]
+
+def _counts(rows: list) -> dict:
+    return {str(row["_id"]): row["count"] for row in rows if row["_id"] is not None}
+
+async def _collection_stats(collection, group_fields: list[str]) -> dict:
+    """Total plus per-value counts for each field, in one $facet round trip."""
+    facets = {"total": [{"$count": "n"}]}
+    for field in group_fields:
+        facets[field] = _count_by(field)
+
+    result = await collection.aggregate([
+        {"$match": {"is_active": True}},
+        {"$facet": facets}
+    ]).to_list(1)
+    result = result[0] if result else {}
+
+    total = result.get("total", [])
+    stats = {"total": total[0]["n"] if total else 0}
+    for field in group_fields:
+        stats[f"by_{field}"] = _counts(result.get(field, []))
+
+    # Keep the original keys present even when empty
+    stats["by_difficulty"] = {**{d: 0 for d in DEFAULT_DIFFICULTIES}, **stats["by_difficulty"]}
+    return stats
+
 @router.get("/stats")
 async def get_content_stats():
     """Get statistics about added content"""
     
+    if _stats_cache["value"] is not None and _stats_cache["expires_at"] > time.monotonic():
+        return _stats_cache["value"]
+
     try:
-        total_sounds = await db.sounds.count_documents({"is_active": True})
-        total_letters = await db.letter_pairs.count_documents({"is_active": True})
-        
-        sounds_by_difficulty = {}
-        for difficulty in ["easy", "medium", "hard"]:
-            count = await db.sounds.count_documents({"is_active": True, "difficulty": difficulty})
-            sounds_by_difficulty[difficulty] = count
-        
-        letters_by_difficulty = {}
-        for difficulty in ["easy", "medium", "hard"]:
-            count = await db.letter_pairs.count_documents({"is_active": True, "difficulty": difficulty})
-            letters_by_difficulty[difficulty] = count
+        sounds, letters = await asyncio.gather(
+            _collection_stats(read_db.sounds, ["difficulty", "category"]),
+            _collection_stats(read_db.letter_pairs, ["difficulty"])
+        )
         
-        return {
-            "sounds": {
-                "total": total_sounds,
-                "by_difficulty": sounds_by_difficulty
-            },
-            "letters": {
-                "total": total_letters,
-                "by_difficulty": letters_by_difficulty
-            }
+        stats = {
+            "sounds": sounds,
+            "letters": letters
         }
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching stats: {str(e)}")
+
+    _stats_cache["value"] = stats
+    _stats_cache["expires_at"] = time.monotonic() + STATS_TTL_SECONDS
+    return stats
@@ -0,0 +1,115 @@
+from datetime import timedelta
+from fastapi import APIRouter, Query
+from services.rollups import get_buckets, window_totals
+
+router = APIRouter(prefix="/api/dashboard", tags=["dashboard"])
+
+# How far back the dashboard looks, and the hard cap on bucket documents read.
+# Reads stay bounded by these numbers regardless of how many logs a user has;
+# learning issues are summed per module in the database, so they return one
+# row per module whatever the window.
+ISSUES_WINDOW_DAYS = 30
+HISTORY_WINDOW_HOURS = 72
+MAX_BUCKETS = 500
+
+MODULE_INFO = {
+    "sound_safari": {"name": "Sound Safari", "emoji": "🦁"},
+    "sound-safari": {"name": "Sound Safari", "emoji": "🦁"},
+    "sound_slicer": {"name": "Sound Slicer", "emoji": "✂️"},
+    "word_builder": {"name": "Word Builder", "emoji": "🧱"},
+    "twin_letters": {"name": "Twin Letters AR", "emoji": "📱"},
+    "ar-hunt": {"name": "AR Hunt", "emoji": "🔍"},
+}
+
+# Which modules feed which learning issue card on the dashboard
+LEARNING_ISSUES = [
+    {
+        "id": "phonic",
+        "title": "Phonic Issues",
+        "emoji": "🔤",
+        "color": "from-blue-400 to-blue-500",
+        "description": "Difficulty in associating sounds with letters or letter combinations",
+        "modules": ["sound_safari", "sound-safari", "sound_slicer"],
+    },
+    {
+        "id": "comprehensive",
+        "title": "Comprehension Issues",
+        "emoji": "📖",
+        "color": "from-purple-400 to-purple-500",
+        "description": "Challenges in understanding and grasping written content",
+        "modules": ["word_builder", "ar-hunt"],
+    },
+    {
+        "id": "vocabulary",
+        "title": "Vocabulary Issues",
+        "emoji": "📚",
+        "color": "from-green-400 to-green-500",
+        "description": "Limited word recognition and vocabulary building difficulties",
+        "modules": ["word_builder"],
+    },
+    {
+        "id": "writing",
+        "title": "Writing Issues",
+        "emoji": "✍️",
+        "color": "from-pink-400 to-pink-500",
+        "description": "Difficulty in written expression and spelling accuracy",
+        "modules": ["twin_letters"],
+    },
+]
+
+
+@router.get("/learning-issues/{user_id}")
+async def get_learning_issues(user_id: str, days: int = Query(ISSUES_WINDOW_DAYS, ge=1, le=365)):
+    """Per-issue attempts and accuracy, summed from the daily buckets."""
+    per_module = await window_totals(user_id, timedelta(days=days))
+
+    issues = []
+    for issue in LEARNING_ISSUES:
+        attempts = sum(per_module.get(m, {}).get("attempts", 0) for m in issue["modules"])
+        if attempts == 0:
+            continue
+        correct = sum(per_module.get(m, {}).get("correct", 0) for m in issue["modules"])
+        response_time = sum(per_module.get(m, {}).get("total_response_time_ms", 0) for m in issue["modules"])
+        issues.append({
+            "id": issue["id"],
+            "title": issue["title"],
+            "emoji": issue["emoji"],
+            "color": issue["color"],
+            "description": issue["description"],
+            "progress": round(correct / attempts * 100, 1),
+            "attempts": attempts,
+            "correct": correct,
+            "wrong": attempts - correct,
+            "mean_response_time_ms": round(response_time / attempts),
+        })
+
+    return {"issues": issues, "window_days": days}
+
+
+@router.get("/activity-history/{user_id}")
+async def get_activity_history(user_id: str, limit: int = Query(20, ge=1, le=100)):
+    """Recent activity, one entry per module per hour."""
+    buckets = await get_buckets(user_id, "hour", timedelta(hours=HISTORY_WINDOW_HOURS), limit)
+
+    activities = []
+    for b in buckets:
+        info = MODULE_INFO.get(b["module_id"], {"name": b["module_id"], "emoji": "📚"})
+        attempts = b.get("attempts", 0) or 1
+        accuracy = b.get("correct", 0) / attempts
+        activities.append({
+            "_id": str(b["_id"]),
+            "module_id": b["module_id"],
+            "module": info["name"],
+            "emoji": info["emoji"],
+            "timestamp": b.get("last_seen", b["bucket_start"]),
+            "bucket_start": b["bucket_start"],
+            "attempts": b.get("attempts", 0),
+            "correct_count": b.get("correct", 0),
+            "accuracy": round(accuracy * 100, 1),
+            # The card shows a single tick/cross per entry
+            "correct": accuracy >= 0.5,
+            "response_time_ms": round(b.get("total_response_time_ms", 0) / attempts),
+            "level": b.get("last_level"),
+        })
+
+    return {"activities": activities}
@@ -0,0 +1,33 @@
+import time
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from database import client, pool_stats, DB_NAME
+from services.executors import executor_stats
+
+router = APIRouter(prefix="/health", tags=["health"])
+
+@router.get("/db")
+async def db_health():
+    """Round-trip latency of a ping plus connection pool usage."""
+    start = time.perf_counter()
+    try:
+        await client.admin.command("ping")
+    except Exception as e:
+        return JSONResponse(status_code=503, content={
+            "status": "down",
+            "database": DB_NAME,
+            "error": str(e),
+            "pool": pool_stats.snapshot()
+        })
+
+    return {
+        "status": "ok",
+        "database": DB_NAME,
+        "ping_ms": round((time.perf_counter() - start) * 1000, 2),
+        "pool": pool_stats.snapshot()
+    }
+
+@router.get("/executors")
+async def executors_health():
+    """Per task class: workers, running and queued calls, queue wait and run times."""
+    return executor_stats()
@@ -1,10 +1,17 @@
 import os
+import json
 import random
+import zlib
 from datetime import datetime
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request
+from pydantic import ValidationError
 from database import db
-from schemas import UserProgress, GameModuleResponse
-from services.adaptive_logic import get_user_level, update_user_performance
+from schemas import UserProgress, GameModuleResponse, OfflineProgressEvent, SessionBundle
+from services.adaptive_logic import get_user_level, apply_performance_batch
+from services.ingest import progress_buffer, write_offline_events
+from services.rollups import module_totals
+from services.responses import trusted, make_etag, cache_headers, is_not_modified, not_modified, json_response
+from services.bundles import pick_tasks, asset_manifest, BUNDLE_DEFAULT_SIZE, BUNDLE_MAX_SIZE
 
 router = APIRouter(prefix="/api")
 
@@ -30,24 +37,165 @@ async def get_content(module_id: str, user_id: str):
     
     # 4. Construct Response (Matching GameModuleResponse Schema)
     # The 'content' field in DB already matches the Pydantic Union schema
-    return {
+    return trusted({
         "task_id": str(task["_id"]),
         "module_id": task["module_id"],
         "level": task["level"],
         "epoch": task["epoch"],
         "content": task["content"] # This contains audio_url, choices, target_letter, etc.
-    }
+    })
+
+
+@router.get("/module/{module_id}/{user_id}/bundle", response_model=SessionBundle)
+async def get_session_bundle(module_id: str, user_id: str, count: int = Query(BUNDLE_DEFAULT_SIZE, ge=1, le=BUNDLE_MAX_SIZE)):
+    """
+    The next `count` tasks at the user's current level in one response, with a
+    manifest of their audio/image/model URLs and sizes to prefetch in parallel.
+    Attempts are still reported one by one to /report-progress (or in bulk to
+    /report-progress/bulk), so leveling works as before; fetch a new bundle
+    when this one runs out to pick up a level change.
+    """
+    level = await get_user_level(user_id, module_id)
+    tasks = await pick_tasks(module_id, level, count)
+
+    if not tasks:
+        raise HTTPException(status_code=404, detail=f"No content found for module {module_id} at level {level}")
+
+    assets = asset_manifest(tasks)
+    return trusted({
+        "user_id": user_id,
+        "module_id": module_id,
+        "level": level,
+        "tasks": [
+            {
+                "task_id": str(task["_id"]),
+                "module_id": task["module_id"],
+                "level": task["level"],
+                "epoch": task["epoch"],
+                "content": task["content"]
+            }
+            for task in tasks
+        ],
+        "assets": assets,
+        "total_bytes": sum(a["size"] or 0 for a in assets)
+    })
 
 
 @router.post("/report-progress")
 async def report(response: UserProgress):
-    # Log the attempt
-    await db.logs.insert_one(response.model_dump())
-    
-    # Update adaptive logic (level up/down)
-    await update_user_performance(response.user_id, response.is_correct)
+    # Queue the attempt; the buffer writes logs, dashboard buckets and
+    # adaptive level changes (level up/down) once per flush batch
+    event_id = await progress_buffer.add(response)
     
-    return {"status": "success"}
+    return {"status": "success", "event_id": event_id}
+
+
+# ===== OFFLINE SYNC =====
+BULK_MAX_BYTES = int(os.getenv("BULK_SYNC_MAX_BYTES", str(50 * 1024 * 1024)))  # after decompression
+BULK_CHUNK_SIZE = 1000
+BULK_INFLATE_STEP = 1024 * 1024  # most bytes a gzip chunk inflates to before the size check
+
+async def _iter_bulk_lines(request: Request):
+    """Yields decoded body lines, gunzipping on the fly when the body is gzip."""
+    gzipped = request.headers.get("content-encoding", "").lower() == "gzip"
+    decoder = zlib.decompressobj(16 + zlib.MAX_WBITS) if gzipped else None
+    received = 0
+    pending = b""
+
+    async for chunk in request.stream():
+        while chunk:
+            if decoder:
+                # Inflate in bounded steps so a small chunk can't expand unchecked
+                data = decoder.decompress(chunk, BULK_INFLATE_STEP)
+                chunk = decoder.unconsumed_tail
+            else:
+                data, chunk = chunk, b""
+            received += len(data)
+            if received > BULK_MAX_BYTES:
+                raise HTTPException(status_code=413, detail="Sync payload too large")
+            pending += data
+            *lines, pending = pending.split(b"\n")
+            for line in lines:
+                yield line
+
+    if decoder:
+        pending += decoder.flush()
+    yield pending
+
+async def _iter_bulk_events(request: Request):
+    """
+    Yields (index, raw_event) from either NDJSON (one event per line, parsed as it
+    streams in) or a JSON body holding an array / {"events": [...]}.
+    """
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" in content_type or "jsonl" in content_type:
+        index = 0
+        async for line in _iter_bulk_lines(request):
+            if line.strip():
+                yield index, line
+                index += 1
+        return
+
+    body = b"\n".join([line async for line in _iter_bulk_lines(request)])
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body is not valid JSON")
+    if isinstance(payload, dict):
+        payload = payload.get("events")
+    if not isinstance(payload, list):
+        raise HTTPException(status_code=400, detail='Body must be a JSON array or {"events": [...]}')
+    for index, raw in enumerate(payload):
+        yield index, raw
+
+async def _sync_chunk(chunk: list[dict]) -> list[dict]:
+    """
+    Writes one chunk and levels its new events straight away. A chunk whose keys
+    are claimed is fully applied, so if a later chunk fails and the client
+    retries, the chunks skipped as duplicates have already been leveled.
+    """
+    fresh = await write_offline_events(chunk)
+    if fresh:
+        await apply_performance_batch(fresh)
+    return fresh
+
+@router.post("/report-progress/bulk")
+async def report_bulk(request: Request):
+    """
+    Offline sync: accepts thousands of timestamped progress events in one request
+    (JSON or NDJSON, optionally gzip). Events are deduped on their idempotency_key,
+    written in chunks, and adaptive leveling is replayed in timestamp order as
+    each chunk is written (send events oldest first).
+    """
+    received = 0
+    written = []
+    rejected = []
+    chunk = []
+
+    async for index, raw in _iter_bulk_events(request):
+        received += 1
+        try:
+            event = OfflineProgressEvent.model_validate_json(raw) if isinstance(raw, bytes) \
+                else OfflineProgressEvent.model_validate(raw)
+        except ValidationError as e:
+            rejected.append({"index": index, "error": e.errors(include_url=False)[0]["msg"]})
+            continue
+
+        chunk.append(event.model_dump())
+        if len(chunk) >= BULK_CHUNK_SIZE:
+            written += await _sync_chunk(chunk)
+            chunk = []
+
+    if chunk:
+        written += await _sync_chunk(chunk)
+
+    return {
+        "status": "success",
+        "received": received,
+        "inserted": len(written),
+        "duplicates": received - len(rejected) - len(written),
+        "rejected": rejected
+    }
 
 
 # ===== SOUND SAFARI MODULE =====
@@ -55,14 +203,11 @@ async def report(response: UserProgress):
 async def get_sound_safari_module(user_id: str):
     """Get Sound Safari module information and current progress"""
     
-    # Get user's Sound Safari progress from logs
-    sound_safari_logs = await db.logs.find({
-        "user_id": user_id,
-        "module": "Sound Safari"
-    }).to_list(100)
+    # Get user's Sound Safari progress from the rollup buckets, which outlive raw logs
+    totals = await module_totals(user_id, ["sound_safari", "sound-safari"])
     
-    total_attempts = len(sound_safari_logs)
-    correct_attempts = len([log for log in sound_safari_logs if log.get("correct", False)])
+    total_attempts = totals["attempts"]
+    correct_attempts = totals["correct"]
     
     return {
         "module_id": "sound-safari",
@@ -83,14 +228,11 @@ async def get_sound_safari_module(user_id: str):
 async def get_twin_letters_ar_module(user_id: str):
     """Get Twin Letters AR module information and current progress"""
     
-    # Get user's Twin Letters AR progress from logs
-    twin_letters_logs = await db.logs.find({
-        "user_id": user_id,
-        "module": "Twin Letters AR"
-    }).to_list(100)
+    # Get user's Twin Letters AR progress from the rollup buckets, which outlive raw logs
+    totals = await module_totals(user_id, ["twin_letters"])
     
-    total_attempts = len(twin_letters_logs)
-    correct_attempts = len([log for log in twin_letters_logs if log.get("correct", False)])
+    total_attempts = totals["attempts"]
+    correct_attempts = totals["correct"]
     
     return {
         "module_id": "twin-letters-ar",
@@ -108,16 +250,26 @@ async def get_twin_letters_ar_module(user_id: str):
 
 # ===== GET ALL MODULES INFO =====
 @router.get("/modules/all/{user_id}")
-async def get_all_modules(user_id: str):
+async def get_all_modules(request: Request, user_id: str):
     """Get all available modules with their progress"""
     
     sound_safari = await get_sound_safari_module(user_id)
     twin_letters = await get_twin_letters_ar_module(user_id)
     
-    return {
+    # Everything else in the body is static, so the counts are the validator
+    etag = make_etag(
+        "modules", user_id,
+        sound_safari["attempts"], sound_safari["correct"],
+        twin_letters["attempts"], twin_letters["correct"]
+    )
+    headers = cache_headers(etag)
+    if is_not_modified(request, etag):
+        return not_modified(headers)
+
+    return json_response({
         "modules": [sound_safari, twin_letters],
         "total_modules": 2
-    }
+    }, headers)
 
 
 # ===== CREATE/ADD SOUND SAFARI MODULE =====
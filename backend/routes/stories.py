@@ -1,27 +1,49 @@
-from fastapi import APIRouter, Query
+import asyncio
+from fastapi import APIRouter, Query, Request
 from database import db
 from services.analytics import get_weak_letters
 from services.llm import generate_stories_from_mistakes
 from services.image_gen import generate_and_save_image
 from services.audio_gen import generate_and_save_audio
+from services.executors import run_in
+from services.responses import make_etag, cache_headers, is_not_modified, not_modified, json_response
 from schemas import StoryListResponse
 from datetime import datetime
 
 router = APIRouter(prefix="/api/stories", tags=["stories"])
 
 @router.get("/{user_id}", response_model=StoryListResponse)
-async def get_stories(user_id: str, refresh: bool = Query(False)):
-    existing_record = await db.generated_stories.find_one({"user_id": user_id})
-    if existing_record and not refresh:
-        return existing_record
+async def get_stories(request: Request, user_id: str, refresh: bool = Query(False)):
+    if not refresh:
+        # Stories only change when regenerated, so generated_at is the validator.
+        # Check it before loading the (large) stories themselves.
+        existing = await db.generated_stories.find_one({"user_id": user_id}, {"_id": 0, "generated_at": 1})
+        if existing and existing.get("generated_at"):
+            generated_at = existing["generated_at"]
+            etag = make_etag("stories", user_id, generated_at.isoformat())
+            headers = cache_headers(etag, last_modified=generated_at)
+            if is_not_modified(request, etag, generated_at):
+                return not_modified(headers)
+
+            existing_record = await db.generated_stories.find_one(
+                {"user_id": user_id},
+                {"_id": 0, "stories": 1, "generated_at": 1}
+            )
+            return json_response(existing_record, headers, model=StoryListResponse)
 
     # 1. Generate Text
     weak_letters = await get_weak_letters(user_id)
     new_stories = await generate_stories_from_mistakes(weak_letters)
     
     print("Generating Multimedia Assets...")
-    
+
     # 2. Generate Assets
+    # The Clipdrop and Azure calls block, so they run on the shared network/tts
+    # pools, all at once; the pools bound how many are in flight
+    async def fill(target: dict, key: str, task_class: str, fn, *args):
+        target[key] = await run_in(task_class, fn, *args)
+
+    jobs = []
     for story in new_stories:
         # Determine Language for this specific story
         # Default to English if LLM forgets to add the tag
@@ -29,18 +51,20 @@ async def get_stories(user_id: str, refresh: bool = Query(False)):
 
         # Cover Image
         if "cover_image_prompt" in story:
-            story["cover_image_url"] = generate_and_save_image(story["cover_image_prompt"])
-        
+            jobs.append(fill(story, "cover_image_url", "network", generate_and_save_image, story["cover_image_prompt"]))
+
         # Pages
         if "pages" in story:
             for page in story["pages"]:
                 # Generate Image
                 if "image_prompt" in page:
-                    page["image_url"] = generate_and_save_image(page["image_prompt"])
-                
+                    jobs.append(fill(page, "image_url", "network", generate_and_save_image, page["image_prompt"]))
+
                 # Generate Audio (Passing Language!)
                 if "text" in page:
-                    page["audio_url"] = generate_and_save_audio(page["text"], story_lang)
+                    jobs.append(fill(page, "audio_url", "tts", generate_and_save_audio, page["text"], story_lang))
+
+    await asyncio.gather(*jobs)
 
     # 3. Save to DB
     story_doc = {
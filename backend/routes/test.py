@@ -2,7 +2,7 @@ import base64
 import io
 import os
 import json
-import math
+from datetime import datetime
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
@@ -10,10 +10,10 @@ import numpy as np
 from typing import List, Optional
 
 # FastAPI & Pydantic
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Request, Query
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import BaseModel, Field
 
 # Image Processing
 from PIL import Image, ImageOps, ImageFilter
@@ -23,6 +23,20 @@ from torchvision import transforms
 import google.generativeai as genai
 from dotenv import load_dotenv
 
+from services.curriculum import get_curriculum as active_curriculum
+from services.audio_preprocess import prepare_audio, AudioError, AudioTooLong, PREPROCESS_VERSION
+from services.fluency import trivial_result, words_per_minute, METRICS_VERSION
+from services.speech_assessment import get_assessor, assessor_version
+from services.analysis_cache import cache_key, file_fingerprint, writing_cache, speaking_cache
+from services.handwriting_scoring import WritingScorer, ENGLISH_REVERSALS, NEPALI_CONFUSIONS
+from services.strokes import rasterize_strokes, normalize_for_model, StrokeError, MAX_STROKE_WIDTH
+from services.assessments import (
+    start_session, record_result, finish_session, get_session, session_history, risk_summary, valid_question_id
+)
+from services.executors import run_in, ExecutorBusy
+from services.uploads import read_upload, AUDIO_UPLOAD_MAX_BYTES, HANDWRITING_UPLOAD_MAX_BYTES, HANDWRITING_MAX_PIXELS
+from services.responses import cache_headers, is_not_modified, not_modified, CACHE_CURRICULUM
+
 # ==========================================
 # 0. CONFIGURATION & SETUP
 # ==========================================
@@ -44,122 +58,16 @@ device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
 # 4. Model Paths (Update these to your actual paths)
 ENGLISH_MODEL_PATH = r"D:\Akshara\backend\models\emnist_26_best.pth"
 NEPALI_MODEL_PATH = r"D:\Akshara\backend\models\best_devanagari_model.pth"
+# Softmax temperatures per model (1.0 = uncalibrated)
+WRITING_TEMPERATURE_EN = float(os.getenv("WRITING_TEMPERATURE_EN", "1.0"))
+WRITING_TEMPERATURE_NE = float(os.getenv("WRITING_TEMPERATURE_NE", "1.0"))
 
 # ==========================================
-# 1. CURRICULUM (Updated)
+# 1. CURRICULUM
 # ==========================================
-# Note: Ensure these .mp3 files exist in your 'audio' folder.
-
-CURRICULUM = [
-    # --- English Writing (Listen -> Write) ---
-    { 
-        "id": 1, 
-        "type": "writing", 
-        "lang": "english", 
-        "target": "b", 
-        "audio_filename": "en_b.mp3",
-        "instruction": "Listen to the sound and write the letter." 
-    },
-    { 
-        "id": 2, 
-        "type": "writing", 
-        "lang": "english", 
-        "target": "d", 
-        "audio_filename": "en_d.mp3", 
-        "instruction": "Listen to the sound and write the letter." 
-    },
-    { 
-        "id": 3, 
-        "type": "writing", 
-        "lang": "english", 
-        "target": "p", 
-        "audio_filename": "en_p.mp3", 
-        "instruction": "Listen to the sound and write the letter." 
-    },
-    { 
-        "id": 4, 
-        "type": "writing", 
-        "lang": "english", 
-        "target": "u", 
-        "audio_filename": "en_u.mp3", 
-        "instruction": "Listen to the sound and write the letter." 
-    },
-    { 
-        "id": 5, 
-        "type": "writing", 
-        "lang": "english", 
-        "target": "s", 
-        "audio_filename": "en_s.mp3", 
-        "instruction": "Listen to the sound and write the letter." 
-    },
-
-    # --- Nepali Writing (Listen -> Write) ---
-    # Testing specific confusion pairs: ब/व, त/न, द/ध, क/फ
-    { 
-        "id": 6, 
-        "type": "writing", 
-        "lang": "nepali", 
-        "target": "ka", 
-        "audio_filename": "ne_ka.m4a", 
-        "instruction": "आवाज सुन्नुहोस् र अक्षर लेख्नुहोस्।" 
-    },
-    { 
-        "id": 7, 
-        "type": "writing", 
-        "lang": "nepali", 
-        "target": "ba", 
-        "audio_filename": "ne_ba.m4a", 
-        "instruction": "आवाज सुन्नुहोस् र अक्षर लेख्नुहोस्।" 
-    },
-    { 
-        "id": 8, 
-        "type": "writing", 
-        "lang": "nepali", 
-        "target": "da", 
-        "audio_filename": "ne_da.m4a", 
-        "instruction": "आवाज सुन्नुहोस् र अक्षर लेख्नुहोस्।" 
-    },
-    { 
-        "id": 9, 
-        "type": "writing", 
-        "lang": "nepali", 
-        "target": "ma", 
-        "audio_filename": "ne_ma.m4a", 
-        "instruction": "आवाज सुन्नुहोस् र अक्षर लेख्नुहोस्।" 
-    },
-
-    # --- English Speaking (Read Aloud) ---
-    { 
-        "id": 10, 
-        "type": "speaking", 
-        "lang": "english", 
-        "target": "The big black dog dug a deep dark ditch.", 
-        "content": "Read this sentence aloud:" 
-    },
-    { 
-        "id": 11, 
-        "type": "speaking", 
-        "lang": "english", 
-        "target": "She saw six slim snakes slide slowly.", 
-        "content": "Read this sentence aloud:" 
-    },
-
-    # --- Nepali Speaking (Read Aloud) ---
-    { 
-        "id": 12, 
-        "type": "speaking", 
-        "lang": "nepali", 
-        "target": "दिनदिनै नदी नजिक नानी नाचिन्।", 
-        "content": "यो वाक्य पढ्नुहोस्:" 
-    },
-    { 
-        "id": 13, 
-        "type": "speaking", 
-        "lang": "nepali", 
-        "target": "बाबुले धेरै भारी बोरा बोके।", 
-        "content": "यो वाक्य पढ्नुहोस्:" 
-    },
-]
+# The Writing and Speaking questions live in the curriculum package
+# (curriculum/assessment.json) and are served from its in-memory copy.
+# Note: Ensure the referenced audio files exist in your 'audio' folder.
 
 # ==========================================
 # 2. PYTORCH MODELS
@@ -250,14 +158,40 @@ def load_weights(model, path):
 active_english_model = load_weights(english_model, ENGLISH_MODEL_PATH)
 active_nepali_model = load_weights(nepali_model, NEPALI_MODEL_PATH)
 
+# Calibrated scoring over the class labels (temperatures from a held-out fit)
+ENGLISH_SCORER = WritingScorer(
+    [EMNIST_MAPPING[i] for i in range(len(EMNIST_MAPPING))], ENGLISH_REVERSALS,
+    temperature=WRITING_TEMPERATURE_EN, confusion_risk=100, error_risk=20,  # Maximum risk for mirror/rotation errors
+    correct_feedback="Correct!",
+    confusion_feedback="Mirror/Rotation Error: Wrote '{predicted}' instead of '{target}'"
+)
+NEPALI_SCORER = WritingScorer(
+    DEVANAGARI_CHARS, NEPALI_CONFUSIONS,
+    temperature=WRITING_TEMPERATURE_NE, confusion_risk=90, error_risk=30,  # High risk for specific confusion pairs
+    correct_feedback="Correct (Nepali)",
+    confusion_feedback="Visual Confusion: Wrote '{predicted}' instead of '{target}'"
+)
+
+# Weights fingerprints as loaded; part of the writing cache keys
+WRITING_MODEL_VERSIONS = {
+    "english": file_fingerprint(ENGLISH_MODEL_PATH),
+    "nepali": file_fingerprint(NEPALI_MODEL_PATH),
+}
+
 # ==========================================
 # 4. API REQUEST/RESPONSE MODELS
 # ==========================================
 
 class HandwritingSubmission(BaseModel):
     target_letter: str
-    image_base64: str
     language: str
+    # Either a PNG data URL / base64 string...
+    image_base64: Optional[str] = None
+    # ...or the pen strokes, delta-encoded (see services/strokes.py)
+    strokes: Optional[List[List[int]]] = None
+    stroke_width: float = Field(12, gt=0, le=MAX_STROKE_WIDTH)
+    session_id: Optional[str] = None
+    question_id: Optional[str] = None  # required with session_id
 
 class AnalysisResult(BaseModel):
     question_type: str  # 'writing' or 'speaking'
@@ -267,9 +201,13 @@ class AnalysisResult(BaseModel):
     is_correct: bool
     risk_weight: int
     feedback: str
-
-class FinalAssessmentRequest(BaseModel):
-    results: List[AnalysisResult]
+    metrics: Optional[dict] = None  # speaking: local fluency measurements
+    alignment: Optional[List[dict]] = None  # speaking, local ASR: word-by-word ops
+    top_k: Optional[List[dict]] = None  # writing: [{label, probability}], calibrated
+    target_probability: Optional[float] = None  # writing
+    confusion_probability: Optional[float] = None  # writing: mass on the target's confusable letters
+    failed: bool = False  # analysis errored; not scored or recorded, ask for a retry
+    question_id: Optional[str] = None  # set on results read back from a session
 
 class FinalAssessmentResponse(BaseModel):
     score_percentage: int
@@ -277,228 +215,295 @@ class FinalAssessmentResponse(BaseModel):
     risk_color: str
     summary_text: str
 
+class FinalAssessmentRequest(BaseModel):
+    # Preferred: score the server-side session
+    session_id: Optional[str] = None
+    # Legacy clients post their results back instead
+    results: List[AnalysisResult] = []
+
+class SessionStart(BaseModel):
+    user_id: str
+
+class AssessmentSession(BaseModel):
+    session_id: str
+    user_id: str
+    status: str
+    started_at: datetime
+    updated_at: datetime
+    finished_at: Optional[datetime] = None
+    count: int
+    risk_sum: float
+    final: Optional[FinalAssessmentResponse] = None
+    results: Optional[List[AnalysisResult]] = None
+
 # ==========================================
 # 5. ENDPOINTS
 # ==========================================
 
 @router.get("/curriculum")
-async def get_curriculum():
+async def get_curriculum(request: Request):
     """Returns the list of Writing and Speaking questions."""
-    return CURRICULUM
-
-@router.post("/analyze/writing", response_model=AnalysisResult)
-async def analyze_writing(data: HandwritingSubmission):
-    """Analyzes handwriting and checks for specific confusion pairs."""
-    
-    # Select Model & Config
-    if data.language == "nepali":
-        model = active_nepali_model
-        mapping = DEVANAGARI_MAPPING
-        img_size = 32
-        content_size = 24
+    curriculum = await active_curriculum()
+
+    # The curriculum version is the validator; unchanged clients get a 304
+    headers = cache_headers(curriculum.etag, cache_control=CACHE_CURRICULUM)
+    if is_not_modified(request, curriculum.etag):
+        return not_modified(headers)
+
+    return ORJSONResponse(curriculum.assessment_items, headers=headers)
+
+def _writing_config(language: str):
+    """(model, scorer, input size, glyph size) for the language."""
+    if language == "nepali":
+        return active_nepali_model, NEPALI_SCORER, 32, 24
+    return active_english_model, ENGLISH_SCORER, 28, 20
+
+def _open_drawing(image_data: bytes) -> Image.Image:
+    img = Image.open(io.BytesIO(image_data))
+    # Header only so far; refuse huge canvases before decoding the pixels
+    if img.width * img.height > HANDWRITING_MAX_PIXELS:
+        raise HTTPException(status_code=413, detail="Drawing is too large")
+    return img
+
+def _preprocess_drawing(img: Image.Image, img_size: int, content_size: int) -> Image.Image:
+    """White-on-black, thickened, cropped and centered glyph at model resolution."""
+    # Handle Transparency (Alpha to White)
+    if img.mode != 'RGB':
+        bg = Image.new("RGB", img.size, (255, 255, 255))
+        if 'A' in img.mode:
+            bg.paste(img, mask=img.split()[3])
+        else:
+            bg.paste(img)
+        img = bg
+
+    # Convert to Grayscale, Invert, Thicken
+    img = img.convert("L")
+    img = ImageOps.invert(img)
+    img = img.filter(ImageFilter.MaxFilter(5)) 
+
+    # Smart Crop & Center
+    bbox = img.getbbox()
+    if bbox:
+        img_cropped = img.crop(bbox)
+        new_img = Image.new("L", (img_size, img_size), 0)
+        img_cropped.thumbnail((content_size, content_size), Image.Resampling.LANCZOS)
+        w, h = img_cropped.size
+        x_pad = (img_size - w) // 2
+        y_pad = (img_size - h) // 2
+        new_img.paste(img_cropped, (x_pad, y_pad))
+        img = new_img
     else:
-        model = active_english_model
-        mapping = EMNIST_MAPPING
-        img_size = 28
-        content_size = 20
+        img = img.resize((img_size, img_size))
+    return img
+
+def _score_writing(img_tensor: torch.Tensor, target_letter: str, language: str) -> dict:
+    """Runs the model on a normalized [1, 1, H, W] tensor and scores its calibrated output."""
+    model, scorer, _, _ = _writing_config(language)
+
+    # --- 2. Model Prediction (one pass; top-k and confusion mass come from the same probabilities) ---
+    with torch.no_grad():
+        probs = scorer.probabilities(model(img_tensor.to(device)))
 
+    # --- 3. Dyslexia Scoring Logic (Specific to your pairs) ---
+    return scorer.score(probs[0], target_letter)
+
+WRITING_TRANSFORM = transforms.Compose([
+    transforms.ToTensor(),
+    transforms.Normalize((0.5,), (0.5,))
+])
+
+def _drawing_tensor(image_data: bytes, language: str) -> torch.Tensor:
+    """Canvas PNG bytes -> normalized [1, 1, H, W] model input (also used by benchmark_handwriting.py)."""
+    _, _, img_size, content_size = _writing_config(language)
+    img = _preprocess_drawing(_open_drawing(image_data), img_size, content_size)
+    return WRITING_TRANSFORM(img).unsqueeze(0)
+
+def _analyze_drawing(image_data: bytes, target_letter: str, language: str) -> dict:
+    model, _, img_size, content_size = _writing_config(language)
     if model is None:
         raise HTTPException(status_code=500, detail="Model not loaded on backend")
 
     try:
         # --- 1. Image Preprocessing ---
-        if "base64," in data.image_base64:
-            base64_str = data.image_base64.split("base64,")[1]
-        else:
-            base64_str = data.image_base64
-        
-        image_data = base64.b64decode(base64_str)
-        img = Image.open(io.BytesIO(image_data))
-
-        # Handle Transparency (Alpha to White)
-        if img.mode != 'RGB':
-            bg = Image.new("RGB", img.size, (255, 255, 255))
-            if 'A' in img.mode:
-                bg.paste(img, mask=img.split()[3])
-            else:
-                bg.paste(img)
-            img = bg
-
-        # Convert to Grayscale, Invert, Thicken
-        img = img.convert("L")
-        img = ImageOps.invert(img)
-        img = img.filter(ImageFilter.MaxFilter(5)) 
-
-        # Smart Crop & Center
-        bbox = img.getbbox()
-        if bbox:
-            img_cropped = img.crop(bbox)
-            new_img = Image.new("L", (img_size, img_size), 0)
-            img_cropped.thumbnail((content_size, content_size), Image.Resampling.LANCZOS)
-            w, h = img_cropped.size
-            x_pad = (img_size - w) // 2
-            y_pad = (img_size - h) // 2
-            new_img.paste(img_cropped, (x_pad, y_pad))
-            img = new_img
-        else:
-            img = img.resize((img_size, img_size))
-
-        # --- 2. Model Prediction ---
-        transform = transforms.Compose([
-            transforms.ToTensor(),
-            transforms.Normalize((0.5,), (0.5,))
-        ])
-        img_tensor = transform(img).unsqueeze(0).to(device)
-
-        with torch.no_grad():
-            output = model(img_tensor)
-            probs = F.softmax(output, dim=1)
-            confidence, predicted_idx = torch.max(probs, 1)
-            pred_char = mapping.get(predicted_idx.item(), "?")
-            conf_score = confidence.item()
-
-        # --- 3. Dyslexia Scoring Logic (Specific to your pairs) ---
-        target = data.target_letter.lower()
-        predicted = pred_char.lower()
-        is_correct = (target == predicted)
-        
-        risk_weight = 0
-        feedback = "Good match!"
-
-        if data.language == "english":
-            # English Logic (u, s, b, p, d)
-            reversals = {
-                'b': 'd', 'd': 'b', 
-                'p': 'q', 'q': 'p', 
-                'u': 'n', 'n': 'u', # Rotation
-                's': '5' # Visual approximate
-            }
-            if is_correct:
-                feedback = "Correct!"
-            elif reversals.get(target) == predicted:
-                risk_weight = 100 # Maximum risk for mirror/rotation errors
-                feedback = f"Mirror/Rotation Error: Wrote '{predicted}' instead of '{target}'"
-            else:
-                risk_weight = 20 # General error
-                feedback = f"Incorrect. Looks like '{predicted}'"
+        return _score_writing(_drawing_tensor(image_data, language), target_letter, language)
 
-        else:
-            # Nepali Logic (Specific Confusion Pairs: क/फ, ब/व, त/न, द/ध)
-            # Note: 'waw' is used for 'wa' in the class mapping usually.
-            
-            nepali_confusions = {
-                'ka': ['pha', 'pa'],   # ka vs pha
-                'ba': ['waw', 'wa', 'vaw'], # ba vs wa
-                'ta': ['na', 'la'],    # ta vs na (or bha sometimes)
-                'da': ['dha', 'gha'],  # da vs dha
-                'pha': ['ka'],
-                'waw': ['ba'],
-                'na': ['ta'],
-                'dha': ['da']
-            }
-
-            if is_correct:
-                feedback = "Correct (Nepali)"
-            elif predicted in nepali_confusions.get(target, []):
-                risk_weight = 90 # High risk for specific confusion pairs
-                feedback = f"Visual Confusion: Wrote '{predicted}' instead of '{target}'"
-            else:
-                risk_weight = 30 # Standard error
-                feedback = f"Incorrect. Looks like '{predicted}'"
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"❌ Analysis Error: {e}")
+        raise HTTPException(status_code=500, detail="Processing failed")
 
-        return {
-            "question_type": "writing",
-            "target": target,
-            "predicted": predicted,
-            "confidence": conf_score,
-            "is_correct": is_correct,
-            "risk_weight": risk_weight,
-            "feedback": feedback
-        }
+def _analyze_strokes(data: HandwritingSubmission) -> dict:
+    model, _, img_size, content_size = _writing_config(data.language)
+    if model is None:
+        raise HTTPException(status_code=500, detail="Model not loaded on backend")
+
+    try:
+        image = rasterize_strokes(data.strokes, data.stroke_width, img_size, content_size)
+    except StrokeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
+    try:
+        return _score_writing(torch.from_numpy(normalize_for_model(image)), data.target_letter, data.language)
     except Exception as e:
         print(f"❌ Analysis Error: {e}")
         raise HTTPException(status_code=500, detail="Processing failed")
 
+async def _cached_writing(data: bytes, kind: str, target_letter: str, language: str, analyze, *args) -> dict:
+    """Runs a writing analysis once per identical input, target and model."""
+    _, scorer, _, _ = _writing_config(language)
+    model_version = WRITING_MODEL_VERSIONS["nepali" if language == "nepali" else "english"]
+    key = cache_key(data, "writing", kind, target_letter.lower(), language, model_version, scorer.version)
+    result = await writing_cache.get(key)
+    if result is None:
+        # PIL preprocessing and the forward pass run on the inference threads
+        result = await run_in("inference", analyze, *args)
+        await writing_cache.put(key, result)
+    return result
+
+async def _attach(session_id: Optional[str], question_id: Optional[str], result: dict) -> dict:
+    """
+    Stores the result in the assessment session under its question, when the
+    client is in one. Failed analyses are left out, so they don't dilute the
+    score; answering a question again replaces its earlier result.
+    """
+    if not session_id or result.get("failed"):
+        return result
+    if not question_id or not valid_question_id(question_id):
+        raise HTTPException(status_code=400, detail="question_id (letters, digits, _ or -) is required with session_id")
+    if not await record_result(session_id, question_id, result):
+        raise HTTPException(status_code=404, detail="No open assessment session with that id")
+    return result
+
+@router.post("/analyze/writing", response_model=AnalysisResult)
+async def analyze_writing(data: HandwritingSubmission):
+    """Analyzes handwriting and checks for specific confusion pairs."""
+    if data.strokes is not None:
+        strokes = json.dumps([data.stroke_width, data.strokes], separators=(",", ":")).encode()
+        result = await _cached_writing(strokes, "strokes", data.target_letter, data.language, _analyze_strokes, data)
+        return await _attach(data.session_id, data.question_id, result)
+    if not data.image_base64:
+        raise HTTPException(status_code=400, detail="Send image_base64 or strokes")
+
+    if "base64," in data.image_base64:
+        base64_str = data.image_base64.split("base64,")[1]
+    else:
+        base64_str = data.image_base64
+
+    try:
+        image_data = base64.b64decode(base64_str)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="image_base64 is not valid base64")
+
+    result = await _cached_writing(
+        image_data, "image", data.target_letter, data.language,
+        _analyze_drawing, image_data, data.target_letter, data.language
+    )
+    return await _attach(data.session_id, data.question_id, result)
+
+@router.post("/analyze/writing/upload", response_model=AnalysisResult)
+async def analyze_writing_upload(
+    file: UploadFile = File(...),
+    target_letter: str = Form(...),
+    language: str = Form(...),
+    session_id: Optional[str] = Form(None),
+    question_id: Optional[str] = Form(None)
+):
+    """Same as /analyze/writing, with the PNG as a binary multipart file (no base64)."""
+    image_data = await read_upload(file, HANDWRITING_UPLOAD_MAX_BYTES)
+    result = await _cached_writing(
+        image_data, "image", target_letter, language,
+        _analyze_drawing, image_data, target_letter, language
+    )
+    return await _attach(session_id, question_id, result)
+
 @router.post("/analyze/speaking", response_model=AnalysisResult)
 async def analyze_speaking(
     file: UploadFile = File(...), 
     target_text: str = Form(...),
-    language: str = Form(...)
+    language: str = Form(...),
+    session_id: Optional[str] = Form(None),
+    question_id: Optional[str] = Form(None)
 ):
     """
-    Analyzes audio using Gemini.
+    Analyzes audio with the configured speech backend (Gemini or local ASR).
     Targets phonological processing:
     - English: "The big black dog dug a deep dark ditch" (Alliteration/Stops)
     - Nepali: "दिनदिनै नदी नजिक..." (Rhythm/Phonemes)
     """
+    return await _attach(session_id, question_id, await _analyze_speaking(file, target_text, language))
+
+async def _analyze_speaking(file: UploadFile, target_text: str, language: str) -> dict:
+    # 1. Read File (bounded) & normalize it (16 kHz mono, silence trimmed, compact encoding)
+    audio_bytes = await read_upload(file, AUDIO_UPLOAD_MAX_BYTES)
+
+    # Same bytes, text and backend version as an earlier upload: reuse its result
+    key = cache_key(
+        audio_bytes, "speaking", target_text, language,
+        assessor_version(language), PREPROCESS_VERSION, METRICS_VERSION
+    )
+    cached = await speaking_cache.get(key)
+    if cached is not None:
+        return cached
+
+    try:
+        audio = await prepare_audio(audio_bytes, file.filename, file.content_type)
+    except AudioTooLong as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except AudioError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    metrics = audio["metrics"]
+    metrics["words_per_minute"] = words_per_minute(metrics, target_text)
+
+    # Silent or far-too-short recordings are decided locally, without an LLM call
+    trivial = trivial_result(metrics, target_text)
+    if trivial:
+        risk_weight, feedback = trivial
+        result = {
+            "question_type": "speaking",
+            "target": target_text,
+            "predicted": "",
+            "confidence": 0,
+            "is_correct": False,
+            "risk_weight": risk_weight or 0,
+            "feedback": feedback,
+            "metrics": metrics,
+            # Silence is not an answer: not recorded or scored, the client retries
+            "failed": risk_weight is None
+        }
+        await speaking_cache.put(key, result)
+        return result
+
+    # 2. Score with the configured backend (Gemini or on-prem ASR)
     try:
-        if not GOOGLE_API_KEY:
-            raise HTTPException(status_code=500, detail="Google API Key missing")
+        assessor = get_assessor(language)
+    except RuntimeError as e:
+        # No backend for this language: a server problem, not a failed attempt
+        raise HTTPException(status_code=503, detail=str(e))
 
-        # 1. Read File
-        audio_bytes = await file.read()
-        
-        # 2. Initialize Gemini
-        model = genai.GenerativeModel('gemini-2.5-flash')
-        
-        # 3. Prompt for Dyslexia Assessment
-        prompt = f"""
-        Analyze this audio recording of a child reading the text: "{target_text}".
-        Language: {language}.
-
-        Dyslexia Screening Focus:
-        1. Transcribe exactly what was said.
-        2. Check for:
-           - Stuttering on plosive sounds (b, d, p, k, t).
-           - Skipping words or substituting words visually similar.
-           - Reading fluency/speed (too slow?).
-        
-        Assign 'risk_weight':
-        - 0: Fluent.
-        - 20: Minor hesitation.
-        - 60: Significant stumbling on similar sounds (e.g., 'dog' vs 'dug').
-        - 100: Inability to read or skipping multiple words.
-        
-        Return STRICT JSON:
-        {{
-            "transcribed_text": "string",
-            "accuracy_score": integer (0-100),
-            "risk_weight": integer,
-            "feedback": "Short feedback max 10 words"
-        }}
-        """
-
-        # 4. Generate Content
-        response = model.generate_content([
-            prompt,
-            {
-                "mime_type": "audio/mp3", 
-                "data": audio_bytes
-            }
-        ])
-
-        # 5. Clean and parse JSON
-        raw_text = response.text
-        if "```json" in raw_text:
-            raw_text = raw_text.split("```json")[1].split("```")[0]
-        elif "```" in raw_text:
-            raw_text = raw_text.split("```")[1].split("```")[0]
-            
-        analysis = json.loads(raw_text.strip())
+    try:
+        analysis = await assessor.assess(audio, target_text, language)
 
-        return {
+        result = {
             "question_type": "speaking",
             "target": target_text,
-            "predicted": analysis.get("transcribed_text", ""),
-            "confidence": analysis.get("accuracy_score", 0) / 100.0,
-            "is_correct": analysis.get("risk_weight", 100) < 40,
-            "risk_weight": analysis.get("risk_weight", 0),
-            "feedback": analysis.get("feedback", "Good effort!")
+            "predicted": analysis["predicted"],
+            "confidence": analysis["confidence"],
+            "is_correct": analysis["risk_weight"] < 40,
+            "risk_weight": analysis["risk_weight"],
+            "feedback": analysis["feedback"],
+            "metrics": metrics,
+            "alignment": analysis.get("alignment")
         }
+        # Failures below are not cached, so a retry gets a fresh attempt
+        await speaking_cache.put(key, result)
+        return result
 
+    except (ExecutorBusy, HTTPException):
+        raise  # overload (503) and client errors keep their status
     except Exception as e:
-        print(f"❌ Gemini Error: {e}")
+        print(f"❌ Speech Analysis Error: {e}")
         return {
             "question_type": "speaking",
             "target": target_text,
@@ -506,49 +511,40 @@ async def analyze_speaking(
             "confidence": 0,
             "is_correct": False,
             "risk_weight": 0,
-            "feedback": "Analysis failed. Try again."
+            "feedback": "Analysis failed. Try again.",
+            "metrics": metrics,
+            "failed": True
         }
 
+@router.post("/sessions", response_model=AssessmentSession)
+async def create_session(data: SessionStart):
+    """Starts an assessment session; pass its session_id and the question_id to every analyze/* call."""
+    return await start_session(data.user_id)
+
+@router.get("/sessions/{session_id}", response_model=AssessmentSession)
+async def read_session(session_id: str):
+    """One session with every recorded result, for audits and re-scoring."""
+    session = await get_session(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Assessment session not found")
+    return session
+
+@router.get("/users/{user_id}/sessions", response_model=List[AssessmentSession])
+async def user_sessions(user_id: str, limit: int = Query(20, ge=1, le=100)):
+    """A user's sessions, newest first, with totals and final scores (no per-question results)."""
+    return await session_history(user_id, limit)
+
 @router.post("/finish-assessment", response_model=FinalAssessmentResponse)
 async def calculate_final_score(data: FinalAssessmentRequest):
     """Calculates final Dyslexia Risk Score based on results."""
-    
-    if not data.results:
-        return {
-            "score_percentage": 0, 
-            "risk_label": "N/A", 
-            "risk_color": "", 
-            "summary_text": "No data."
-        }
-
-    total_risk = sum(r.risk_weight for r in data.results)
-    max_possible_risk = len(data.results) * 100
-    
-    if max_possible_risk == 0:
-        risk_percentage = 0
-    else:
-        risk_percentage = min(math.ceil((total_risk / max_possible_risk) * 100), 100)
-
-    # Determine Label
-    if risk_percentage < 25:
-        label = "Low Probability"
-        color = "text-green-600"
-        summary = "User shows strong phonological awareness and letter recognition."
-    elif risk_percentage < 60:
-        label = "Moderate Probability"
-        color = "text-orange-600"
-        summary = "Some signs of confusion with specific visual/auditory pairs detected."
-    else:
-        label = "High Probability"
-        color = "text-red-600"
-        summary = "Significant challenges with mirror letters and phonemic sequencing detected."
-
-    return {
-        "score_percentage": risk_percentage,
-        "risk_label": label,
-        "risk_color": color,
-        "summary_text": summary
-    }
+    if data.session_id:
+        final = await finish_session(data.session_id)
+        if final is None:
+            raise HTTPException(status_code=404, detail="Assessment session not found")
+        return final
+
+    scored = [r for r in data.results if not r.failed]
+    return risk_summary(sum(r.risk_weight for r in scored), len(scored))
 
 # ==========================================
 # 6. MOUNT STATIC AUDIO FOLDER
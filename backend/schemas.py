@@ -38,6 +38,15 @@ class TwinLettersTask(BaseModel):
     audio_url: Optional[str] = None # "buh" sound
     choices: List[Choice]  # These will be images (ball, bat, apple)
 
+# --- 5. AR HUNT (Find the 3D object around you) ---
+class ARHuntTask(BaseModel):
+    task_type: Literal["ar_hunt"] = "ar_hunt"
+    target_word: str       # e.g., "Apple"
+    category: Optional[str] = None  # visual group, e.g. "animal"; used to pick look-alike distractors
+    prompt_text: str
+    model_3d_url: str      # glTF scene shown in AR
+    audio_url: Optional[str] = None
+
 # --- MASTER UNION (The API Response) ---
 class GameModuleResponse(BaseModel):
     task_id: str
@@ -45,7 +54,21 @@ class GameModuleResponse(BaseModel):
     level: int
     epoch: int
     # This 'content' field can be ANY of the specific tasks above
-    content: Union[SoundSafariTask, WordBuilderTask, SoundSlicerTask, TwinLettersTask]
+    content: Union[SoundSafariTask, WordBuilderTask, SoundSlicerTask, TwinLettersTask, ARHuntTask]
+
+# --- SESSION BUNDLE (Next N tasks + assets to prefetch) ---
+class BundleAsset(BaseModel):
+    url: str
+    content_type: Optional[str] = None
+    size: Optional[int] = None  # bytes; None when the asset isn't served by us
+
+class SessionBundle(BaseModel):
+    user_id: str
+    module_id: str
+    level: int
+    tasks: List[GameModuleResponse]
+    assets: List[BundleAsset]
+    total_bytes: int  # sum of the known asset sizes
 
 # --- DB SEEDING SCHEMA ---
 class ContentCreate(BaseModel):
@@ -53,7 +76,7 @@ class ContentCreate(BaseModel):
     level: int
     epoch: int
     # We use the same Union here so we can seed different types
-    content: Union[SoundSafariTask, WordBuilderTask, SoundSlicerTask, TwinLettersTask]
+    content: Union[SoundSafariTask, WordBuilderTask, SoundSlicerTask, TwinLettersTask, ARHuntTask]
 
 # --- EXISTING ANALYTICS (Unchanged) ---
 class UserProgress(BaseModel):
@@ -66,6 +89,10 @@ class UserProgress(BaseModel):
     response_time_ms: int
     timestamp: datetime = Field(default_factory=datetime.utcnow)
 
+class OfflineProgressEvent(UserProgress):
+    # Generated on the device so a re-sent sync doesn't double count
+    idempotency_key: str = Field(..., min_length=1, max_length=128)
+
 # --- EXISTING STORY SCHEMAS (Unchanged) ---
 class StoryPage(BaseModel):
     text: str
@@ -3,13 +3,14 @@ Seed sample learning data for testing the dashboard
 """
 import asyncio
 from datetime import datetime, timedelta
-from database import db
+from services.log_store import delete_logs, insert_logs
+from services.rollups import rebuild_rollups
 
 async def seed_sample_data():
     USER_ID = "child_123"  # Default test user
     
     # Clear existing logs for this user
-    await db.logs.delete_many({"user_id": USER_ID})
+    await delete_logs({"user_id": USER_ID})
     
     # Create sample logs for different modules
     sample_logs = [
@@ -37,7 +38,8 @@ async def seed_sample_data():
     
     # Insert sample logs
     if sample_logs:
-        result = await db.logs.insert_many(sample_logs)
+        await insert_logs(sample_logs)
+        await rebuild_rollups(user_id=USER_ID)
         print(f"✅ Seeded {len(sample_logs)} sample log entries for user: {USER_ID}")
         return len(sample_logs)
     
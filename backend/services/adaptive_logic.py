@@ -1,4 +1,7 @@
+import asyncio
+from collections import defaultdict, deque
 from database import db
+from services.log_store import find_logs
 
 async def get_user_level(user_id: str, module_id: str) -> int:
     user = await db.users.find_one({"user_id": user_id})
@@ -10,11 +13,42 @@ async def get_user_level(user_id: str, module_id: str) -> int:
 async def update_user_performance(user_id: str, is_correct: bool):
     if is_correct:
         # Check last 5 attempts
-        history = await db.logs.find({"user_id": user_id})\
-                              .sort("timestamp", -1)\
-                              .limit(5).to_list(5)
+        history = await find_logs({"user_id": user_id}, sort=("timestamp", -1), limit=5)
         
         correct_streak = sum(1 for log in history if log["is_correct"])
         
         if correct_streak >= 4: # If 4 out of 5 are correct, level up
-            await db.users.update_one({"user_id": user_id}, {"$inc": {"current_level": 1}})
\ No newline at end of file
+            await db.users.update_one({"user_id": user_id}, {"$inc": {"current_level": 1}})
+
+async def _apply_user_batch(user_id: str, events: list[dict]):
+    events = sorted(events, key=lambda e: e["timestamp"])
+
+    # Window of the attempts logged before this batch, oldest first
+    prior = await find_logs(
+        {"user_id": user_id, "timestamp": {"$lt": events[0]["timestamp"]}},
+        sort=("timestamp", -1),
+        limit=5
+    )
+    window = deque((log["is_correct"] for log in reversed(prior)), maxlen=5)
+
+    # Replay the same rule update_user_performance applies per attempt
+    level_ups = 0
+    for event in events:
+        window.append(event["is_correct"])
+        if event["is_correct"] and sum(window) >= 4:
+            level_ups += 1
+
+    if level_ups:
+        await db.users.update_one({"user_id": user_id}, {"$inc": {"current_level": level_ups}})
+
+async def apply_performance_batch(events: list[dict]):
+    """
+    Applies adaptive leveling for a batch of already-logged attempts.
+    Equivalent to calling update_user_performance once per attempt in
+    timestamp order, but with one read and at most one write per user.
+    """
+    by_user = defaultdict(list)
+    for event in events:
+        by_user[event["user_id"]].append(event)
+
+    await asyncio.gather(*(_apply_user_batch(user_id, user_events) for user_id, user_events in by_user.items()))
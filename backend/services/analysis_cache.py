@@ -0,0 +1,127 @@
+import copy
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional
+from dotenv import load_dotenv
+from database import db, ensure_ttl_index
+
+load_dotenv()
+
+# Result cache for the analyze/* endpoints.
+# Retries after a timeout, double taps and automated tests resubmit the exact
+# same recording or drawing; the cached result is returned instead of paying
+# for another Gemini call or CNN pass. Keys hash the input bytes together with
+# the target, the language and a version string for whatever produced the
+# result (model weights fingerprint, Gemini model + prompt hash, ASR model),
+# so a new model or prompt never serves old results; they simply age out.
+#   memory - per process, LRU with a TTL, for everything
+#   mongo  - db.analysis_cache with a TTL index, for speaking results only
+ANALYSIS_CACHE_SIZE = int(os.getenv("ANALYSIS_CACHE_SIZE", "1024"))
+ANALYSIS_CACHE_TTL_S = float(os.getenv("ANALYSIS_CACHE_TTL_S", "3600"))
+ANALYSIS_CACHE_DB_TTL_DAYS = int(os.getenv("ANALYSIS_CACHE_DB_TTL_DAYS", "7"))
+
+# Bump when preprocessing or scoring code changes in a way versions don't capture
+CACHE_SCHEMA = "2"
+
+
+async def ensure_analysis_cache_indexes():
+    await ensure_ttl_index(db.analysis_cache, "created_at", ANALYSIS_CACHE_DB_TTL_DAYS * 86400, "created_at_ttl")
+
+
+def cache_key(data: bytes, *parts) -> str:
+    """sha256 over the schema, the key parts and the input bytes."""
+    h = hashlib.sha256(CACHE_SCHEMA.encode())
+    for part in parts:
+        h.update(b"\0" + str(part).encode())
+    h.update(b"\0")
+    h.update(data)
+    return h.hexdigest()
+
+
+def file_fingerprint(path: str) -> str:
+    """
+    Cheap version string for a weights file or model directory: changes when
+    a file is replaced. Hub ids and missing paths give a fixed marker.
+    """
+    if os.path.isdir(path):
+        files = [os.path.join(path, f) for f in sorted(os.listdir(path))]
+    else:
+        files = [path]
+    stats = []
+    for f in files:
+        try:
+            st = os.stat(f)
+        except OSError:
+            continue
+        stats.append(f"{os.path.basename(f)}|{st.st_size}|{st.st_mtime_ns}")
+    if not stats:
+        return "missing"
+    return hashlib.sha1("\n".join(stats).encode()).hexdigest()[:12]
+
+
+class AnalysisCache:
+    def __init__(self, name: str, persistent: bool = False,
+                 max_entries: int = ANALYSIS_CACHE_SIZE, ttl_s: float = ANALYSIS_CACHE_TTL_S):
+        self.name = name
+        self.persistent = persistent
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _remember(self, key: str, result: dict):
+        self._entries[key] = (time.monotonic() + self.ttl_s, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, result = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(result)
+            del self._entries[key]
+
+        if self.persistent:
+            try:
+                doc = await db.analysis_cache.find_one({"_id": key}, {"result": 1})
+            except Exception as e:
+                print(f"⚠️ Analysis cache ({self.name}) read failed: {e}")
+                doc = None
+            if doc is not None:
+                self._remember(key, doc["result"])
+                self.hits += 1
+                return copy.deepcopy(doc["result"])
+
+        self.misses += 1
+        return None
+
+    async def put(self, key: str, result: dict):
+        result = copy.deepcopy(result)
+        self._remember(key, result)
+        if self.persistent:
+            try:
+                await db.analysis_cache.replace_one(
+                    {"_id": key},
+                    {"kind": self.name, "result": result, "created_at": datetime.utcnow()},
+                    upsert=True,
+                )
+            except Exception as e:
+                print(f"⚠️ Analysis cache ({self.name}) write failed: {e}")
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+writing_cache = AnalysisCache("writing")
+speaking_cache = AnalysisCache("speaking", persistent=True)
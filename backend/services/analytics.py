@@ -1,4 +1,4 @@
-from database import db
+from services.log_store import find_logs
 from collections import Counter
 
 async def get_weak_letters(user_id: str, limit: int = 3) -> list[str]:
@@ -6,10 +6,10 @@ async def get_weak_letters(user_id: str, limit: int = 3) -> list[str]:
     Analyzes logs to find the letters the child struggles with.
     """
     # 1. Fetch recent WRONG attempts
-    wrong_logs = await db.logs.find({
+    wrong_logs = await find_logs({
         "user_id": user_id, 
         "is_correct": False
-    }).sort("timestamp", -1).limit(50).to_list(50)
+    }, sort=("timestamp", -1), limit=50, secondary=True)
 
     if not wrong_logs:
         return []
@@ -0,0 +1,126 @@
+import asyncio
+import random
+from collections import defaultdict
+from typing import Optional
+from database import db
+from services.curriculum import published_state
+
+# Distractor index for AR Hunt.
+# Built from the `ar-hunt` tasks in db.content (what /api/admin/seed-ar
+# publishes) and tagged with the published curriculum (version, revision);
+# every worker rebuilds it when a publish anywhere moves that pointer (see
+# services/curriculum.py). Tasks are grouped by level, and
+# within a level by initial sound (phonetic look-alikes) and by category
+# (visual look-alikes), so a request samples its distractors in O(k) instead
+# of rebuilding a pool over the whole catalogue.
+AR_MODULE_ID = "ar-hunt"
+DISTRACTOR_COUNT = 3
+# How many of the distractors should be confusable with the target
+SIMILAR_DISTRACTORS = 1
+
+# Letter pairs that make one sound at the start of a word
+DIGRAPHS = ("ch", "sh", "th", "ph", "wh", "kn", "wr")
+
+
+def initial_sound(word: str) -> str:
+    word = word.strip().lower()
+    for digraph in DIGRAPHS:
+        if word.startswith(digraph):
+            return digraph
+    return word[:1]
+
+
+def _task(doc: dict) -> dict:
+    return {
+        "task_id": doc.get("task_id") or str(doc["_id"]),
+        "module_id": doc["module_id"],
+        "level": doc["level"],
+        "epoch": doc["epoch"],
+        "content": doc["content"]
+    }
+
+
+def _sample_excluding(group: list, k: int, exclude: set) -> list:
+    """Samples up to k tasks from `group` skipping ids in `exclude`, in O(k + len(exclude))."""
+    if k <= 0 or not group:
+        return []
+    picked = random.sample(group, min(len(group), k + len(exclude)))
+    return [t for t in picked if t["task_id"] not in exclude][:k]
+
+
+class DistractorIndex:
+    """Read-only lookup tables over one snapshot of the AR Hunt catalogue."""
+
+    def __init__(self, tasks: list[dict], published: tuple = (None, None)):
+        self.tasks = tasks
+        self.published = published  # (version, revision) it was built for
+        self.by_id = {t["task_id"]: t for t in tasks}
+        self.by_level = defaultdict(list)
+        self.by_sound = defaultdict(list)
+        self.by_category = defaultdict(list)
+        for t in tasks:
+            level = t["level"]
+            self.by_level[level].append(t)
+            self.by_sound[(level, initial_sound(t["content"]["target_word"]))].append(t)
+            category = t["content"].get("category")
+            if category:
+                self.by_category[(level, category)].append(t)
+
+    def distractors(self, target: dict, k: int = DISTRACTOR_COUNT) -> list[dict]:
+        """
+        Up to SIMILAR_DISTRACTORS look-alikes from the target's level first,
+        then the rest of its level, then any level.
+        """
+        level = target["level"]
+        content = target["content"]
+        chosen = []
+        exclude = {target["task_id"]}
+
+        def take(group: list, n: int):
+            for t in _sample_excluding(group, n, exclude):
+                chosen.append(t)
+                exclude.add(t["task_id"])
+
+        similar = min(SIMILAR_DISTRACTORS, k)
+        take(self.by_sound.get((level, initial_sound(content["target_word"])), []), similar)
+        take(self.by_category.get((level, content.get("category")), []), similar - len(chosen))
+        take(self.by_level.get(level, []), k - len(chosen))
+        take(self.tasks, k - len(chosen))
+        return chosen
+
+
+_index: Optional[DistractorIndex] = None
+_rebuild_lock = asyncio.Lock()
+
+
+async def _published_key() -> tuple:
+    state = await published_state()
+    return (state.get("version"), state.get("revision"))
+
+
+async def load_distractor_index() -> DistractorIndex:
+    published = await _published_key()
+    docs = await db.content.find(
+        {"module_id": AR_MODULE_ID},
+        {"task_id": 1, "module_id": 1, "level": 1, "epoch": 1, "content": 1}
+    ).to_list(None)
+    return DistractorIndex([_task(d) for d in docs], published)
+
+
+async def refresh_distractor_index() -> DistractorIndex:
+    """Rebuilds the index from db.content and swaps it in."""
+    global _index
+    _index = await load_distractor_index()
+    print(f"🎯 AR distractor index: {len(_index.tasks)} tasks, {len(_index.by_level)} levels")
+    return _index
+
+
+async def get_distractor_index() -> DistractorIndex:
+    """The index for the currently published content, rebuilt once per publish."""
+    if _index is not None and _index.published == await _published_key():
+        return _index
+    async with _rebuild_lock:
+        # Concurrent requests wait for one rebuild instead of each running it
+        if _index is not None and _index.published == await _published_key():
+            return _index
+        return await refresh_distractor_index()
@@ -0,0 +1,161 @@
+import math
+import re
+from datetime import datetime
+from typing import Optional
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, ReturnDocument
+from database import db
+
+# Server-side assessment sessions.
+# One document per screening run in db.assessment_sessions:
+#   {_id, user_id, status: "open" | "finished", started_at, updated_at,
+#    results: {<question_id>: AnalysisResult + "question_id" + "at"},
+#    count, risk_sum, final?}
+# Every analyze/* call with a session_id stores its result under its question
+# and adjusts the running totals in the same update, so finishing only reads
+# two counters. Answering a question again (a retry, a double tap, a cached
+# result) replaces its result instead of counting it twice.
+
+# Fields for history listings; the per-question results stay out
+SUMMARY_PROJECTION = {"results": 0}
+QUESTION_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+
+def valid_question_id(question_id: str) -> bool:
+    """Question ids become field names under `results`, so they are kept plain."""
+    return bool(QUESTION_ID_PATTERN.fullmatch(question_id))
+
+
+async def ensure_assessment_indexes():
+    await db.assessment_sessions.create_index(
+        [("user_id", ASCENDING), ("started_at", DESCENDING)], name="user_started"
+    )
+
+
+def risk_summary(risk_sum: float, count: int) -> dict:
+    """Final score and label from the summed risk_weight of `count` results."""
+    if not count:
+        return {
+            "score_percentage": 0,
+            "risk_label": "N/A",
+            "risk_color": "",
+            "summary_text": "No data."
+        }
+
+    risk_percentage = min(math.ceil((risk_sum / (count * 100)) * 100), 100)
+
+    # Determine Label
+    if risk_percentage < 25:
+        label = "Low Probability"
+        color = "text-green-600"
+        summary = "User shows strong phonological awareness and letter recognition."
+    elif risk_percentage < 60:
+        label = "Moderate Probability"
+        color = "text-orange-600"
+        summary = "Some signs of confusion with specific visual/auditory pairs detected."
+    else:
+        label = "High Probability"
+        color = "text-red-600"
+        summary = "Significant challenges with mirror letters and phonemic sequencing detected."
+
+    return {
+        "score_percentage": risk_percentage,
+        "risk_label": label,
+        "risk_color": color,
+        "summary_text": summary
+    }
+
+
+def _session_id(session_id: str) -> Optional[ObjectId]:
+    return ObjectId(session_id) if ObjectId.is_valid(session_id) else None
+
+
+def _public(doc: dict) -> dict:
+    doc["session_id"] = str(doc.pop("_id"))
+    if isinstance(doc.get("results"), dict):
+        doc["results"] = sorted(doc["results"].values(), key=lambda r: r["at"])
+    return doc
+
+
+async def start_session(user_id: str) -> dict:
+    now = datetime.utcnow()
+    doc = {
+        "user_id": user_id,
+        "status": "open",
+        "started_at": now,
+        "updated_at": now,
+        "results": {},
+        "count": 0,
+        "risk_sum": 0,
+    }
+    await db.assessment_sessions.insert_one(doc)
+    return _public(doc)
+
+
+async def record_result(session_id: str, question_id: str, result: dict) -> bool:
+    """
+    Stores one question's analysis in an open session, replacing an earlier
+    answer to it; False if there is no such open session.
+    """
+    oid = _session_id(session_id)
+    if oid is None:
+        return False
+    now = datetime.utcnow()
+    previous = f"$results.{question_id}"
+    # One pipeline update, evaluated against the stored document: the totals
+    # move by the difference from the previous answer, atomically
+    updated = await db.assessment_sessions.update_one(
+        {"_id": oid, "status": "open", "results": {"$type": "object"}},
+        [{"$set": {
+            "count": {"$add": ["$count", {"$cond": [{"$eq": [{"$type": previous}, "missing"]}, 1, 0]}]},
+            "risk_sum": {"$add": [
+                "$risk_sum",
+                result.get("risk_weight", 0),
+                {"$multiply": [-1, {"$ifNull": [f"{previous}.risk_weight", 0]}]},
+            ]},
+            f"results.{question_id}": {"$literal": {**result, "question_id": question_id, "at": now}},
+            "updated_at": now,
+        }}],
+    )
+    return updated.matched_count == 1
+
+
+async def finish_session(session_id: str) -> Optional[dict]:
+    """
+    Closes the session and stores its final score; None if it doesn't exist.
+    Finishing again returns the stored score.
+    """
+    oid = _session_id(session_id)
+    if oid is None:
+        return None
+    totals = await db.assessment_sessions.find_one(
+        {"_id": oid}, {"count": 1, "risk_sum": 1, "final": 1}
+    )
+    if totals is None:
+        return None
+    if totals.get("final"):
+        return totals["final"]
+
+    final = risk_summary(totals["risk_sum"], totals["count"])
+    # Only the totals that were scored get finalized; a result that landed in
+    # between is caught by the filter and the session is scored again
+    doc = await db.assessment_sessions.find_one_and_update(
+        {"_id": oid, "count": totals["count"], "final": {"$exists": False}},
+        {"$set": {"status": "finished", "final": final, "finished_at": datetime.utcnow()}},
+        projection={"final": 1},
+        return_document=ReturnDocument.AFTER,
+    )
+    return doc["final"] if doc else await finish_session(session_id)
+
+
+async def get_session(session_id: str) -> Optional[dict]:
+    oid = _session_id(session_id)
+    doc = await db.assessment_sessions.find_one({"_id": oid}) if oid else None
+    return _public(doc) if doc else None
+
+
+async def session_history(user_id: str, limit: int) -> list[dict]:
+    """Newest-first session summaries for a user (served by the user_started index)."""
+    cursor = db.assessment_sessions.find({"user_id": user_id}, SUMMARY_PROJECTION) \
+        .sort("started_at", DESCENDING).limit(limit)
+    return [_public(doc) async for doc in cursor]
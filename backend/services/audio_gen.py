@@ -1,6 +1,7 @@
 import os
 import hashlib
 import azure.cognitiveservices.speech as speechsdk
+from gtts import gTTS
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -61,4 +62,29 @@ def generate_and_save_audio(text: str, language: str = "English") -> str:
 
     except Exception as e:
         print(f"Audio Gen Error: {e}")
-        return ""
\ No newline at end of file
+        return ""
+
+# --- Phonic clips for the game curriculum (gTTS) ---
+PHONIC_URL_PREFIX = "/audio"
+
+def phonic_audio_filename(text: str, lang: str = "en") -> str:
+    # Same text + language always maps to the same cached file
+    text_hash = hashlib.md5(f"{text}_{lang}".encode()).hexdigest()
+    return f"phonic_{text_hash}.mp3"
+
+def generate_phonic_audio(text: str, lang: str = "en") -> str:
+    """
+    Generates a short phonic clip with gTTS into the audio cache, once.
+    Blocking (network call): run it off the event loop.
+    Returns the URL path served by the /audio mount.
+    """
+    filename = phonic_audio_filename(text, lang)
+    file_path = os.path.join(AUDIO_DIR, filename)
+
+    if not os.path.exists(file_path):
+        # Write to a temp name first so a failed download never leaves a broken cache entry
+        tmp_path = f"{file_path}.part"
+        gTTS(text=text, lang=lang).save(tmp_path)
+        os.replace(tmp_path, file_path)
+
+    return f"{PHONIC_URL_PREFIX}/{filename}"
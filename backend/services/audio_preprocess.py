@@ -0,0 +1,131 @@
+import io
+import os
+import tempfile
+import numpy as np
+import soundfile as sf
+import soxr
+from dotenv import load_dotenv
+from services.fluency import fluency_metrics
+from services.executors import run_in
+
+load_dotenv()
+
+# Speech recording preprocessing, run in the audio process pool before analysis.
+# Browser recordings arrive as WebM/Ogg/WAV/MP3 at 44.1-48 kHz stereo with
+# long silences at both ends; the model only needs 16 kHz mono speech.
+# Each upload is decoded, downmixed, resampled, trimmed, length-checked and
+# re-encoded compactly, and labelled with its real MIME type.
+TARGET_SAMPLE_RATE = 16000
+AUDIO_MAX_DURATION_S = float(os.getenv("AUDIO_MAX_DURATION_S", "30"))
+AUDIO_TRIM_TOP_DB = float(os.getenv("AUDIO_TRIM_TOP_DB", "35"))
+AUDIO_TRIM_PAD_S = 0.2  # keep a little silence around the speech
+# "opus" (Ogg/Opus, smallest) or "flac" (lossless)
+AUDIO_ENCODING = os.getenv("AUDIO_ENCODING", "opus").lower()
+# Settings that change the output, for analysis cache keys
+PREPROCESS_VERSION = f"{TARGET_SAMPLE_RATE}|{AUDIO_MAX_DURATION_S}|{AUDIO_TRIM_TOP_DB}|{AUDIO_TRIM_PAD_S}|{AUDIO_ENCODING}"
+
+ENCODINGS = {
+    "opus": ("OGG", "OPUS", "audio/ogg"),
+    "flac": ("FLAC", "PCM_16", "audio/flac"),
+}
+
+# Container guesses for the ffmpeg fallback, from the browser's content type
+SUFFIXES = {"webm": ".webm", "ogg": ".ogg", "mp4": ".m4a", "m4a": ".m4a", "mpeg": ".mp3", "mp3": ".mp3", "wav": ".wav"}
+
+
+class AudioError(ValueError):
+    """The upload can't be used: undecodable or empty."""
+
+
+class AudioTooLong(AudioError):
+    pass
+
+
+# --- Worker side (runs in the pool; keep this module light to import) ---
+def _decode(data: bytes, filename: str, content_type: str):
+    """Returns (samples[frames, channels], sample_rate). libsndfile first, ffmpeg for WebM/MP4."""
+    try:
+        samples, sr = sf.read(io.BytesIO(data), dtype="float32", always_2d=True)
+        return samples, sr
+    except Exception:
+        pass
+
+    # libsndfile can't read WebM/MP4; librosa falls back to audioread (ffmpeg),
+    # which needs a real file with a sensible extension
+    import librosa
+    suffix = os.path.splitext(filename or "")[1]
+    if not suffix:
+        suffix = next((s for key, s in SUFFIXES.items() if key in (content_type or "")), ".webm")
+    # Closed before loading: Windows can't reopen a file that is still open
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as f:
+        f.write(data)
+    try:
+        samples, sr = librosa.load(f.name, sr=None, mono=False)
+    except Exception as e:
+        raise AudioError(f"Unsupported or corrupt audio ({content_type or suffix}): {e}")
+    finally:
+        os.remove(f.name)
+    samples = np.atleast_2d(samples).T  # librosa is [channels, frames]
+    return samples.astype(np.float32), sr
+
+
+def _trim(y: np.ndarray, sr: int) -> np.ndarray:
+    import librosa
+    _, (start, end) = librosa.effects.trim(y, top_db=AUDIO_TRIM_TOP_DB)
+    pad = int(AUDIO_TRIM_PAD_S * sr)
+    return y[max(0, start - pad):min(len(y), end + pad)]
+
+
+def _encode(y: np.ndarray, sr: int):
+    fmt, subtype, mime = ENCODINGS.get(AUDIO_ENCODING, ENCODINGS["flac"])
+    buf = io.BytesIO()
+    try:
+        sf.write(buf, y, sr, format=fmt, subtype=subtype)
+    except Exception:
+        # Older libsndfile builds can't write Opus
+        fmt, subtype, mime = ENCODINGS["flac"]
+        buf = io.BytesIO()
+        sf.write(buf, y, sr, format=fmt, subtype=subtype)
+    return buf.getvalue(), mime
+
+
+def preprocess_audio(data: bytes, filename: str = "", content_type: str = "") -> dict:
+    """
+    Decode -> mono -> 16 kHz -> trim silence -> duration check -> encode.
+    Returns {"data", "mime_type", "duration_s", "original_duration_s", "sample_rate",
+    "metrics"}, where metrics are the fluency measurements of the trimmed signal.
+    Raises AudioError for input we can't use.
+    """
+    if not data:
+        raise AudioError("Empty recording")
+
+    samples, sr = _decode(data, filename, content_type)
+    if samples.size == 0:
+        raise AudioError("Empty recording")
+
+    y = samples.mean(axis=1) if samples.shape[1] > 1 else samples[:, 0]
+    original_duration = len(y) / sr
+    if sr != TARGET_SAMPLE_RATE:
+        y = soxr.resample(y, sr, TARGET_SAMPLE_RATE)
+        sr = TARGET_SAMPLE_RATE
+
+    y = _trim(y, sr)
+    duration = len(y) / sr
+    if duration > AUDIO_MAX_DURATION_S:
+        raise AudioTooLong(f"Recording is {duration:.0f}s of audio; the limit is {AUDIO_MAX_DURATION_S:.0f}s")
+
+    encoded, mime = _encode(y, sr)
+    return {
+        "data": encoded,
+        "mime_type": mime,
+        "duration_s": round(duration, 2),
+        "original_duration_s": round(original_duration, 2),
+        "sample_rate": sr,
+        "metrics": fluency_metrics(y, sr),
+    }
+
+
+# --- Caller side ---
+async def prepare_audio(data: bytes, filename: str = "", content_type: str = "") -> dict:
+    """Runs preprocess_audio in the audio process pool."""
+    return await run_in("audio", preprocess_audio, data, filename, content_type)
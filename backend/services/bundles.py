@@ -0,0 +1,70 @@
+import mimetypes
+import os
+from urllib.parse import urlparse
+from database import db
+from services.model_assets import MODEL_ASSET_DIR
+
+# Session bundles: the next N tasks for a user in one response, plus a
+# manifest of every asset they reference so the client can prefetch them
+# in parallel instead of between questions.
+BUNDLE_DEFAULT_SIZE = 10
+BUNDLE_MAX_SIZE = 50
+
+# URL prefix -> directory, for the static mounts in main.py
+LOCAL_MOUNTS = {
+    "/audio/": "audio",
+    "/images/": "images",
+    "/models/": MODEL_ASSET_DIR,
+}
+LOCAL_HOSTS = {"", "localhost:8000", "127.0.0.1:8000"}
+
+# Content fields that hold an asset URL
+ASSET_FIELDS = ("audio_url", "image_url", "model_3d_url")
+
+
+async def pick_tasks(module_id: str, level: int, count: int) -> list[dict]:
+    """Up to `count` distinct random tasks at this level."""
+    return await db.learning_modules.aggregate([
+        {"$match": {"module_id": module_id, "level": level}},
+        {"$sample": {"size": count}},
+    ]).to_list(count)
+
+
+def _asset_urls(content: dict):
+    for name in ASSET_FIELDS:
+        if content.get(name):
+            yield content[name]
+    for choice in content.get("choices") or content.get("scrambled_letters") or []:
+        if choice.get("image_url"):
+            yield choice["image_url"]
+
+
+def _local_path(url: str):
+    parsed = urlparse(url)
+    if parsed.netloc not in LOCAL_HOSTS:
+        return None
+    for prefix, directory in LOCAL_MOUNTS.items():
+        if parsed.path.startswith(prefix):
+            name = os.path.basename(parsed.path)
+            return os.path.join(directory, name) if name else None
+    return None
+
+
+def asset_manifest(tasks: list[dict]) -> list[dict]:
+    """Distinct asset URLs across `tasks`, with sizes for the files we serve ourselves."""
+    assets = {}
+    for task in tasks:
+        for url in _asset_urls(task["content"]):
+            if url in assets:
+                continue
+            path = _local_path(url)
+            try:
+                size = os.path.getsize(path) if path else None
+            except OSError:
+                size = None
+            assets[url] = {
+                "url": url,
+                "content_type": mimetypes.guess_type(urlparse(url).path)[0],
+                "size": size,
+            }
+    return list(assets.values())
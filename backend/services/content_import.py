@@ -0,0 +1,180 @@
+import asyncio
+import csv
+import io
+import itertools
+import json
+import os
+from bson import ObjectId
+from pydantic import BaseModel, ValidationError
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+from services.audio_gen import generate_and_save_audio
+from services.executors import run_in
+
+# Bulk content import: stream-parse an uploaded CSV / JSON / NDJSON file,
+# validate each row with the same model the single-item endpoint uses, and
+# write the valid rows with unordered bulk writes in chunks. Parsing and
+# validation run a chunk at a time on the io pool, never on the event loop.
+IMPORT_CHUNK_SIZE = 1000
+IMPORT_MAX_ROWS = int(os.getenv("CONTENT_IMPORT_MAX_ROWS", "50000"))
+
+DUPLICATE_KEY = 11000
+NOT_UTF8 = "File is not UTF-8 text; rows from here on were not read"
+
+
+def _upload_format(filename: str, content_type: str) -> str:
+    name = (filename or "").lower()
+    if name.endswith(".csv") or "csv" in (content_type or ""):
+        return "csv"
+    if name.endswith((".ndjson", ".jsonl")) or "ndjson" in (content_type or ""):
+        return "ndjson"
+    return "json"
+
+
+def iter_upload_rows(fileobj, filename: str, content_type: str):
+    """
+    Yields (row_number, raw_row) from the upload. CSV and NDJSON are read
+    line by line from the spooled file; a JSON array is parsed in one go.
+    Unparseable rows are yielded as (row_number, ValueError); a file that
+    isn't UTF-8 ends with one such error instead of raising.
+    """
+    fmt = _upload_format(filename, content_type)
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+
+    if fmt == "csv":
+        reader = csv.DictReader(text)
+        row_number = 0
+        while True:
+            row_number += 1
+            try:
+                row = next(reader)
+            except StopIteration:
+                return
+            except UnicodeDecodeError:
+                yield row_number, ValueError(NOT_UTF8)
+                return
+            except csv.Error as e:
+                # The reader moves past the bad line, so the rest still imports
+                yield row_number, ValueError(f"Invalid CSV: {e}")
+                continue
+            # Empty CSV cells mean "use the model default"
+            yield row_number, {k: v for k, v in row.items() if k and v not in (None, "")}
+
+    if fmt == "ndjson":
+        lines = iter(text)
+        row_number = 0
+        while True:
+            try:
+                line = next(lines)
+            except StopIteration:
+                return
+            except UnicodeDecodeError:
+                yield row_number + 1, ValueError(NOT_UTF8)
+                return
+            if not line.strip():
+                continue
+            row_number += 1
+            try:
+                yield row_number, json.loads(line)
+            except ValueError as e:
+                yield row_number, ValueError(f"Invalid JSON: {e}")
+
+    try:
+        rows = json.load(text)
+    except UnicodeDecodeError:
+        yield 0, ValueError(NOT_UTF8)
+        return
+    except ValueError as e:
+        yield 0, ValueError(f"Invalid JSON: {e}")
+        return
+    for row_number, row in enumerate(rows if isinstance(rows, list) else [rows], start=1):
+        yield row_number, row
+
+
+def _validation_message(e: ValidationError) -> str:
+    first = e.errors(include_url=False)[0]
+    location = ".".join(str(part) for part in first["loc"])
+    return f"{location}: {first['msg']}" if location else first["msg"]
+
+
+async def _write_chunk(collection, chunk: list[tuple[int, dict]], errors: list) -> list[dict]:
+    """Unordered bulk insert; returns inserted docs and records failures per row."""
+    try:
+        await collection.bulk_write([InsertOne(doc) for _, doc in chunk], ordered=False)
+        return [doc for _, doc in chunk]
+    except BulkWriteError as e:
+        failed = {}
+        for err in e.details.get("writeErrors", []):
+            failed[err["index"]] = "duplicate" if err.get("code") == DUPLICATE_KEY else err.get("errmsg", "write failed")
+        for index, reason in failed.items():
+            errors.append({"row": chunk[index][0], "error": reason})
+        return [doc for i, (_, doc) in enumerate(chunk) if i not in failed]
+
+
+def _parse_batch(rows, model: type[BaseModel], to_doc, limit: int) -> tuple[list, list, int]:
+    """
+    Reads up to `limit` rows from the blocking row iterator and validates them.
+    Returns (valid (row_number, doc) pairs, row errors, rows read).
+    """
+    chunk = []
+    errors = []
+    read = 0
+    for row_number, raw in itertools.islice(rows, limit):
+        read += 1
+        if isinstance(raw, Exception):
+            errors.append({"row": row_number, "error": str(raw)})
+            continue
+        try:
+            item = model.model_validate(raw)
+        except ValidationError as e:
+            errors.append({"row": row_number, "error": _validation_message(e)})
+            continue
+
+        doc = to_doc(item)
+        doc.setdefault("_id", ObjectId())
+        chunk.append((row_number, doc))
+    return chunk, errors, read
+
+
+async def import_rows(collection, rows, model: type[BaseModel], to_doc) -> dict:
+    """
+    Validates rows with `model`, converts them with `to_doc` and bulk inserts
+    them. Returns counts, the inserted docs and a per-row error report.
+    """
+    rows = iter(rows)
+    errors = []
+    inserted = []
+    received = 0
+
+    while True:
+        limit = min(IMPORT_CHUNK_SIZE, IMPORT_MAX_ROWS - received)
+        if limit <= 0:
+            extra = await run_in("io", next, rows, None)
+            if extra is not None:
+                received += 1
+                errors.append({"row": extra[0], "error": f"Import limit of {IMPORT_MAX_ROWS} rows reached"})
+            break
+
+        chunk, chunk_errors, read = await run_in("io", _parse_batch, rows, model, to_doc, limit)
+        received += read
+        errors += chunk_errors
+        if chunk:
+            inserted += await _write_chunk(collection, chunk, errors)
+        if read < limit:
+            break
+
+    errors.sort(key=lambda e: e["row"])
+    return {"received": received, "inserted": inserted, "errors": errors}
+
+
+async def generate_sound_audio(collection, docs: list[dict], language: str = "English"):
+    """Generates TTS for newly imported sounds on the bounded tts pool and stores audio_url."""
+
+    async def one(doc):
+        url = await run_in("tts", generate_and_save_audio, doc["sound"], language)
+        return UpdateOne({"_id": doc["_id"]}, {"$set": {"audio_url": url}}) if url else None
+
+    updates = [u for u in await asyncio.gather(*(one(d) for d in docs)) if u]
+    for start in range(0, len(updates), IMPORT_CHUNK_SIZE):
+        await collection.bulk_write(updates[start:start + IMPORT_CHUNK_SIZE], ordered=False)
+    print(f"🔊 Generated audio for {len(updates)}/{len(docs)} imported sounds")
@@ -0,0 +1,313 @@
+import asyncio
+import json
+import os
+import time
+from datetime import datetime
+from typing import List, Literal, Optional
+from pydantic import BaseModel, Field
+from pymongo import InsertOne, ReplaceOne, DeleteMany, ReturnDocument
+from database import db
+from schemas import ContentCreate, SoundSafariTask, ARHuntTask, Choice
+from services.audio_gen import generate_phonic_audio
+from services.model_assets import localize_model, prune_models
+from services.executors import run_in, ExecutorBusy
+
+# Curriculum-as-data.
+# The curriculum package is a directory of JSON files (see curriculum/):
+#   manifest.json      {"version": <int>, "description": ...}
+#   sound_safari.json  {"module_id": ..., "items": [SoundSafariItem, ...]}
+#   ar_hunt.json       {"module_id": ..., "items": [ARHuntItem, ...]}
+#   assessment.json    {"items": [AssessmentItem, ...]}
+# It is validated once on load, kept in memory, and published to Mongo.
+# db.curriculum_meta {_id: "active"} points at the published version once
+# every module is written; workers follow it, so they all serve one version.
+CURRICULUM_DIR = os.getenv("CURRICULUM_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), "curriculum"))
+# How often a worker re-reads the published pointer
+CURRICULUM_POLL_S = float(os.getenv("CURRICULUM_POLL_S", "10"))
+
+
+# --- File schemas ---
+class PhonicChoice(BaseModel):
+    id: str
+    letter: str
+
+class SoundSafariItem(BaseModel):
+    level: int = Field(..., ge=1)
+    epoch: int = Field(..., ge=0)
+    target_letter: str
+    phonic_sound: str
+    choices: List[PhonicChoice] = Field(..., min_length=2)
+
+class ARHuntItem(BaseModel):
+    task_id: str
+    level: int = Field(..., ge=1)
+    epoch: int = Field(..., ge=0)
+    target_word: str
+    category: Optional[str] = None
+    prompt_text: str
+    model_3d_url: str
+    audio_url: Optional[str] = None
+
+class AssessmentItem(BaseModel):
+    id: int
+    type: Literal["writing", "speaking"]
+    lang: Literal["english", "nepali"]
+    target: str
+    audio_filename: Optional[str] = None
+    instruction: Optional[str] = None
+    content: Optional[str] = None
+
+class SoundSafariFile(BaseModel):
+    module_id: str
+    items: List[SoundSafariItem]
+
+class ARHuntFile(BaseModel):
+    module_id: str
+    items: List[ARHuntItem]
+
+class AssessmentFile(BaseModel):
+    items: List[AssessmentItem]
+
+class Manifest(BaseModel):
+    version: int = Field(..., ge=1)
+    description: str = ""
+
+
+# --- Loaded curriculum ---
+class Curriculum:
+    """An immutable, validated curriculum version."""
+
+    def __init__(self, manifest: Manifest, sound_safari: SoundSafariFile, ar_hunt: ARHuntFile, assessment: AssessmentFile):
+        self.version = manifest.version
+        self.description = manifest.description
+        self.sound_safari = sound_safari
+        self.ar_hunt = ar_hunt
+        self.assessment = assessment
+        # Weak: the bytes differ once the response is compressed
+        self.etag = f'W/"curriculum-v{self.version}"'
+
+        # Assessment questions, served as plain dicts
+        self.assessment_items = [item.model_dump(exclude_none=True) for item in assessment.items]
+
+
+def _read_json(directory: str, name: str):
+    with open(os.path.join(directory, name), encoding="utf-8") as f:
+        return json.load(f)
+
+def load_curriculum(directory: str = CURRICULUM_DIR) -> Curriculum:
+    """Reads and validates a curriculum package. Raises on any schema error."""
+    curriculum = Curriculum(
+        manifest=Manifest.model_validate(_read_json(directory, "manifest.json")),
+        sound_safari=SoundSafariFile.model_validate(_read_json(directory, "sound_safari.json")),
+        ar_hunt=ARHuntFile.model_validate(_read_json(directory, "ar_hunt.json")),
+        assessment=AssessmentFile.model_validate(_read_json(directory, "assessment.json")),
+    )
+    _check_unique(curriculum)
+    return curriculum
+
+def _check_unique(curriculum: Curriculum):
+    for module_file in (curriculum.sound_safari, curriculum.ar_hunt):
+        keys = [(item.level, item.epoch) for item in module_file.items]
+        if len(keys) != len(set(keys)):
+            raise ValueError(f"Duplicate (level, epoch) in {module_file.module_id}")
+    ids = [item.id for item in curriculum.assessment.items]
+    if len(ids) != len(set(ids)):
+        raise ValueError("Duplicate assessment question id")
+
+
+# The active version for this process. Replaced as a whole, never mutated,
+# so a request always sees one consistent version.
+_active: Optional[Curriculum] = None
+# Last read of the published pointer, and when it was read
+_published: dict = {}
+_published_at = 0.0
+# A published version this worker's package doesn't have (warned once)
+_missing_version = None
+
+async def published_state() -> dict:
+    """
+    The published pointer ({version, revision, ...}), re-read at most every
+    CURRICULUM_POLL_S. Empty until something has been published.
+    """
+    global _published, _published_at
+    if time.monotonic() - _published_at >= CURRICULUM_POLL_S:
+        try:
+            _published = await db.curriculum_meta.find_one({"_id": "active"}) or {}
+        except Exception as e:
+            print(f"⚠️ Could not read the published curriculum version: {e}")
+        _published_at = time.monotonic()
+    return _published
+
+async def get_curriculum() -> Curriculum:
+    """This worker's curriculum, switched to the published version when another worker publishes."""
+    global _active, _missing_version
+    if _active is None:
+        _active = await run_in("io", load_curriculum)
+
+    version = (await published_state()).get("version")
+    if version and version != _active.version and version != _missing_version:
+        try:
+            curriculum = await run_in("io", load_curriculum)
+        except Exception as e:
+            _missing_version = version
+            print(f"⚠️ Could not load curriculum v{version}: {e}")
+            return _active
+        if curriculum.version == version:
+            print(f"🔄 Curriculum v{version} published, switching from v{_active.version}")
+            _active = curriculum
+        else:
+            _missing_version = version
+            print(f"⚠️ Curriculum v{version} is published but the package here is v{curriculum.version}")
+    return _active
+
+def set_curriculum(curriculum: Curriculum):
+    global _active
+    _active = curriculum
+
+
+# --- Publishing to Mongo ---
+def _content_key(doc: dict) -> tuple:
+    return (doc["module_id"], doc["level"], doc["epoch"])
+
+async def sync_module_content(items: list[dict], version: int) -> dict:
+    """
+    Makes db.content match `items` for the modules they cover.
+    Unchanged tasks are left alone, so re-publishing is cheap and keeps _ids stable.
+    """
+    items = [{**item, "curriculum_version": version} for item in items]
+    module_ids = sorted({item["module_id"] for item in items})
+    existing = await db.content.find({"module_id": {"$in": module_ids}}).to_list(None)
+    existing_by_key = {_content_key(doc): doc for doc in existing}
+    wanted_keys = {_content_key(item) for item in items}
+
+    ops = []
+    inserted = updated = 0
+    for item in items:
+        current = existing_by_key.get(_content_key(item))
+        if current is None:
+            ops.append(InsertOne(item))
+            inserted += 1
+        elif {k: v for k, v in current.items() if k != "_id"} != item:
+            ops.append(ReplaceOne({"_id": current["_id"]}, item))
+            updated += 1
+
+    stale = [doc["_id"] for key, doc in existing_by_key.items() if key not in wanted_keys]
+    if stale:
+        ops.append(DeleteMany({"_id": {"$in": stale}}))
+
+    if ops:
+        await db.content.bulk_write(ops, ordered=False)
+
+    return {
+        "inserted": inserted,
+        "updated": updated,
+        "deleted": len(stale),
+        "unchanged": len(items) - inserted - updated
+    }
+
+async def record_published_version(curriculum: Optional[Curriculum], modules: list[str]):
+    """
+    Bumps the pointer's revision after content is written. Only a publish of
+    every module (curriculum given) moves the version workers follow.
+    """
+    global _published, _published_at
+    update = {"$inc": {"revision": 1}, "$set": {"modules": modules, "published_at": datetime.utcnow()}}
+    if curriculum is not None:
+        update["$set"]["version"] = curriculum.version
+    _published = await db.curriculum_meta.find_one_and_update(
+        {"_id": "active"}, update, upsert=True, return_document=ReturnDocument.AFTER
+    )
+    _published_at = time.monotonic()
+
+# --- Module builders ---
+# gTTS requests and model downloads run on the shared tts / network pools,
+# which also bound how many are in flight at once while publishing
+async def _phonic_urls(texts: set[str]) -> dict:
+    """Generates (or reuses) phonic audio concurrently, off the event loop."""
+
+    async def one(text: str) -> str:
+        return await run_in("tts", generate_phonic_audio, text, "en")
+
+    texts = sorted(texts)
+    return dict(zip(texts, await asyncio.gather(*(one(t) for t in texts))))
+
+async def sound_safari_content(curriculum: Curriculum) -> list[dict]:
+    module = curriculum.sound_safari
+    urls = await _phonic_urls({item.phonic_sound for item in module.items})
+    return [
+        ContentCreate(
+            module_id=module.module_id,
+            level=item.level,
+            epoch=item.epoch,
+            content=SoundSafariTask(
+                audio_url=urls[item.phonic_sound],
+                target_letter=item.target_letter,
+                choices=[Choice(id=c.id, content=c.letter, type="text") for c in item.choices]
+            )
+        ).model_dump()
+        for item in module.items
+    ]
+
+async def _model_urls(sources: set[str]) -> dict:
+    """Proxies AR models into the local /models store; keeps the source URL if that fails."""
+
+    async def one(source: str) -> str:
+        try:
+            return await run_in("network", localize_model, source)
+        except ExecutorBusy:
+            raise  # publish later rather than ship the remote URL
+        except Exception as e:
+            print(f"⚠️ Could not cache model {source}: {e}")
+            return source
+
+    sources = sorted(sources)
+    return dict(zip(sources, await asyncio.gather(*(one(s) for s in sources))))
+
+async def prune_unused_models() -> int:
+    """Drops stored model versions no content points at any more (after a publish)."""
+    referenced = set()
+    for collection in (db.content, db.learning_modules):
+        referenced.update(await collection.distinct("content.model_3d_url"))
+    return await run_in("io", prune_models, referenced)
+
+async def ar_hunt_content(curriculum: Curriculum) -> list[dict]:
+    module = curriculum.ar_hunt
+    urls = await _model_urls({item.model_3d_url for item in module.items})
+    docs = []
+    for item in module.items:
+        doc = ContentCreate(
+            module_id=module.module_id,
+            level=item.level,
+            epoch=item.epoch,
+            content=ARHuntTask(
+                target_word=item.target_word,
+                category=item.category,
+                prompt_text=item.prompt_text,
+                model_3d_url=urls[item.model_3d_url],
+                audio_url=item.audio_url
+            )
+        ).model_dump()
+        doc["task_id"] = item.task_id
+        docs.append(doc)
+    return docs
+
+async def publish_sound_safari(curriculum: Curriculum) -> dict:
+    result = await sync_module_content(await sound_safari_content(curriculum), curriculum.version)
+    await record_published_version(None, [curriculum.sound_safari.module_id])
+    return result
+
+async def publish_ar_hunt(curriculum: Curriculum) -> dict:
+    result = await sync_module_content(await ar_hunt_content(curriculum), curriculum.version)
+    await record_published_version(None, [curriculum.ar_hunt.module_id])
+    await prune_unused_models()
+    return result
+
+async def publish_curriculum(curriculum: Curriculum) -> dict:
+    """Publishes every module, then moves the version pointer once."""
+    result = {
+        "sound-safari": await sync_module_content(await sound_safari_content(curriculum), curriculum.version),
+        "ar-hunt": await sync_module_content(await ar_hunt_content(curriculum), curriculum.version),
+    }
+    await record_published_version(curriculum, [curriculum.sound_safari.module_id, curriculum.ar_hunt.module_id])
+    await prune_unused_models()
+    return result
@@ -0,0 +1,177 @@
+import asyncio
+import functools
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Shared executors for blocking work called from async routes.
+# Nothing CPU-bound or blocking runs on the event loop: callers await
+# run_in(<task class>, fn, *args) and the work goes to that class's pool.
+#   audio     - process pool (spawned): decode/resample/trim/encode, fluency metrics
+#   inference - threads: PIL preprocessing + torch forward for handwriting
+#               (the models live in this process; torch and PIL release the GIL)
+#   asr       - threads: local speech recognition (seconds per call, kept apart
+#               so it never holds up handwriting)
+#   tts       - threads: Azure (.get()) and gTTS synthesis
+#   network   - threads: outbound HTTP (Clipdrop, model downloads)
+#   io        - threads: local files (the progress spill, parsing bulk uploads)
+# Each class has EXECUTOR_<NAME>_WORKERS and EXECUTOR_<NAME>_MAX_QUEUE.
+# Callers beyond the worker count wait on the event loop, not in the pool,
+# so queue depth and wait time are measured exactly; with a MAX_QUEUE set,
+# calls past it are refused with ExecutorBusy (a 503) instead of piling up.
+STATS_WINDOW = 1000  # recent calls kept for the wait/run percentiles
+
+
+class ExecutorBusy(RuntimeError):
+    """The task class's queue is full."""
+
+    def __init__(self, task_class: str):
+        super().__init__(f"{task_class} executor queue is full")
+        self.task_class = task_class
+
+
+def _setting(name: str, key: str, default: int, legacy_env: str = None) -> int:
+    fallback = os.getenv(legacy_env, str(default)) if legacy_env else str(default)
+    return int(os.getenv(f"EXECUTOR_{name.upper()}_{key}", fallback))
+
+
+def _percentiles(samples) -> dict:
+    if not samples:
+        return {"p50": 0.0, "p95": 0.0, "max": 0.0}
+    ordered = sorted(samples)
+    return {
+        "p50": round(ordered[len(ordered) // 2], 2),
+        "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 2),
+        "max": round(ordered[-1], 2),
+    }
+
+
+class TaskClass:
+    def __init__(self, name: str, kind: str, workers: int, max_queue: int = 0):
+        self.name = name
+        self.kind = kind
+        self.workers = max(1, workers)
+        self.max_queue = max_queue  # 0 = wait as long as it takes
+        self._executor: Executor = None
+        self._slots: asyncio.Semaphore = None
+        self._loop = None
+
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.running = 0
+        self.queued = 0
+        self.max_queued = 0
+        self.wait_ms = deque(maxlen=STATS_WINDOW)
+        self.run_ms = deque(maxlen=STATS_WINDOW)
+
+    def _pool(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                # Spawned (not forked) workers: the API process holds Mongo and torch threads
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=self.name)
+        return self._executor
+
+    def _bind(self):
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._slots = asyncio.Semaphore(self.workers)
+
+    async def run(self, fn, *args, **kwargs):
+        self._bind()
+        if self.max_queue and self.queued >= self.max_queue:
+            self.rejected += 1
+            raise ExecutorBusy(self.name)
+
+        self.submitted += 1
+        queued_at = time.perf_counter()
+        if self._slots.locked():
+            # Every worker is busy: this call waits its turn
+            self.queued += 1
+            self.max_queued = max(self.max_queued, self.queued)
+            try:
+                await self._slots.acquire()
+            finally:
+                self.queued -= 1
+        else:
+            await self._slots.acquire()
+
+        started_at = time.perf_counter()
+        self.wait_ms.append((started_at - queued_at) * 1000)
+        self.running += 1
+        try:
+            # partial of a module-level function still pickles for the process pool
+            result = await self._loop.run_in_executor(self._pool(), functools.partial(fn, *args, **kwargs))
+        except BaseException:
+            self.failed += 1
+            raise
+        finally:
+            self.running -= 1
+            self.run_ms.append((time.perf_counter() - started_at) * 1000)
+            self._slots.release()
+        self.completed += 1
+        return result
+
+    def snapshot(self) -> dict:
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "running": self.running,
+            "queued": self.queued,
+            "max_queued": self.max_queued,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "wait_ms": _percentiles(self.wait_ms),
+            "run_ms": _percentiles(self.run_ms),
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+TASK_CLASSES = {
+    task.name: task for task in (
+        TaskClass("audio", "process", _setting("audio", "WORKERS", 2, "AUDIO_WORKERS"),
+                  _setting("audio", "MAX_QUEUE", 0)),
+        TaskClass("inference", "thread", _setting("inference", "WORKERS", min(4, os.cpu_count() or 1)),
+                  _setting("inference", "MAX_QUEUE", 0)),
+        TaskClass("asr", "thread", _setting("asr", "WORKERS", 1),
+                  _setting("asr", "MAX_QUEUE", 0)),
+        TaskClass("tts", "thread", _setting("tts", "WORKERS", 4, "CONTENT_IMPORT_TTS_WORKERS"),
+                  _setting("tts", "MAX_QUEUE", 0)),
+        TaskClass("network", "thread", _setting("network", "WORKERS", 8),
+                  _setting("network", "MAX_QUEUE", 0)),
+        TaskClass("io", "thread", _setting("io", "WORKERS", 2),
+                  _setting("io", "MAX_QUEUE", 0)),
+    )
+}
+
+
+async def run_in(task_class: str, fn, *args, **kwargs):
+    """Runs fn(*args, **kwargs) on the task class's pool and returns its result."""
+    return await TASK_CLASSES[task_class].run(fn, *args, **kwargs)
+
+
+def executor_stats() -> dict:
+    return {name: task.snapshot() for name, task in TASK_CLASSES.items()}
+
+
+def shutdown_executors():
+    for task in TASK_CLASSES.values():
+        task.shutdown()
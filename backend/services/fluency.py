@@ -0,0 +1,86 @@
+import os
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Local acoustic fluency metrics for read-aloud recordings.
+# Computed on the preprocessed 16 kHz mono signal in the audio worker, so
+# trivial cases can be decided without an LLM call and the rest of the
+# recordings reach the LLM with measured timings instead of guesses.
+VAD_TOP_DB = float(os.getenv("SPEECH_VAD_TOP_DB", "30"))
+MIN_PAUSE_S = float(os.getenv("SPEECH_MIN_PAUSE_S", "0.25"))
+
+# Rules for skipping the LLM (NO_SPEECH_RISK scores recordings too short for the text)
+MIN_VOICED_S = float(os.getenv("SPEECH_MIN_VOICED_S", "0.3"))
+MIN_VOICED_S_PER_WORD = float(os.getenv("SPEECH_MIN_VOICED_S_PER_WORD", "0.12"))
+NO_SPEECH_RISK = int(os.getenv("SPEECH_NO_SPEECH_RISK", "100"))
+
+# Settings that change metrics or trivial results, for analysis cache keys
+METRICS_VERSION = f"{VAD_TOP_DB}|{MIN_PAUSE_S}|{MIN_VOICED_S}|{MIN_VOICED_S_PER_WORD}|{NO_SPEECH_RISK}"
+
+
+def fluency_metrics(y: np.ndarray, sr: int) -> dict:
+    """Voice activity, pauses and an onset-based speech rate for one recording."""
+    import librosa
+
+    duration = len(y) / sr if sr else 0.0
+    if duration == 0 or not np.any(y):
+        return {
+            "duration_s": round(duration, 2), "voiced_s": 0.0, "voiced_ratio": 0.0,
+            "pause_count": 0, "mean_pause_s": 0.0, "longest_pause_s": 0.0,
+            "onsets_per_s": 0.0,
+        }
+
+    intervals = librosa.effects.split(y, top_db=VAD_TOP_DB)
+    voiced = sum(int(end - start) for start, end in intervals) / sr
+    gaps = [(intervals[i + 1][0] - intervals[i][1]) / sr for i in range(len(intervals) - 1)]
+    pauses = [g for g in gaps if g >= MIN_PAUSE_S]
+
+    # Onsets approximate syllable nuclei; per voiced second it tracks articulation rate
+    onsets = librosa.onset.onset_detect(y=y, sr=sr, units="time") if voiced else []
+
+    return {
+        "duration_s": round(duration, 2),
+        "voiced_s": round(voiced, 2),
+        "voiced_ratio": round(voiced / duration, 2),
+        "pause_count": len(pauses),
+        "mean_pause_s": round(float(np.mean(pauses)), 2) if pauses else 0.0,
+        "longest_pause_s": round(float(max(pauses)), 2) if pauses else 0.0,
+        "onsets_per_s": round(len(onsets) / voiced, 2) if voiced else 0.0,
+    }
+
+
+def words_per_minute(metrics: dict, target_text: str):
+    """Reading speed if the whole target was read; None without speech."""
+    words = len(target_text.split())
+    return round(words / metrics["duration_s"] * 60, 1) if metrics["duration_s"] and words else None
+
+
+def trivial_result(metrics: dict, target_text: str):
+    """
+    (risk_weight, feedback) when the recording can be decided without the LLM,
+    else None. No speech at all gets a None risk_weight: nothing was said, so
+    it isn't scored and the child is asked to record again. Speech far too
+    short for the text is scored.
+    """
+    if metrics["voiced_s"] < MIN_VOICED_S:
+        return None, "No speech detected. Try again."
+
+    expected = len(target_text.split()) * MIN_VOICED_S_PER_WORD
+    if metrics["voiced_s"] < expected:
+        return NO_SPEECH_RISK, "Too short to be the whole sentence."
+    return None
+
+
+def prompt_summary(metrics: dict, target_text: str) -> str:
+    """Measured timings for the LLM prompt."""
+    wpm = words_per_minute(metrics, target_text)
+    return (
+        f"- Duration after trimming silence: {metrics['duration_s']}s "
+        f"({metrics['voiced_s']}s voiced, ratio {metrics['voiced_ratio']})\n"
+        f"- Pauses >= {MIN_PAUSE_S}s: {metrics['pause_count']} "
+        f"(mean {metrics['mean_pause_s']}s, longest {metrics['longest_pause_s']}s)\n"
+        f"- Syllable onsets per voiced second: {metrics['onsets_per_s']}\n"
+        f"- Reading speed if fully read: {wpm if wpm is not None else 'n/a'} words/min"
+    )
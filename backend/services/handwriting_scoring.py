@@ -0,0 +1,111 @@
+import os
+import numpy as np
+import torch
+import torch.nn.functional as F
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Handwriting scoring from the classifier's full output distribution.
+# One forward pass gives logits; they are temperature-scaled (T fitted on a
+# held-out set, WRITING_TEMPERATURE_EN / _NE) and soft-maxed once, and
+# everything below reads that one probability vector:
+#   - top-k labels with calibrated probabilities
+#   - the probability of the target letter (a runner-up target is a near miss)
+#   - the mass on the target's confusable letters, via a boolean
+#     [target, class] table built once from the confusion pairs
+WRITING_TOP_K = int(os.getenv("WRITING_TOP_K", "3"))
+# Total probability on confusable letters that counts as a confusion error
+CONFUSION_MIN_MASS = float(os.getenv("WRITING_CONFUSION_MIN_MASS", "0.5"))
+
+# English Logic (u, s, b, p, d)
+ENGLISH_REVERSALS = {
+    'b': ['d'], 'd': ['b'],
+    'p': ['q'], 'q': ['p'],
+    'u': ['n'], 'n': ['u'],  # Rotation
+    's': ['5'],  # Visual approximate
+}
+
+# Nepali Logic (Specific Confusion Pairs: क/फ, ब/व, त/न, द/ध)
+# Note: 'waw' is used for 'wa' in the class mapping usually.
+NEPALI_CONFUSIONS = {
+    'ka': ['pha', 'pa'],   # ka vs pha
+    'ba': ['waw', 'wa', 'vaw'],  # ba vs wa
+    'ta': ['na', 'la'],    # ta vs na (or bha sometimes)
+    'da': ['dha', 'gha'],  # da vs dha
+    'pha': ['ka'],
+    'waw': ['ba'],
+    'na': ['ta'],
+    'dha': ['da']
+}
+
+
+class WritingScorer:
+    def __init__(self, labels: list[str], confusions: dict, temperature: float,
+                 confusion_risk: int, error_risk: int,
+                 correct_feedback: str, confusion_feedback: str):
+        self.labels = [label.lower() for label in labels]
+        self.index = {label: i for i, label in enumerate(self.labels)}
+        self.temperature = temperature
+        self.confusion_risk = confusion_risk
+        self.error_risk = error_risk
+        self.correct_feedback = correct_feedback
+        self.confusion_feedback = confusion_feedback
+        # Everything that changes a score besides the weights, for cache keys
+        self.version = f"T{temperature}|k{WRITING_TOP_K}|m{CONFUSION_MIN_MASS}"
+
+        # confusable[t, c]: class c is a known confusion for target class t.
+        # Pairs naming letters the model has no class for (e.g. '5') are dropped.
+        n = len(self.labels)
+        self.confusable = np.zeros((n, n), dtype=bool)
+        for target, others in confusions.items():
+            if target in self.index:
+                for other in others:
+                    if other in self.index:
+                        self.confusable[self.index[target], self.index[other]] = True
+
+    def probabilities(self, logits: torch.Tensor) -> torch.Tensor:
+        """Calibrated class probabilities for a batch of logits [N, classes]."""
+        return F.softmax(logits / self.temperature, dim=1)
+
+    def score(self, probs: torch.Tensor, target_letter: str) -> dict:
+        """Scores one calibrated probability vector against the target letter."""
+        k = min(WRITING_TOP_K, len(self.labels))
+        top_p, top_i = probs.topk(k)
+        p = probs.cpu().numpy()
+        top_p, top_i = top_p.tolist(), top_i.tolist()
+
+        target = target_letter.lower()
+        predicted = self.labels[top_i[0]]
+        is_correct = (target == predicted)
+        t = self.index.get(target)
+        target_prob = float(p[t]) if t is not None else 0.0
+        confusion_prob = float(p[self.confusable[t]].sum()) if t is not None else 0.0
+
+        risk_weight = 0
+        if is_correct:
+            feedback = self.correct_feedback
+        elif (t is not None and self.confusable[t, top_i[0]]) or confusion_prob >= CONFUSION_MIN_MASS:
+            risk_weight = self.confusion_risk  # mirror/rotation or known visual confusion
+            feedback = self.confusion_feedback.format(predicted=predicted, target=target)
+        else:
+            # General error, weighted by how far the target is from being read:
+            # a runner-up target is a near miss, not a wild error
+            risk_weight = round(self.error_risk * (1 - target_prob))
+            if target in (self.labels[i] for i in top_i[1:]):
+                feedback = f"Almost. Looks like '{predicted}', close to '{target}'"
+            else:
+                feedback = f"Incorrect. Looks like '{predicted}'"
+
+        return {
+            "question_type": "writing",
+            "target": target,
+            "predicted": predicted,
+            "confidence": top_p[0],
+            "is_correct": is_correct,
+            "risk_weight": risk_weight,
+            "feedback": feedback,
+            "top_k": [{"label": self.labels[i], "probability": round(q, 4)} for i, q in zip(top_i, top_p)],
+            "target_probability": round(target_prob, 4),
+            "confusion_probability": round(confusion_prob, 4)
+        }
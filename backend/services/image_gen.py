@@ -8,6 +8,8 @@ load_dotenv()
 
 API_KEY = os.getenv("CLIPDROP_API_KEY")
 ENDPOINT = "https://clipdrop-api.co/text-to-image/v1"
+# Runs on a shared network pool thread; never let a hung call hold it forever
+TIMEOUT_S = float(os.getenv("CLIPDROP_TIMEOUT_S", "60"))
 
 # CONFIGURATION
 IMAGE_DIR = "images"  # The local folder name
@@ -44,7 +46,7 @@ def generate_and_save_image(prompt: str) -> str:
         files = { "prompt": (None, prompt) }
         headers = { "x-api-key": API_KEY }
 
-        response = requests.post(ENDPOINT, files=files, headers=headers)
+        response = requests.post(ENDPOINT, files=files, headers=headers, timeout=TIMEOUT_S)
 
         if response.status_code == 200:
             # 5. Save file locally
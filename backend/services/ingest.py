@@ -0,0 +1,359 @@
+import asyncio
+import json
+import os
+from datetime import datetime
+from bson import ObjectId
+from dotenv import load_dotenv
+from database import db, ensure_ttl_index
+from schemas import UserProgress
+from services.adaptive_logic import apply_performance_batch
+from services.executors import run_in
+from services.log_store import TIMESERIES, insert_logs, insert_ignoring_duplicates, logged_ids
+from services.rollups import record_attempts
+
+load_dotenv()
+
+# Write-behind buffer for /api/report-progress.
+# Events are appended to a local spill file and acknowledged immediately,
+# then written to the log store in one unordered insert_many per flush.
+FLUSH_SIZE = int(os.getenv("INGEST_FLUSH_SIZE", "200"))
+FLUSH_INTERVAL_S = float(os.getenv("INGEST_FLUSH_INTERVAL_S", "1.0"))
+SPILL_DIR = os.getenv("INGEST_SPILL_DIR", "spill")
+SPILL_FSYNC = os.getenv("INGEST_SPILL_FSYNC", "0") == "1"
+
+# Offline devices may resend a batch after a dropped connection, so
+# idempotency keys are remembered for longer than any realistic offline spell
+IDEMPOTENCY_TTL_DAYS = int(os.getenv("INGEST_IDEMPOTENCY_TTL_DAYS", "90"))
+
+async def ensure_ingest_indexes():
+    await ensure_ttl_index(db.progress_keys, "received_at", IDEMPOTENCY_TTL_DAYS * 86400, "received_at_ttl")
+
+
+async def claim_keys(events: list[dict], key_of) -> list[dict]:
+    """Records each event's key in progress_keys; returns the events whose key was new."""
+    now = datetime.utcnow()
+    claims = [{"_id": key_of(e), "user_id": e["user_id"], "received_at": now} for e in events]
+    claimed = await insert_ignoring_duplicates(db.progress_keys, claims)
+    claimed_keys = {c["_id"] for c in claimed}
+    return [e for e in events if key_of(e) in claimed_keys]
+
+
+async def release_keys(events: list[dict], key_of):
+    await db.progress_keys.delete_many({"_id": {"$in": [key_of(e) for e in events]}})
+
+
+def _idempotency_key(event: dict) -> str:
+    # Client keys are only unique per device/user, so they are scoped to the user
+    return f"{event['user_id']}:{event['idempotency_key']}"
+
+
+async def write_offline_events(events: list[dict]) -> list[dict]:
+    """
+    Writes client-keyed events from an offline sync, skipping any key seen before.
+    Keys are claimed first so two concurrent syncs can't both write an event;
+    if the log write fails the claims are released so the client can retry.
+    Returns the events that were new.
+    """
+    # A key repeated inside one payload counts once
+    unique = {}
+    for e in events:
+        unique.setdefault(_idempotency_key(e), e)
+
+    fresh = await claim_keys(list(unique.values()), _idempotency_key)
+    if not fresh:
+        return []
+
+    try:
+        await insert_logs(fresh)
+    except Exception:
+        await release_keys(fresh, _idempotency_key)
+        raise
+
+    await record_attempts(fresh)
+    return fresh
+
+
+def _lock_file(path: str):
+    """Opens and exclusively locks path; None if another process holds it."""
+    f = open(path, "a+")
+    try:
+        if os.name == "nt":
+            import msvcrt
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        f.close()
+        return None
+    return f
+
+
+class ProgressBuffer:
+    # Each process (uvicorn worker) has its own spill files, named by pid, and
+    # holds an OS lock on progress.<pid>.lock while it runs. At startup a worker
+    # adopts the files of any worker whose lock is free, i.e. that has died.
+    #
+    # The flushing file is removed only after the batch's rollups and leveling
+    # are written, so it always holds every event whose derived state may be
+    # missing; each step appends an {"applied": step, "ids": [...]} marker when
+    # it is done. On replay, an event that is already in the log store was
+    # written by a process that stopped before its derived state, so it gets
+    # whichever steps have no marker.
+
+    def __init__(self, spill_dir: str = SPILL_DIR, flush_size: int = FLUSH_SIZE, flush_interval: float = FLUSH_INTERVAL_S):
+        os.makedirs(spill_dir, exist_ok=True)
+        self.spill_dir = spill_dir
+        self.spill_path, self.flushing_path, self.lock_path = self._paths(str(os.getpid()))
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.pending: list[dict] = []
+        self._lock = asyncio.Lock()
+        self._task = None
+        self._owner = None
+
+        # Events waiting for the next spill write, with the futures add() awaits
+        self._unspilled: list[tuple[dict, dict, asyncio.Future]] = []
+        self._spill_lock = asyncio.Lock()
+        self._spill_task = None
+        self._tasks = set()
+
+        # Written to the log store, rollups / leveling still to apply
+        self._to_record: list[dict] = []
+        self._to_level: list[dict] = []
+        # Ids read back from disk at startup, and the steps already applied to them
+        self._replayed = set()
+        self._applied = {"rollups": set(), "leveling": set()}
+
+    def _paths(self, owner: str) -> tuple[str, str, str]:
+        return (
+            os.path.join(self.spill_dir, f"progress.{owner}.ndjson"),
+            # Holds events that are being written; kept until their derived state is
+            os.path.join(self.spill_dir, f"progress.{owner}.flushing.ndjson"),
+            os.path.join(self.spill_dir, f"progress.{owner}.lock"),
+        )
+
+    # --- Lifecycle ---
+    async def start(self):
+        """Replays anything a previous process left on disk, then starts the timer."""
+        self._owner = _lock_file(self.lock_path)
+        events, applied = await run_in("io", self._replay_spill)
+        for step, ids in applied.items():
+            self._applied[step].update(ids)
+        if events:
+            print(f"♻️ Replaying {len(events)} spilled progress events")
+            self.pending += events
+            self._replayed.update(e["_id"] for e in events)
+            await self.flush()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.flush()
+        if self._owner:
+            self._owner.close()
+            self._owner = None
+            # Nothing left to adopt: the lock file can go too
+            if not any(os.path.exists(p) for p in (self.spill_path, self.flushing_path)):
+                os.remove(self.lock_path)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"❌ Ingest flush error: {e}")
+
+    def _background(self, coro):
+        # Keep a reference so the task isn't garbage-collected mid-run
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._background_done)
+        return task
+
+    def _background_done(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception():
+            print(f"❌ Ingest background task failed: {task.exception()}")
+
+    # --- Write path ---
+    async def add(self, progress: UserProgress) -> str:
+        """Spills the event to disk and queues it. Returns the event id."""
+        event_id = ObjectId()
+        record = progress.model_dump(mode="json")
+        record["_id"] = str(event_id)
+        event = progress.model_dump()
+        event["_id"] = event_id
+
+        # Group commit: concurrent requests share one file write (and fsync)
+        spilled = asyncio.get_running_loop().create_future()
+        self._unspilled.append((record, event, spilled))
+        if self._spill_task is None or self._spill_task.done():
+            self._spill_task = self._background(self._spill_queued())
+        await spilled
+
+        if len(self.pending) >= self.flush_size and not self._lock.locked():
+            self._background(self.flush())
+        return str(event_id)
+
+    async def _spill_queued(self):
+        async with self._spill_lock:
+            while self._unspilled:
+                group, self._unspilled = self._unspilled, []
+                try:
+                    await run_in("io", self._spill, [record for record, _, _ in group])
+                except Exception as e:
+                    for _, _, spilled in group:
+                        spilled.set_exception(e)
+                    continue
+                # Queued only once on disk, under the lock flush() rotates with
+                self.pending += [event for _, event, _ in group]
+                for _, _, spilled in group:
+                    spilled.set_result(None)
+
+    async def flush(self) -> int:
+        async with self._lock:
+            if not self.pending and not self._to_record and not self._to_level:
+                return 0
+
+            written = []
+            if self.pending:
+                async with self._spill_lock:
+                    batch, self.pending = self.pending, []
+                    await run_in("io", self._rotate_spill)
+
+                try:
+                    written = await self._write(batch)
+                except Exception as e:
+                    # Keep the events (and the flushing file) for the next attempt
+                    print(f"❌ Ingest write failed, will retry: {e}")
+                    self.pending = batch + self.pending
+                    return 0
+
+                # Derived state only for events that were actually new, plus
+                # replayed ones a previous process logged without it
+                written_ids = {e["_id"] for e in written}
+                relogged = [e for e in batch if e["_id"] in self._replayed and e["_id"] not in written_ids]
+                self._to_record += written + [e for e in relogged if e["_id"] not in self._applied["rollups"]]
+                self._to_level += written + [e for e in relogged if e["_id"] not in self._applied["leveling"]]
+                self._replayed.difference_update(e["_id"] for e in batch)
+
+            # If either step raises, its events stay queued (and on disk) for the next flush
+            if self._to_record:
+                await record_attempts(self._to_record)
+                await run_in("io", self._mark_applied, "rollups", self._to_record)
+                self._to_record = []
+            if self._to_level:
+                await apply_performance_batch(self._to_level)
+                await run_in("io", self._mark_applied, "leveling", self._to_level)
+                self._to_level = []
+
+            await run_in("io", self._remove_flushing)
+        return len(written)
+
+    async def _write(self, batch: list[dict]) -> list[dict]:
+        # Duplicates only come from replaying a spill that was already written.
+        # The classic collection rejects them by _id; time-series collections
+        # don't enforce _id uniqueness, so replayed events are looked up first.
+        # Events added by this process have fresh ids and skip the lookup.
+        if TIMESERIES:
+            replayed = [e for e in batch if e["_id"] in self._replayed]
+            if replayed:
+                logged = await logged_ids([e["_id"] for e in replayed], [e["timestamp"] for e in replayed])
+                batch = [e for e in batch if e["_id"] not in logged]
+        return await insert_logs(batch)
+
+    # --- Spill file (runs on the io executor) ---
+    def _spill(self, records: list[dict]):
+        self._spill_to(self.spill_path, records)
+
+    def _spill_to(self, path: str, records: list[dict]):
+        with open(path, "a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+            f.flush()
+            if SPILL_FSYNC:
+                os.fsync(f.fileno())
+
+    def _rotate_spill(self):
+        if not os.path.exists(self.spill_path):
+            return
+        if not os.path.exists(self.flushing_path):
+            os.replace(self.spill_path, self.flushing_path)
+            return
+        # A previous write failed: fold the new spill into the pending one
+        self._append_file(self.spill_path, self.flushing_path)
+
+    def _mark_applied(self, step: str, events: list[dict]):
+        self._spill_to(self.flushing_path, [{"applied": step, "ids": [str(e["_id"]) for e in events]}])
+
+    def _remove_flushing(self):
+        if os.path.exists(self.flushing_path):
+            os.remove(self.flushing_path)
+
+    def _append_file(self, src_path: str, dst_path: str):
+        with open(dst_path, "a", encoding="utf-8") as dst, open(src_path, encoding="utf-8") as src:
+            dst.write(src.read())
+            dst.flush()
+            if SPILL_FSYNC:
+                os.fsync(dst.fileno())
+        os.remove(src_path)
+
+    def _adopt_orphans(self):
+        """Folds the spill files of workers that died into this worker's flushing file."""
+        suffix = ".lock"
+        for name in sorted(os.listdir(self.spill_dir)):
+            if not (name.startswith("progress.") and name.endswith(suffix)):
+                continue
+            owner = name[len("progress."):-len(suffix)]
+            if owner == str(os.getpid()):
+                continue
+            lock = _lock_file(os.path.join(self.spill_dir, name))
+            if lock is None:
+                continue  # that worker is alive
+            try:
+                for path in self._paths(owner)[:2]:
+                    if os.path.exists(path):
+                        self._append_file(path, self.flushing_path)
+            finally:
+                lock.close()
+            try:
+                os.remove(os.path.join(self.spill_dir, name))
+            except FileNotFoundError:
+                pass  # another worker adopted the same files
+
+    def _replay_spill(self) -> tuple[list[dict], dict]:
+        """Events left on disk, and the ids each derived step was applied to."""
+        self._adopt_orphans()
+        events = []
+        applied = {"rollups": set(), "leveling": set()}
+        for path in (self.flushing_path, self.spill_path):
+            if not os.path.exists(path):
+                continue
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                        if "applied" in record:
+                            applied[record["applied"]].update(ObjectId(i) for i in record["ids"])
+                            continue
+                        event = UserProgress(**record).model_dump()
+                        event["_id"] = ObjectId(record["_id"])
+                    except Exception as e:
+                        # A torn last line after a crash is expected
+                        print(f"⚠️ Skipping unreadable spill line: {e}")
+                        continue
+                    events.append(event)
+        return events, applied
+
+
+progress_buffer = ProgressBuffer()
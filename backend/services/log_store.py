@@ -0,0 +1,217 @@
+import os
+from datetime import datetime
+from typing import Optional
+from dotenv import load_dotenv
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import BulkWriteError, CollectionInvalid
+from database import db, read_db, ensure_ttl_index
+
+load_dotenv()
+
+# Storage layout for attempt logs.
+#   classic    - one plain document per attempt in `logs` (original layout)
+#   timeseries - a MongoDB time-series collection with compact field names,
+#                bucketed by metaField {u: user_id, m: module_id}
+# Everything that reads or writes logs goes through this module, so callers
+# keep using the logical field names (user_id, is_correct, timestamp, ...)
+# whichever layout is active.
+LOG_STORAGE = os.getenv("LOG_STORAGE", "classic")
+TIMESERIES = LOG_STORAGE == "timeseries"
+TIMESERIES_COLLECTION = os.getenv("LOG_TIMESERIES_COLLECTION", "log_events")
+TIMESERIES_GRANULARITY = os.getenv("LOG_TIMESERIES_GRANULARITY", "minutes")
+
+# Retention tiers: raw attempts are kept this long, after that only the
+# rollup buckets remain (hourly for ROLLUP_HOURLY_RETENTION_DAYS, daily forever).
+# 0 keeps raw logs forever.
+RAW_RETENTION_DAYS = int(os.getenv("LOG_RAW_RETENTION_DAYS", "0"))
+ROLLUP_HOURLY_RETENTION_DAYS = int(os.getenv("ROLLUP_HOURLY_RETENTION_DAYS", "30"))
+
+# Logical field -> stored field in the time-series layout.
+# The `module` display name is not stored; it is derivable from module_id.
+COMPACT_FIELDS = {
+    "user_id": "meta.u",
+    "module_id": "meta.m",
+    "timestamp": "t",
+    "level": "l",
+    "epoch": "e",
+    "selected_id": "s",
+    "is_correct": "c",
+    "response_time_ms": "r",
+    "idempotency_key": "k",
+}
+DROPPED_FIELDS = {"module"}
+
+DUPLICATE_KEY = 11000
+
+
+def logs_collection(secondary: bool = False):
+    """The active log collection; `secondary` for reads that may lag a little."""
+    database = read_db if secondary else db
+    return database[TIMESERIES_COLLECTION] if TIMESERIES else database.logs
+
+
+def field(name: str, timeseries: bool = TIMESERIES) -> str:
+    """Stored path for a logical field name."""
+    return COMPACT_FIELDS.get(name, name) if timeseries else name
+
+
+# --- Encoding ---
+def encode_log(event: dict) -> dict:
+    doc = {"meta": {"u": event["user_id"], "m": event["module_id"]}}
+    for key, value in event.items():
+        if key in ("user_id", "module_id") or key in DROPPED_FIELDS:
+            continue
+        doc[COMPACT_FIELDS.get(key, key)] = value
+    return doc
+
+
+def decode_log(doc: dict) -> dict:
+    reverse = {v: k for k, v in COMPACT_FIELDS.items() if not v.startswith("meta.")}
+    meta = doc.get("meta", {})
+    event = {"user_id": meta.get("u"), "module_id": meta.get("m")}
+    for key, value in doc.items():
+        if key != "meta":
+            event[reverse.get(key, key)] = value
+    return event
+
+
+def log_query(query: dict, timeseries: bool = TIMESERIES) -> dict:
+    """Translates a filter on logical top-level fields to the stored layout."""
+    if not timeseries:
+        return query
+    return {field(k, True): v for k, v in query.items()}
+
+
+# --- Reads & writes ---
+async def find_logs(query: dict, sort: Optional[tuple] = None, limit: int = 0, secondary: bool = False) -> list[dict]:
+    cursor = logs_collection(secondary).find(log_query(query))
+    if sort:
+        cursor = cursor.sort(field(sort[0]), sort[1])
+    if limit:
+        cursor = cursor.limit(limit)
+    docs = await cursor.to_list(limit or None)
+    return [decode_log(d) for d in docs] if TIMESERIES else docs
+
+
+async def delete_logs(query: dict):
+    await logs_collection().delete_many(log_query(query))
+
+
+async def insert_ignoring_duplicates(collection, docs: list[dict]) -> list[dict]:
+    """Unordered insert_many that skips duplicate _ids. Returns the docs actually inserted."""
+    if not docs:
+        return []
+    try:
+        await collection.insert_many(docs, ordered=False)
+        return docs
+    except BulkWriteError as e:
+        errors = e.details.get("writeErrors", [])
+        if any(err.get("code") != DUPLICATE_KEY for err in errors):
+            raise
+        duplicates = {err["index"] for err in errors}
+        return [doc for i, doc in enumerate(docs) if i not in duplicates]
+
+
+async def logged_ids(ids: list, timestamps: list[datetime]) -> set:
+    """
+    Which of these ids are already in the active log collection. Time-series
+    collections have no _id index; the time range lets bucket pruning bound the scan.
+    """
+    if not ids:
+        return set()
+    cursor = logs_collection().find(
+        {"_id": {"$in": ids}, field("timestamp"): {"$gte": min(timestamps), "$lte": max(timestamps)}},
+        {"_id": 1}
+    )
+    return {doc["_id"] async for doc in cursor}
+
+
+async def insert_logs(events: list[dict]) -> list[dict]:
+    """
+    Writes attempt events with one unordered insert_many.
+    Returns the events that were new (duplicate _ids are skipped; time-series
+    collections don't enforce _id uniqueness, so callers dedupe before that).
+    """
+    if not TIMESERIES:
+        return await insert_ignoring_duplicates(db.logs, events)
+    if events:
+        await logs_collection().insert_many([encode_log(e) for e in events], ordered=False)
+    return events
+
+
+# --- Setup & migration ---
+async def ensure_log_storage():
+    """Creates the active log collection, its indexes and the retention TTLs."""
+    expire = RAW_RETENTION_DAYS * 86400 if RAW_RETENTION_DAYS else None
+
+    if TIMESERIES:
+        options = {
+            "timeseries": {"timeField": "t", "metaField": "meta", "granularity": TIMESERIES_GRANULARITY},
+        }
+        if expire:
+            options["expireAfterSeconds"] = expire
+        try:
+            await db.create_collection(TIMESERIES_COLLECTION, **options)
+        except CollectionInvalid:
+            # Already there: keep its retention in step with the config
+            await db.command("collMod", TIMESERIES_COLLECTION, expireAfterSeconds=expire or "off")
+        await logs_collection().create_index([("meta.u", ASCENDING), ("t", DESCENDING)], name="user_time")
+    else:
+        await db.logs.create_index([("user_id", ASCENDING), ("timestamp", DESCENDING)], name="user_time")
+        await ensure_ttl_index(db.logs, "timestamp", expire, "raw_retention")
+
+    await ensure_ttl_index(
+        db.log_rollups, "bucket_start", ROLLUP_HOURLY_RETENTION_DAYS * 86400, "hourly_retention",
+        partialFilterExpression={"granularity": "hour"},
+    )
+
+
+MIGRATION_ID = "classic_to_timeseries"
+
+
+async def _copy_batch(batch: list[dict]) -> int:
+    """Inserts the docs not copied yet, then records the batch's last _id as the resume point."""
+    copied = await logged_ids([doc["_id"] for doc in batch], [doc["t"] for doc in batch])
+    fresh = [doc for doc in batch if doc["_id"] not in copied]
+    if fresh:
+        await logs_collection().insert_many(fresh, ordered=False)
+    await db.log_migrations.update_one(
+        {"_id": MIGRATION_ID},
+        {"$set": {"last_id": batch[-1]["_id"], "updated_at": datetime.utcnow()}},
+        upsert=True
+    )
+    return len(fresh)
+
+
+async def migrate_classic_to_timeseries(batch_size: int = 5000, since: Optional[datetime] = None) -> int:
+    """
+    Copies documents from `logs` into the time-series collection.
+    Run it with LOG_STORAGE=timeseries after the rollups are rebuilt, so
+    history older than the raw retention window survives as buckets.
+
+    Time-series collections don't enforce _id uniqueness, so the copy is made
+    safe to re-run: it resumes after the last _id recorded in db.log_migrations,
+    and skips ids of the batch in flight that an interrupted run already wrote.
+    """
+    if not TIMESERIES:
+        raise RuntimeError("Set LOG_STORAGE=timeseries before migrating")
+
+    await ensure_log_storage()
+    query = {"timestamp": {"$gte": since}} if since else {}
+    checkpoint = await db.log_migrations.find_one({"_id": MIGRATION_ID})
+    if checkpoint:
+        query["_id"] = {"$gt": checkpoint["last_id"]}
+        print(f"♻️ Resuming log migration after {checkpoint['last_id']}")
+
+    copied = 0
+    batch = []
+    async for doc in db.logs.find(query).sort("_id", ASCENDING):
+        if "user_id" not in doc or "module_id" not in doc or "timestamp" not in doc:
+            continue
+        batch.append(encode_log(doc))
+        if len(batch) >= batch_size:
+            copied += await _copy_batch(batch)
+            batch = []
+    if batch:
+        copied += await _copy_batch(batch)
+    return copied
@@ -0,0 +1,206 @@
+import base64
+import glob
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+import struct
+import subprocess
+import tempfile
+import time
+from urllib.parse import urljoin
+import requests
+from fastapi.staticfiles import StaticFiles
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# AR model asset proxy.
+# AR Hunt tasks point at multi-file glTF scenes on third-party hosts. Each one
+# is fetched once (scene JSON, .bin buffers, textures), packed into a single
+# binary .glb, optionally mesh-compressed, and stored under MODEL_ASSET_DIR,
+# which is mounted at /models. The stored file name carries a hash of its
+# bytes, so clients can cache it forever.
+MODEL_ASSET_DIR = os.getenv("MODEL_ASSET_DIR", "ar_models")
+MODEL_URL_PREFIX = "/models"
+MODEL_FETCH_TIMEOUT_S = float(os.getenv("MODEL_FETCH_TIMEOUT_S", "30"))
+MODEL_MAX_BYTES = int(os.getenv("MODEL_MAX_BYTES", str(64 * 1024 * 1024)))
+# "", "draco" or "meshopt". Needs the gltf-transform CLI (npm i -g @gltf-transform/cli);
+# skipped with a warning when it isn't installed.
+MODEL_MESH_COMPRESSION = os.getenv("MODEL_MESH_COMPRESSION", "").strip().lower()
+# Unreferenced versions are kept this long after they were written, for
+# client bundles and caches that still point at them
+MODEL_PRUNE_GRACE_DAYS = float(os.getenv("MODEL_PRUNE_GRACE_DAYS", "7"))
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+GLB_MAGIC = 0x46546C67  # "glTF"
+GLB_VERSION = 2
+CHUNK_JSON = 0x4E4F534A
+CHUNK_BIN = 0x004E4942
+
+if not os.path.exists(MODEL_ASSET_DIR):
+    os.makedirs(MODEL_ASSET_DIR)
+
+
+class ImmutableStaticFiles(StaticFiles):
+    """StaticFiles for content-addressed files: long-lived, immutable caching."""
+
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        return response
+
+
+# --- Fetching ---
+def _fetch(url: str, budget: list) -> bytes:
+    """Downloads url, charging its size against the shared byte budget."""
+    if url.startswith("data:"):
+        data = base64.b64decode(url.split(",", 1)[1])
+    else:
+        with requests.get(url, timeout=MODEL_FETCH_TIMEOUT_S, stream=True) as resp:
+            resp.raise_for_status()
+            chunks = []
+            for chunk in resp.iter_content(64 * 1024):
+                budget[0] -= len(chunk)
+                if budget[0] < 0:
+                    raise ValueError(f"Model exceeds {MODEL_MAX_BYTES} bytes: {url}")
+                chunks.append(chunk)
+            return b"".join(chunks)
+    budget[0] -= len(data)
+    if budget[0] < 0:
+        raise ValueError(f"Model exceeds {MODEL_MAX_BYTES} bytes: {url}")
+    return data
+
+
+def _pad4(data: bytes, fill: bytes = b"\x00") -> bytes:
+    return data + fill * (-len(data) % 4)
+
+
+# --- glTF -> GLB ---
+def gltf_to_glb(gltf: dict, base_url: str, budget: list) -> bytes:
+    """
+    Packs a glTF scene and everything it references into one GLB:
+    all buffers are merged into the BIN chunk and external images become
+    bufferViews, so the result needs no further requests.
+    """
+    binary = bytearray()
+    buffer_offsets = []
+
+    for buffer in gltf.get("buffers", []):
+        data = _fetch(urljoin(base_url, buffer["uri"]), budget) if "uri" in buffer else b""
+        buffer_offsets.append(len(binary))
+        binary += _pad4(data[:buffer["byteLength"]])
+
+    for view in gltf.get("bufferViews", []):
+        view["byteOffset"] = view.get("byteOffset", 0) + buffer_offsets[view.get("buffer", 0)]
+        view["buffer"] = 0
+
+    for image in gltf.get("images", []):
+        uri = image.pop("uri", None)
+        if uri is None:
+            continue
+        data = _fetch(urljoin(base_url, uri), budget)
+        if not image.get("mimeType"):
+            if uri.startswith("data:"):
+                image["mimeType"] = uri[5:].split(";", 1)[0]
+            else:
+                image["mimeType"] = mimetypes.guess_type(uri.split("?", 1)[0])[0] or "image/png"
+        gltf.setdefault("bufferViews", []).append({"buffer": 0, "byteOffset": len(binary), "byteLength": len(data)})
+        image["bufferView"] = len(gltf["bufferViews"]) - 1
+        binary += _pad4(data)
+
+    gltf["buffers"] = [{"byteLength": len(binary)}] if binary else []
+    json_chunk = _pad4(json.dumps(gltf, separators=(",", ":")).encode("utf-8"), b" ")
+
+    chunks = struct.pack("<II", len(json_chunk), CHUNK_JSON) + json_chunk
+    if binary:
+        chunks += struct.pack("<II", len(binary), CHUNK_BIN) + bytes(binary)
+    return struct.pack("<III", GLB_MAGIC, GLB_VERSION, 12 + len(chunks)) + chunks
+
+
+def _compress(glb: bytes) -> bytes:
+    """Runs gltf-transform draco/meshopt over the GLB if configured and available."""
+    if MODEL_MESH_COMPRESSION not in ("draco", "meshopt"):
+        return glb
+    cli = shutil.which("gltf-transform")
+    if not cli:
+        print(f"⚠️ MODEL_MESH_COMPRESSION={MODEL_MESH_COMPRESSION} but gltf-transform is not installed; serving uncompressed")
+        return glb
+
+    with tempfile.TemporaryDirectory() as tmp:
+        src, dst = os.path.join(tmp, "in.glb"), os.path.join(tmp, "out.glb")
+        with open(src, "wb") as f:
+            f.write(glb)
+        result = subprocess.run([cli, MODEL_MESH_COMPRESSION, src, dst], capture_output=True, timeout=300)
+        if result.returncode != 0 or not os.path.exists(dst):
+            print(f"⚠️ Mesh compression failed: {result.stderr.decode(errors='replace')[-300:]}")
+            return glb
+        with open(dst, "rb") as f:
+            return f.read()
+
+
+# --- Cache ---
+def _source_key(url: str) -> str:
+    return hashlib.sha1(f"{url}|{MODEL_MESH_COMPRESSION}".encode()).hexdigest()[:16]
+
+
+def cached_model_url(source_url: str):
+    """The /models URL for the newest cached version of a source, or None."""
+    matches = glob.glob(os.path.join(MODEL_ASSET_DIR, f"{_source_key(source_url)}-*.glb"))
+    if not matches:
+        return None
+    return f"{MODEL_URL_PREFIX}/{os.path.basename(max(matches, key=os.path.getmtime))}"
+
+
+def localize_model(source_url: str, refresh: bool = False) -> str:
+    """
+    Returns a /models URL serving source_url as a single GLB, fetching and
+    converting it on first use. Blocking; run it off the event loop.
+    A refresh writes a new version next to the old ones, which stay until
+    prune_models() finds nothing referencing them.
+    """
+    if source_url.startswith(MODEL_URL_PREFIX + "/"):
+        return source_url
+    if not refresh:
+        cached = cached_model_url(source_url)
+        if cached:
+            return cached
+
+    budget = [MODEL_MAX_BYTES]
+    raw = _fetch(source_url, budget)
+    if raw[:4] == b"glTF":
+        glb = raw
+    else:
+        glb = gltf_to_glb(json.loads(raw), source_url, budget)
+    glb = _compress(glb)
+
+    key = _source_key(source_url)
+    filename = f"{key}-{hashlib.sha256(glb).hexdigest()[:12]}.glb"
+    path = os.path.join(MODEL_ASSET_DIR, filename)
+    with open(path + ".part", "wb") as f:
+        f.write(glb)
+    os.replace(path + ".part", path)
+
+    print(f"📦 Cached {source_url} as {filename} ({len(glb) // 1024} KB)")
+    return f"{MODEL_URL_PREFIX}/{filename}"
+
+
+def prune_models(referenced: set[str]) -> int:
+    """
+    Deletes stored GLBs whose /models URL is not in `referenced` and that are
+    older than MODEL_PRUNE_GRACE_DAYS. Run it after publishing, with every
+    model URL the content still holds. Blocking; returns the number removed.
+    """
+    cutoff = time.time() - MODEL_PRUNE_GRACE_DAYS * 86400
+    removed = 0
+    for path in glob.glob(os.path.join(MODEL_ASSET_DIR, "*.glb")):
+        if f"{MODEL_URL_PREFIX}/{os.path.basename(path)}" in referenced:
+            continue
+        if os.path.getmtime(path) < cutoff:
+            os.remove(path)
+            removed += 1
+    if removed:
+        print(f"🧹 Removed {removed} unreferenced model files")
+    return removed
@@ -0,0 +1,113 @@
+import hashlib
+import os
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+from fastapi import FastAPI, Request, Response
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# API-wide response layer: orjson for serialization (set as the app's
+# default_response_class in main.py) and compression above a size threshold.
+# Brotli is used when `brotli-asgi` is installed, gzip otherwise.
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+
+# Opt-in: send documents we read from our own DB as-is instead of re-validating
+# them against the route's response_model. Only for routes using trusted().
+TRUST_DB_RESPONSES = os.getenv("TRUST_DB_RESPONSES", "false").lower() in ("1", "true", "yes")
+
+try:
+    from brotli_asgi import BrotliMiddleware
+except ImportError:
+    BrotliMiddleware = None
+
+
+def add_compression(app: FastAPI):
+    if BrotliMiddleware:
+        # Falls back to gzip for clients that don't accept br
+        app.add_middleware(BrotliMiddleware, quality=BROTLI_QUALITY, minimum_size=COMPRESSION_MIN_BYTES, gzip_fallback=True)
+        print(f"🗜️ Brotli/gzip compression above {COMPRESSION_MIN_BYTES} bytes")
+    else:
+        app.add_middleware(GZipMiddleware, minimum_size=COMPRESSION_MIN_BYTES, compresslevel=GZIP_LEVEL)
+        print(f"🗜️ Gzip compression above {COMPRESSION_MIN_BYTES} bytes")
+
+
+def trusted(payload, trust: Optional[bool] = None):
+    """
+    Returns `payload` for FastAPI to validate against the response_model, or,
+    with TRUST_DB_RESPONSES on, an ORJSONResponse that skips that step.
+    The payload must already have the response shape (no ObjectIds, no extra keys).
+    """
+    if TRUST_DB_RESPONSES if trust is None else trust:
+        return ORJSONResponse(payload)
+    return payload
+
+
+# --- Conditional GET ---
+# Cache-Control per kind of resource
+CACHE_REVALIDATE = "private, no-cache"  # per-user data: keep a copy, always revalidate
+CACHE_CURRICULUM = f"public, max-age={int(os.getenv('CURRICULUM_MAX_AGE_S', '300'))}"
+
+
+def make_etag(*parts, weak: bool = True) -> str:
+    """A short validator from whatever identifies the representation (ids, versions, timestamps)."""
+    digest = hashlib.sha1("|".join(str(p) for p in parts).encode()).hexdigest()[:20]
+    return f'W/"{digest}"' if weak else f'"{digest}"'
+
+
+def _http_date(value: datetime) -> str:
+    # Stored datetimes are naive UTC
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.replace(microsecond=0), usegmt=True)
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """If-None-Match wins over If-Modified-Since, as in RFC 9110."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        if if_none_match.strip() == "*":
+            return True
+        # Weak comparison: W/"x" and "x" match
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return etag.removeprefix("W/") in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        modified = last_modified if last_modified.tzinfo else last_modified.replace(tzinfo=timezone.utc)
+        return modified.replace(microsecond=0) <= since
+    return False
+
+
+def cache_headers(etag: str, last_modified: Optional[datetime] = None, cache_control: str = CACHE_REVALIDATE) -> dict:
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if last_modified:
+        headers["Last-Modified"] = _http_date(last_modified)
+    return headers
+
+
+def not_modified(headers: dict) -> Response:
+    """304 carrying only the validators; no body is built or serialized."""
+    return Response(status_code=304, headers=headers)
+
+
+def json_response(payload, headers: dict, model: Optional[type[BaseModel]] = None) -> Response:
+    """
+    200 as orjson with the cache headers. With `model`, the payload is
+    validated like a response_model would be, unless TRUST_DB_RESPONSES.
+    """
+    if model is not None and not TRUST_DB_RESPONSES:
+        payload = model.model_validate(payload).model_dump(mode="json")
+    return ORJSONResponse(payload, headers=headers)
@@ -0,0 +1,175 @@
+from datetime import datetime, timedelta
+from typing import Optional
+from pymongo import UpdateOne, ASCENDING, DESCENDING
+from database import db, read_db
+from services.log_store import RAW_RETENTION_DAYS, TIMESERIES, field, log_query, logs_collection
+
+# Pre-aggregated activity buckets.
+# One document per (user, module, granularity, bucket_start) holding the
+# counters the dashboard needs, so a dashboard load reads a bounded number
+# of small documents instead of scanning every raw log of the user.
+GRANULARITIES = ("hour", "day")
+
+
+def bucket_start(ts: datetime, granularity: str) -> datetime:
+    """Truncates a timestamp to the start of its hour/day bucket."""
+    if granularity == "hour":
+        return ts.replace(minute=0, second=0, microsecond=0)
+    return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+async def ensure_rollup_indexes():
+    await db.log_rollups.create_index(
+        [("user_id", ASCENDING), ("granularity", ASCENDING), ("bucket_start", DESCENDING), ("module_id", ASCENDING)],
+        unique=True,
+        name="user_granularity_bucket_module",
+    )
+
+
+def _rollup_updates(log: dict) -> list:
+    ts = log.get("timestamp") or datetime.utcnow()
+    updates = []
+    for granularity in GRANULARITIES:
+        updates.append(UpdateOne(
+            {
+                "user_id": log["user_id"],
+                "granularity": granularity,
+                "bucket_start": bucket_start(ts, granularity),
+                "module_id": log["module_id"],
+            },
+            {
+                "$inc": {
+                    "attempts": 1,
+                    "correct": 1 if log.get("is_correct") else 0,
+                    "total_response_time_ms": log.get("response_time_ms", 0) or 0,
+                },
+                "$max": {"last_level": log.get("level", 1), "last_seen": ts},
+            },
+            upsert=True,
+        ))
+    return updates
+
+
+async def record_attempts(logs: list[dict]):
+    """
+    Folds freshly written log documents into their hourly and daily buckets.
+    All upserts go out in a single unordered bulk write.
+    """
+    updates = [u for log in logs for u in _rollup_updates(log)]
+    if updates:
+        await db.log_rollups.bulk_write(updates, ordered=False)
+
+
+async def rebuild_rollups(user_id: Optional[str] = None, since: Optional[datetime] = None, classic: bool = False) -> int:
+    """
+    Rollup job: recomputes buckets from the raw logs and merges them in.
+    Use it to backfill after seeding or to repair buckets after an outage.
+    `classic` reads the original `logs` collection whatever LOG_STORAGE is,
+    which the time-series migration uses to keep history past the raw retention.
+    """
+    timeseries = TIMESERIES and not classic
+    source = logs_collection() if timeseries else db.logs
+
+    def path(name: str) -> str:
+        return "$" + field(name, timeseries)
+
+    if RAW_RETENTION_DAYS and not classic:
+        # Older buckets are all that is left of expired raw logs; never rebuild them
+        cutoff = datetime.utcnow() - timedelta(days=RAW_RETENTION_DAYS - 1)
+        since = max(since, cutoff) if since else cutoff
+    if since:
+        # Align to a day boundary so no bucket is rebuilt from partial data
+        since = bucket_start(since, "day")
+
+    match = {}
+    if user_id:
+        match["user_id"] = user_id
+    if since:
+        match["timestamp"] = {"$gte": since}
+    match = log_query(match, timeseries)
+
+    rebuilt = 0
+    for granularity in GRANULARITIES:
+        if match:
+            await db.log_rollups.delete_many({
+                **({"user_id": user_id} if user_id else {}),
+                **({"bucket_start": {"$gte": bucket_start(since, granularity)}} if since else {}),
+                "granularity": granularity,
+            })
+        pipeline = [
+            {"$match": match},
+            {"$group": {
+                "_id": {
+                    "user_id": path("user_id"),
+                    "module_id": path("module_id"),
+                    "bucket_start": {"$dateTrunc": {"date": path("timestamp"), "unit": granularity}},
+                },
+                "attempts": {"$sum": 1},
+                "correct": {"$sum": {"$cond": [path("is_correct"), 1, 0]}},
+                "total_response_time_ms": {"$sum": {"$ifNull": [path("response_time_ms"), 0]}},
+                "last_level": {"$max": path("level")},
+                "last_seen": {"$max": path("timestamp")},
+            }},
+            {"$project": {
+                "_id": 0,
+                "user_id": "$_id.user_id",
+                "module_id": "$_id.module_id",
+                "bucket_start": "$_id.bucket_start",
+                "granularity": {"$literal": granularity},
+                "attempts": 1,
+                "correct": 1,
+                "total_response_time_ms": 1,
+                "last_level": 1,
+                "last_seen": 1,
+            }},
+            {"$merge": {
+                "into": "log_rollups",
+                "on": ["user_id", "granularity", "bucket_start", "module_id"],
+                "whenMatched": "replace",
+                "whenNotMatched": "insert",
+            }},
+        ]
+        await source.aggregate(pipeline).to_list(None)
+        rebuilt += await db.log_rollups.count_documents({
+            **({"user_id": user_id} if user_id else {}),
+            "granularity": granularity,
+        })
+    return rebuilt
+
+
+async def get_buckets(user_id: str, granularity: str, window: timedelta, limit: int) -> list[dict]:
+    """Reads at most `limit` buckets for the user, newest first."""
+    since = bucket_start(datetime.utcnow() - window, granularity)
+    return await read_db.log_rollups.find(
+        {"user_id": user_id, "granularity": granularity, "bucket_start": {"$gte": since}}
+    ).sort("bucket_start", -1).limit(limit).to_list(limit)
+
+
+async def window_totals(user_id: str, window: timedelta) -> dict:
+    """
+    Per-module attempts, correct answers and response time over the daily
+    buckets in the window, summed server-side: one row per module comes back
+    however many days the window spans.
+    """
+    since = bucket_start(datetime.utcnow() - window, "day")
+    rows = await read_db.log_rollups.aggregate([
+        {"$match": {"user_id": user_id, "granularity": "day", "bucket_start": {"$gte": since}}},
+        {"$group": {
+            "_id": "$module_id",
+            "attempts": {"$sum": "$attempts"},
+            "correct": {"$sum": "$correct"},
+            "total_response_time_ms": {"$sum": "$total_response_time_ms"},
+        }},
+    ]).to_list(None)
+    return {r.pop("_id"): r for r in rows}
+
+
+async def module_totals(user_id: str, module_ids: list[str]) -> dict:
+    """All-time attempts/correct for the given modules, summed from daily buckets."""
+    result = await read_db.log_rollups.aggregate([
+        {"$match": {"user_id": user_id, "granularity": "day", "module_id": {"$in": module_ids}}},
+        {"$group": {"_id": None, "attempts": {"$sum": "$attempts"}, "correct": {"$sum": "$correct"}}},
+    ]).to_list(1)
+    if not result:
+        return {"attempts": 0, "correct": 0}
+    return {"attempts": result[0]["attempts"], "correct": result[0]["correct"]}
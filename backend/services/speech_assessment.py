@@ -0,0 +1,254 @@
+import hashlib
+import io
+import json
+import os
+import re
+import threading
+from abc import ABC, abstractmethod
+from difflib import SequenceMatcher
+import google.generativeai as genai
+from dotenv import load_dotenv
+from services.fluency import prompt_summary
+from services.analysis_cache import file_fingerprint
+from services.executors import run_in
+
+load_dotenv()
+
+# Speech assessment backends for /api/test/analyze/speaking.
+#   gemini - multimodal LLM call (needs network and GOOGLE_API_KEY)
+#   local  - on-prem CPU ASR (CTC or Whisper checkpoint from a local path),
+#            scored by aligning the transcript word by word against the target
+#   auto   - local when a model is configured for the language, else gemini
+# Every backend returns the same dict:
+#   {"predicted", "confidence", "risk_weight", "feedback", "alignment"?}
+SPEECH_BACKEND = os.getenv("SPEECH_BACKEND", "auto").lower()
+GEMINI_MODEL = os.getenv("GEMINI_SPEECH_MODEL", "gemini-2.5-flash")
+ASR_MODEL_PATHS = {
+    "english": os.getenv("SPEECH_ASR_MODEL_EN"),
+    "nepali": os.getenv("SPEECH_ASR_MODEL_NE"),
+}
+# int8 dynamic quantization of the Linear layers for CPU inference
+ASR_QUANTIZE = os.getenv("SPEECH_ASR_QUANTIZE", "true").lower() in ("1", "true", "yes")
+
+
+class SpeechAssessor(ABC):
+    name = "base"
+    # Identifies what produces the results (model, prompt); cached results are keyed on it
+    version = "base"
+
+    @abstractmethod
+    async def assess(self, audio: dict, target_text: str, language: str) -> dict:
+        """`audio` is the prepare_audio() result (encoded 16 kHz mono + metrics)."""
+
+
+# --- Gemini ---
+def _parse_llm_json(raw_text: str) -> dict:
+    if "```json" in raw_text:
+        raw_text = raw_text.split("```json")[1].split("```")[0]
+    elif "```" in raw_text:
+        raw_text = raw_text.split("```")[1].split("```")[0]
+    return json.loads(raw_text.strip())
+
+
+# Prompt for Dyslexia Assessment (its hash is part of the version, see analysis_cache)
+GEMINI_PROMPT = """
+        Analyze this audio recording of a child reading the text: "{target_text}".
+        Language: {language}.
+
+        Measured acoustics (use these for fluency and speed, don't re-estimate them):
+{measurements}
+
+        Dyslexia Screening Focus:
+        1. Transcribe exactly what was said.
+        2. Check for:
+           - Stuttering on plosive sounds (b, d, p, k, t).
+           - Skipping words or substituting words visually similar.
+           - Reading fluency/speed (too slow? long pauses?).
+
+        Assign 'risk_weight':
+        - 0: Fluent.
+        - 20: Minor hesitation.
+        - 60: Significant stumbling on similar sounds (e.g., 'dog' vs 'dug').
+        - 100: Inability to read or skipping multiple words.
+
+        Return STRICT JSON:
+        {{
+            "transcribed_text": "string",
+            "accuracy_score": integer (0-100),
+            "risk_weight": integer,
+            "feedback": "Short feedback max 10 words"
+        }}
+        """
+
+
+class GeminiAssessor(SpeechAssessor):
+    name = "gemini"
+    version = f"gemini:{GEMINI_MODEL}:{hashlib.sha1(GEMINI_PROMPT.encode()).hexdigest()[:12]}"
+
+    async def assess(self, audio: dict, target_text: str, language: str) -> dict:
+        if not os.getenv("GOOGLE_API_KEY"):
+            raise RuntimeError("Google API Key missing")
+
+        model = genai.GenerativeModel(GEMINI_MODEL)
+
+        prompt = GEMINI_PROMPT.format(
+            target_text=target_text,
+            language=language,
+            measurements=prompt_summary(audio["metrics"], target_text),
+        )
+
+        response = await model.generate_content_async([
+            prompt,
+            {"mime_type": audio["mime_type"], "data": audio["data"]}
+        ])
+        analysis = _parse_llm_json(response.text)
+
+        return {
+            "predicted": analysis.get("transcribed_text", ""),
+            "confidence": analysis.get("accuracy_score", 0) / 100.0,
+            "risk_weight": analysis.get("risk_weight", 0),
+            "feedback": analysis.get("feedback", "Good effort!"),
+        }
+
+
+# --- Word alignment ---
+def normalize_words(text: str) -> list[str]:
+    # \w alone splits Devanagari words at their vowel signs, so the block is
+    # added explicitly, minus the danda (।, ॥) punctuation
+    return re.findall(r"[\w\u0900-\u0963\u0966-\u097F]+", text.lower())
+
+
+def _similar(a: str, b: str) -> bool:
+    """Near-miss substitutions like dog/dug or big/dig."""
+    return SequenceMatcher(None, a, b).ratio() >= 0.6
+
+
+def align_words(target_text: str, transcript: str) -> list[dict]:
+    """
+    Word-level alignment of the transcript against the target.
+    ops: match, similar (near-miss substitution), substitute, skip (target word
+    not read), insert (extra spoken word).
+    """
+    target, spoken = normalize_words(target_text), normalize_words(transcript)
+    alignment = []
+    for op, i1, i2, j1, j2 in SequenceMatcher(None, target, spoken, autojunk=False).get_opcodes():
+        if op == "equal":
+            alignment += [{"op": "match", "target": t, "spoken": t} for t in target[i1:i2]]
+        elif op == "delete":
+            alignment += [{"op": "skip", "target": t, "spoken": None} for t in target[i1:i2]]
+        elif op == "insert":
+            alignment += [{"op": "insert", "target": None, "spoken": s} for s in spoken[j1:j2]]
+        else:
+            # Pair up the replaced span; leftovers are skips or inserts
+            for k in range(max(i2 - i1, j2 - j1)):
+                t = target[i1 + k] if i1 + k < i2 else None
+                s = spoken[j1 + k] if j1 + k < j2 else None
+                if t and s:
+                    alignment.append({"op": "similar" if _similar(t, s) else "substitute", "target": t, "spoken": s})
+                elif t:
+                    alignment.append({"op": "skip", "target": t, "spoken": None})
+                else:
+                    alignment.append({"op": "insert", "target": None, "spoken": s})
+    return alignment
+
+
+def score_alignment(alignment: list[dict], metrics: dict) -> dict:
+    """Maps an alignment (plus fluency) onto the same risk scale the Gemini prompt uses."""
+    targets = [a for a in alignment if a["target"]]
+    matches = sum(1 for a in targets if a["op"] == "match")
+    skips = sum(1 for a in targets if a["op"] == "skip")
+    similar = sum(1 for a in targets if a["op"] == "similar")
+    inserts = sum(1 for a in alignment if a["op"] == "insert")
+    accuracy = matches / len(targets) if targets else 0.0
+
+    if accuracy < 0.5 or skips >= 2:
+        risk, feedback = 100, "Many words were skipped or misread."
+    elif similar:
+        risk, feedback = 60, "Mixed up similar sounding words."
+    elif accuracy < 0.9:
+        risk, feedback = 20, "A few words were missed."
+    elif inserts:
+        risk, feedback = 20, "Repeated or extra words."
+    else:
+        risk, feedback = 0, "Fluent reading!"
+
+    # Hesitant but accurate reading is still a minor flag
+    if risk == 0 and (metrics.get("longest_pause_s", 0) > 2.0 or (metrics.get("words_per_minute") or 999) < 40):
+        risk, feedback = 20, "Accurate, but slow with long pauses."
+
+    return {"confidence": round(accuracy, 2), "risk_weight": risk, "feedback": feedback}
+
+
+# --- Local ASR ---
+class LocalASRAssessor(SpeechAssessor):
+    name = "local"
+
+    def __init__(self, model_path: str, language: str):
+        self.model_path = model_path
+        self.language = language
+        self.version = f"local:{model_path}:{file_fingerprint(model_path)}:{'int8' if ASR_QUANTIZE else 'fp32'}"
+        self._pipe = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._pipe is None:
+                import torch
+                from transformers import pipeline
+
+                pipe = pipeline("automatic-speech-recognition", model=self.model_path, device=-1)
+                if ASR_QUANTIZE:
+                    pipe.model = torch.ao.quantization.quantize_dynamic(pipe.model, {torch.nn.Linear}, dtype=torch.qint8)
+                self._pipe = pipe
+                print(f"✅ Loaded ASR model ({self.language}): {self.model_path}")
+        return self._pipe
+
+    def _transcribe(self, encoded: bytes) -> str:
+        import soundfile as sf
+        pipe = self._load()
+        y, sr = sf.read(io.BytesIO(encoded), dtype="float32")
+        kwargs = {}
+        if pipe.model.config.model_type == "whisper":
+            kwargs["generate_kwargs"] = {"language": self.language, "task": "transcribe"}
+        return pipe({"raw": y, "sampling_rate": sr}, **kwargs)["text"].strip()
+
+    async def assess(self, audio: dict, target_text: str, language: str) -> dict:
+        transcript = await run_in("asr", self._transcribe, audio["data"])
+        alignment = align_words(target_text, transcript)
+        return {"predicted": transcript, "alignment": alignment, **score_alignment(alignment, audio["metrics"])}
+
+
+_gemini = GeminiAssessor()
+_local: dict[str, LocalASRAssessor] = {}
+
+
+def check_speech_backend():
+    """Startup check: SPEECH_BACKEND is known and, when local, has a model for every language."""
+    if SPEECH_BACKEND not in ("gemini", "local", "auto"):
+        raise RuntimeError(f"SPEECH_BACKEND must be gemini, local or auto, not {SPEECH_BACKEND!r}")
+    if SPEECH_BACKEND == "local":
+        missing = [language for language, path in ASR_MODEL_PATHS.items() if not path]
+        if missing:
+            raise RuntimeError(f"SPEECH_BACKEND=local but no ASR model is configured for {', '.join(missing)}")
+    print(f"✅ Speech backend: {SPEECH_BACKEND}")
+
+
+def get_assessor(language: str) -> SpeechAssessor:
+    """The backend for this language, per SPEECH_BACKEND."""
+    language = language.lower()
+    model_path = ASR_MODEL_PATHS.get(language)
+    if SPEECH_BACKEND == "gemini" or (SPEECH_BACKEND == "auto" and not model_path):
+        return _gemini
+    if not model_path:
+        raise RuntimeError(f"SPEECH_BACKEND=local but no ASR model is configured for {language}")
+    if language not in _local:
+        _local[language] = LocalASRAssessor(model_path, language)
+    return _local[language]
+
+
+def assessor_version(language: str) -> str:
+    """Version of the backend get_assessor() would pick, for cache keys."""
+    try:
+        return get_assessor(language).version
+    except RuntimeError:
+        return "unconfigured"
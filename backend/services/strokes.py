@@ -0,0 +1,103 @@
+import numpy as np
+
+# Stroke-vector input for handwriting analysis.
+# Instead of a rasterized PNG, the canvas can send its pen strokes:
+#   strokes: [[x0, y0, dx1, dy1, dx2, dy2, ...], ...]
+# one list per stroke, integer canvas pixels, every point after the first
+# delta-encoded against the previous one. stroke_width is in the same units.
+# They are drawn straight into the model's input grid, reproducing what the
+# PNG path does (alpha to white, grayscale, invert, MaxFilter(5), crop to the
+# ink, shrink into the glyph box, center) without any image round trips.
+
+# What the PNG path sees as ink: the inverted gray of the canvas pen colour
+# (#4F46E5 -> L=91 -> 164), not full white
+STROKE_INK = 164
+# MaxFilter(5) grows the ink by 2 px on every side
+DILATION_PX = 4
+MAX_STROKE_POINTS = 5000
+# Points must land on the canvas; same side as the PNG path's 2048x2048 cap
+MAX_CANVAS_PX = 2048
+MAX_STROKE_WIDTH = 64
+
+
+class StrokeError(ValueError):
+    pass
+
+
+def decode_strokes(strokes: list[list[int]]) -> list[np.ndarray]:
+    """Delta-encoded point lists -> absolute [n, 2] float arrays."""
+    decoded = []
+    total = 0
+    for stroke in strokes:
+        if len(stroke) < 2 or len(stroke) % 2:
+            raise StrokeError("Each stroke needs x, y pairs")
+        points = np.cumsum(np.asarray(stroke, dtype=np.float64).reshape(-1, 2), axis=0)
+        if not np.isfinite(points).all() or points.min() < 0 or points.max() > MAX_CANVAS_PX:
+            raise StrokeError(f"Stroke points must lie on a 0..{MAX_CANVAS_PX} px canvas")
+        points = points.astype(np.float32)
+        total += len(points)
+        decoded.append(points)
+    if total > MAX_STROKE_POINTS:
+        raise StrokeError(f"Too many points ({total} > {MAX_STROKE_POINTS})")
+    return decoded
+
+
+def _segments(paths: list[np.ndarray]):
+    """(starts, ends) of every segment; a lone point is a zero-length segment."""
+    starts, ends = [], []
+    for p in paths:
+        # Points closer than a quarter pixel at target scale add nothing
+        q = np.round(p * 4)
+        keep = np.concatenate([[True], np.any(q[1:] != q[:-1], axis=1)])
+        p = p[keep]
+        starts.append(p[:-1] if len(p) > 1 else p)
+        ends.append(p[1:] if len(p) > 1 else p)
+    return np.concatenate(starts), np.concatenate(ends)
+
+
+def rasterize_strokes(strokes: list[list[int]], stroke_width: float, img_size: int, content_size: int) -> np.ndarray:
+    """
+    [img_size, img_size] float32 image in 0..255, white ink on black, glyph
+    scaled into content_size and centered, like the PNG preprocessing.
+    """
+    if not 0 < stroke_width <= MAX_STROKE_WIDTH:  # also false for NaN
+        raise StrokeError(f"stroke_width must be in (0, {MAX_STROKE_WIDTH}]")
+    image = np.zeros((img_size, img_size), dtype=np.float32)
+    paths = decode_strokes(strokes)
+    if not paths:
+        return image
+
+    radius = (stroke_width + DILATION_PX) / 2
+
+    # Ink bounding box in canvas pixels, then the thumbnail scale (never enlarges)
+    points = np.concatenate(paths)
+    lo = points.min(axis=0) - radius
+    size = points.max(axis=0) + radius - lo
+    scale = min(1.0, content_size / float(size.max()))
+    w, h = np.maximum(1, np.round(size * scale)).astype(int)
+    offset = np.array([(img_size - w) // 2, (img_size - h) // 2], dtype=np.float32)
+
+    a, b = _segments([(p - lo) * scale + offset for p in paths])
+    radius *= scale
+
+    # Squared distance from every pixel centre to every segment: [pixels, segments]
+    centres = np.arange(img_size, dtype=np.float32) + 0.5
+    px = np.tile(centres, img_size)[:, None]
+    py = np.repeat(centres, img_size)[:, None]
+    abx, aby = b[:, 0] - a[:, 0], b[:, 1] - a[:, 1]
+    length2 = np.maximum(abx * abx + aby * aby, 1e-12)
+    dx, dy = px - a[:, 0], py - a[:, 1]
+    t = np.clip((dx * abx + dy * aby) / length2, 0.0, 1.0)
+    dx -= t * abx
+    dy -= t * aby
+    dist = np.sqrt((dx * dx + dy * dy).min(axis=1))
+
+    # One pixel of antialiasing at the edge, like the downsampled PNG
+    coverage = np.clip(radius + 0.5 - dist, 0.0, 1.0)
+    image[:] = (coverage * STROKE_INK).reshape(img_size, img_size)
+    return image
+
+
+def normalize_for_model(image: np.ndarray) -> np.ndarray:
+    """ToTensor + Normalize((0.5,), (0.5,)) on a 0..255 image -> [1, 1, H, W]."""
+    return ((image / 255.0 - 0.5) / 0.5).astype(np.float32)[None, None]
@@ -0,0 +1,106 @@
+import os
+from fastapi import HTTPException, UploadFile
+from starlette.types import ASGIApp, Receive, Scope, Send
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Upload limits for the assessment and content import endpoints.
+# The body size is checked twice: by UploadLimitMiddleware on the raw request
+# (Content-Length up front, then a running count while it streams in, so an
+# oversized upload is rejected before multipart parsing spools it anywhere),
+# and by read_upload() when a handler reads the spooled file.
+AUDIO_UPLOAD_MAX_BYTES = int(os.getenv("AUDIO_UPLOAD_MAX_BYTES", str(10 * 1024 * 1024)))
+HANDWRITING_UPLOAD_MAX_BYTES = int(os.getenv("HANDWRITING_UPLOAD_MAX_BYTES", str(2 * 1024 * 1024)))
+HANDWRITING_MAX_PIXELS = int(os.getenv("HANDWRITING_MAX_PIXELS", str(2048 * 2048)))
+CONTENT_IMPORT_MAX_BYTES = int(os.getenv("CONTENT_IMPORT_MAX_BYTES", str(20 * 1024 * 1024)))
+UPLOAD_READ_CHUNK = 64 * 1024
+
+# path -> max request body bytes
+UPLOAD_LIMITS = {
+    "/api/test/analyze/speaking": AUDIO_UPLOAD_MAX_BYTES,
+    # base64 in JSON is 4/3 the size of the PNG
+    "/api/test/analyze/writing": HANDWRITING_UPLOAD_MAX_BYTES * 4 // 3 + 4096,
+    "/api/test/analyze/writing/upload": HANDWRITING_UPLOAD_MAX_BYTES,
+    # Bulk imports (IMPORT_MAX_ROWS also caps the row count)
+    "/api/content/sounds/import": CONTENT_IMPORT_MAX_BYTES,
+    "/api/content/letters/import": CONTENT_IMPORT_MAX_BYTES,
+}
+
+
+class _BodyTooLarge(Exception):
+    pass
+
+
+class UploadLimitMiddleware:
+    """Rejects request bodies over the per-path limit with 413, as early as possible."""
+
+    def __init__(self, app: ASGIApp, limits: dict = UPLOAD_LIMITS):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        limit = self.limits.get(scope.get("path")) if scope["type"] == "http" else None
+        if limit is None:
+            return await self.app(scope, receive, send)
+
+        headers = dict(scope["headers"])
+        content_length = headers.get(b"content-length")
+        if content_length and content_length.isdigit() and int(content_length) > limit:
+            return await self._reject(send, limit)
+
+        received = 0
+        too_large = False
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received, too_large
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    too_large = True
+                    raise _BodyTooLarge()
+            return message
+
+        async def tracked_send(message):
+            nonlocal response_started
+            # The form parser turns our exception into its own 400; drop that
+            if too_large:
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracked_send)
+        except _BodyTooLarge:
+            pass
+        if too_large and not response_started:
+            await self._reject(send, limit)
+
+    @staticmethod
+    async def _reject(send: Send, limit: int):
+        body = f'{{"detail":"Upload too large (limit {limit} bytes)"}}'.encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()),
+                        (b"connection", b"close")],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+async def read_upload(file: UploadFile, max_bytes: int) -> bytes:
+    """Reads a spooled upload in chunks, with a 413 past max_bytes."""
+    chunks = []
+    size = 0
+    while True:
+        chunk = await file.read(UPLOAD_READ_CHUNK)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > max_bytes:
+            raise HTTPException(status_code=413, detail=f"Upload too large (limit {max_bytes} bytes)")
+        chunks.append(chunk)
+    return b"".join(chunks)
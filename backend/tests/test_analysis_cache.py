@@ -0,0 +1,101 @@
+import asyncio
+
+import services.analysis_cache as analysis_cache
+from services.analysis_cache import AnalysisCache, cache_key
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_cache_key_covers_parts_and_bytes():
+    key = cache_key(b"audio", "speaking", "the dog", "english")
+    assert key == cache_key(b"audio", "speaking", "the dog", "english")
+    assert key != cache_key(b"audio", "speaking", "the dog", "nepali")
+    assert key != cache_key(b"audio!", "speaking", "the dog", "english")
+    # Part boundaries matter: ("ab", "c") is not ("a", "bc")
+    assert cache_key(b"", "ab", "c") != cache_key(b"", "a", "bc")
+
+
+def test_entries_expire_after_the_ttl(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(analysis_cache.time, "monotonic", clock)
+    cache = AnalysisCache("test", ttl_s=60)
+
+    async def run():
+        await cache.put("k", {"risk_weight": 20})
+        clock.now += 59
+        assert await cache.get("k") == {"risk_weight": 20}
+        clock.now += 2
+        assert await cache.get("k") is None
+
+    asyncio.run(run())
+    assert cache.stats() == {"entries": 0, "hits": 1, "misses": 1}
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = AnalysisCache("test", max_entries=2)
+
+    async def run():
+        await cache.put("a", {"n": 1})
+        await cache.put("b", {"n": 2})
+        await cache.get("a")  # b is now the oldest
+        await cache.put("c", {"n": 3})
+        return [await cache.get(k) for k in "abc"]
+
+    assert asyncio.run(run()) == [{"n": 1}, None, {"n": 3}]
+
+
+def test_results_are_copied_in_and_out():
+    cache = AnalysisCache("test")
+
+    async def run():
+        result = {"metrics": {"voiced_s": 1.0}}
+        await cache.put("k", result)
+        result["metrics"]["voiced_s"] = 9.0
+        (await cache.get("k"))["metrics"]["voiced_s"] = 7.0
+        return await cache.get("k")
+
+    assert asyncio.run(run()) == {"metrics": {"voiced_s": 1.0}}
+
+
+def test_persistent_cache_reads_through_and_survives_db_errors(monkeypatch):
+    class FakeCollection:
+        def __init__(self):
+            self.docs = {}
+            self.fail = False
+
+        async def find_one(self, query, projection):
+            if self.fail:
+                raise RuntimeError("db down")
+            return self.docs.get(query["_id"])
+
+        async def replace_one(self, query, doc, upsert):
+            if self.fail:
+                raise RuntimeError("db down")
+            self.docs[query["_id"]] = doc
+
+    class FakeDb:
+        analysis_cache = FakeCollection()
+
+    monkeypatch.setattr(analysis_cache, "db", FakeDb)
+
+    async def run():
+        await AnalysisCache("speaking", persistent=True).put("k", {"risk_weight": 60})
+        assert FakeDb.analysis_cache.docs["k"]["kind"] == "speaking"
+        # Another worker, empty memory: served from the collection
+        other = AnalysisCache("speaking", persistent=True)
+        assert await other.get("k") == {"risk_weight": 60}
+        assert other.stats()["entries"] == 1
+
+        FakeDb.analysis_cache.fail = True
+        fresh = AnalysisCache("speaking", persistent=True)
+        assert await fresh.get("k") is None
+        await fresh.put("j", {"risk_weight": 0})
+        assert await fresh.get("j") == {"risk_weight": 0}
+
+    asyncio.run(run())
@@ -0,0 +1,52 @@
+import random
+
+import pytest
+
+from services.ar_index import DistractorIndex, initial_sound
+
+
+def _task(task_id, word, level=1, category=None):
+    return {
+        "task_id": task_id, "module_id": "ar-hunt", "level": level, "epoch": 0,
+        "content": {"target_word": word, "category": category},
+    }
+
+
+@pytest.fixture
+def index():
+    random.seed(7)
+    return DistractorIndex([
+        _task("cat", "Cat", category="animals"),
+        _task("cow", "cow", category="farm"),
+        _task("dog", "dog", category="animals"),
+        _task("sun", "sun", category="sky"),
+        _task("ship", "ship", category="sea"),
+        _task("shoe", "shoe", category="clothes"),
+        _task("apple", "apple", level=2, category="food"),
+    ])
+
+
+def test_initial_sound_groups_digraphs():
+    assert initial_sound(" Ship") == "sh"
+    assert initial_sound("sun") == "s"
+    assert initial_sound("") == ""
+
+
+def test_distractors_lead_with_a_look_alike_from_the_level(index):
+    for _ in range(20):
+        chosen = index.distractors(index.by_id["cat"])
+        ids = [t["task_id"] for t in chosen]
+        assert len(ids) == 3 and len(set(ids)) == 3 and "cat" not in ids
+        assert ids[0] == "cow"  # same initial sound beats same category
+        assert all(t["level"] == 1 for t in chosen)
+
+    # A digraph word's look-alike shares the digraph, not just the letter
+    assert index.distractors(index.by_id["ship"], k=1)[0]["task_id"] == "shoe"
+
+
+def test_distractors_fall_back_to_other_levels(index):
+    chosen = index.distractors(index.by_id["apple"])
+    assert len(chosen) == 3
+    assert all(t["level"] == 1 for t in chosen)
+    assert len(index.distractors(index.by_id["cat"], k=10)) == 6
+    assert index.distractors(index.by_id["cat"], k=0) == []
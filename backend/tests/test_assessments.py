@@ -0,0 +1,72 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+import services.assessments as assessments
+
+
+def test_risk_summary_bands():
+    assert assessments.risk_summary(0, 0)["risk_label"] == "N/A"
+    assert assessments.risk_summary(40, 2)["score_percentage"] == 20
+    assert assessments.risk_summary(40, 2)["risk_label"] == "Low Probability"
+    assert assessments.risk_summary(100, 2)["risk_label"] == "Moderate Probability"
+    assert assessments.risk_summary(180, 2)["risk_label"] == "High Probability"
+    # Rounded up and capped at 100
+    assert assessments.risk_summary(1, 3)["score_percentage"] == 1
+    assert assessments.risk_summary(500, 2)["score_percentage"] == 100
+
+
+def test_question_ids_are_plain_field_names():
+    assert assessments.valid_question_id("12")
+    assert assessments.valid_question_id("en-write_b")
+    for bad in ("", "a.b", "$where", "x" * 65, "a b"):
+        assert not assessments.valid_question_id(bad)
+
+
+def test_public_session_lists_results_in_answer_order():
+    t = datetime(2024, 1, 1)
+    doc = {
+        "_id": "abc",
+        "results": {
+            "2": {"question_id": "2", "at": t + timedelta(seconds=5)},
+            "1": {"question_id": "1", "at": t},
+        },
+    }
+    public = assessments._public(doc)
+    assert public["session_id"] == "abc"
+    assert [r["question_id"] for r in public["results"]] == ["1", "2"]
+
+
+@pytest.fixture
+def attach(monkeypatch):
+    import routes.test as test_routes
+
+    recorded = []
+
+    async def record_result(session_id, question_id, result):
+        recorded.append((session_id, question_id, result["risk_weight"]))
+        return session_id == "open"
+
+    monkeypatch.setattr(test_routes, "record_result", record_result)
+    return test_routes._attach, recorded
+
+
+def test_attach_records_under_the_question(attach):
+    _attach, recorded = attach
+    result = {"risk_weight": 30}
+    assert asyncio.run(_attach("open", "3", result)) is result
+    assert asyncio.run(_attach(None, None, result)) is result
+    assert recorded == [("open", "3", 30)]
+
+
+def test_attach_skips_failed_and_rejects_missing_questions(attach):
+    _attach, recorded = attach
+    asyncio.run(_attach("open", "3", {"risk_weight": 0, "failed": True}))
+    assert recorded == []
+
+    for session_id, question_id, status in (("open", None, 400), ("open", "a.b", 400), ("closed", "3", 404)):
+        with pytest.raises(HTTPException) as e:
+            asyncio.run(_attach(session_id, question_id, {"risk_weight": 10}))
+        assert e.value.status_code == status
@@ -0,0 +1,102 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from starlette.requests import Request
+
+import routes.modules as modules
+import services.ingest as ingest
+
+
+class FakeStore:
+    """Stands in for progress_keys and the log collection; fails one chosen log write."""
+
+    def __init__(self, fail_on_write: int):
+        self.keys = set()
+        self.logs = []
+        self.leveled = []
+        self.writes = 0
+        self.fail_on_write = fail_on_write
+
+    async def insert_ignoring_duplicates(self, collection, docs):
+        fresh = [d for d in docs if d["_id"] not in self.keys]
+        self.keys.update(d["_id"] for d in fresh)
+        return fresh
+
+    async def release_keys(self, events, key_of):
+        self.keys.difference_update(key_of(e) for e in events)
+
+    async def insert_logs(self, events):
+        self.writes += 1
+        if self.writes == self.fail_on_write:
+            raise RuntimeError("log write failed")
+        self.logs += events
+        return events
+
+    async def record_attempts(self, events):
+        pass
+
+    async def apply_performance_batch(self, events):
+        self.leveled += [e["idempotency_key"] for e in events]
+
+
+def _request(events: list[dict]) -> Request:
+    body = json.dumps(events).encode()
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if sent:
+            return {"type": "http.disconnect"}
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/api/report-progress/bulk",
+        "headers": [(b"content-type", b"application/json")],
+    }
+    return Request(scope, receive)
+
+
+def _events(n: int) -> list[dict]:
+    start = datetime(2024, 1, 1)
+    return [
+        {
+            "user_id": "child-1",
+            "module_id": "sound_safari",
+            "level": 1,
+            "epoch": 1,
+            "selected_id": f"choice-{i}",
+            "is_correct": True,
+            "response_time_ms": 900,
+            "timestamp": (start + timedelta(seconds=i)).isoformat(),
+            "idempotency_key": f"evt-{i}",
+        }
+        for i in range(n)
+    ]
+
+
+def test_retry_after_failed_chunk_levels_every_event_once(monkeypatch):
+    store = FakeStore(fail_on_write=2)
+    monkeypatch.setattr(modules, "BULK_CHUNK_SIZE", 2)
+    monkeypatch.setattr(modules, "apply_performance_batch", store.apply_performance_batch)
+    monkeypatch.setattr(ingest, "insert_ignoring_duplicates", store.insert_ignoring_duplicates)
+    monkeypatch.setattr(ingest, "release_keys", store.release_keys)
+    monkeypatch.setattr(ingest, "insert_logs", store.insert_logs)
+    monkeypatch.setattr(ingest, "record_attempts", store.record_attempts)
+    events = _events(4)
+
+    # The second chunk's log write fails: the first chunk stays written and leveled
+    with pytest.raises(RuntimeError):
+        asyncio.run(modules.report_bulk(_request(events)))
+    assert store.leveled == ["evt-0", "evt-1"]
+
+    # The retry skips the first chunk as duplicates and finishes the second
+    result = asyncio.run(modules.report_bulk(_request(events)))
+    assert result["inserted"] == 2
+    assert result["duplicates"] == 2
+    assert sorted(store.leveled) == [f"evt-{i}" for i in range(4)]
+    assert sorted(e["idempotency_key"] for e in store.logs) == [f"evt-{i}" for i in range(4)]
@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+
+import routes.content as content
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length):
+        return self.docs[:length] if length else self.docs
+
+
+class FacetCollection:
+    """Returns a canned $facet result and keeps the pipeline it was sent."""
+
+    def __init__(self, result):
+        self.result = result
+        self.pipelines = []
+
+    def aggregate(self, pipeline):
+        self.pipelines.append(pipeline)
+        return FakeCursor(self.result)
+
+
+def test_collection_stats_shapes_facet_counts():
+    collection = FacetCollection([{
+        "total": [{"n": 5}],
+        "difficulty": [{"_id": "easy", "count": 3}, {"_id": "expert", "count": 2}],
+        "category": [{"_id": "animals", "count": 4}, {"_id": None, "count": 1}],
+    }])
+    stats = asyncio.run(content._collection_stats(collection, ["difficulty", "category"]))
+
+    assert stats == {
+        "total": 5,
+        # Default difficulties stay present at zero; unknown values are kept
+        "by_difficulty": {"easy": 3, "medium": 0, "hard": 0, "expert": 2},
+        "by_category": {"animals": 4},
+    }
+    facets = collection.pipelines[0][1]["$facet"]
+    assert set(facets) == {"total", "difficulty", "category"}
+
+
+def test_collection_stats_of_an_empty_collection():
+    stats = asyncio.run(content._collection_stats(FacetCollection([]), ["difficulty"]))
+    assert stats == {"total": 0, "by_difficulty": {"easy": 0, "medium": 0, "hard": 0}}
+
+
+def test_stats_are_cached_until_invalidated(monkeypatch):
+    class FakeReadDb:
+        sounds = FacetCollection([{"total": [{"n": 1}], "difficulty": [], "category": []}])
+        letter_pairs = FacetCollection([{"total": [{"n": 2}], "difficulty": []}])
+
+    monkeypatch.setattr(content, "read_db", FakeReadDb)
+    content.invalidate_stats_cache()
+
+    first = asyncio.run(content.get_content_stats())
+    assert first["sounds"]["total"] == 1 and first["letters"]["total"] == 2
+    assert asyncio.run(content.get_content_stats()) is first
+    assert len(FakeReadDb.sounds.pipelines) == 1
+
+    content.invalidate_stats_cache()
+    asyncio.run(content.get_content_stats())
+    assert len(FakeReadDb.sounds.pipelines) == 2
+    content.invalidate_stats_cache()
+
+
+class PagedCollection:
+    """find().sort("_id").limit() over in-memory docs, honouring an _id $gt bound."""
+
+    def __init__(self, docs):
+        self.docs = sorted(docs, key=lambda d: d["_id"])
+
+    def find(self, query, projection):
+        after = query.get("_id", {}).get("$gt")
+        docs = [d for d in self.docs if after is None or d["_id"] > after]
+
+        class Cursor(FakeCursor):
+            def sort(self, key, direction):
+                return self
+
+            def limit(self, n):
+                return FakeCursor(self.docs[:n])
+
+        return Cursor(docs)
+
+
+def test_keyset_pages_walk_every_doc_once():
+    docs = [{"_id": ObjectId()} for _ in range(5)]
+    collection = PagedCollection(docs)
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = asyncio.run(content._fetch_page(collection, {}, {}, 2, cursor))
+        seen += [d["_id"] for d in page]
+        if cursor is None:
+            break
+        assert cursor == str(page[-1]["_id"])
+    assert seen == sorted(d["_id"] for d in docs)
+
+    # An exactly full last page has no next cursor
+    page, cursor = asyncio.run(content._fetch_page(PagedCollection(docs[:2]), {}, {}, 2, None))
+    assert len(page) == 2 and cursor is None
+
+
+def test_invalid_cursor_is_a_400():
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(content._fetch_page(PagedCollection([]), {}, {}, 2, "not-an-id"))
+    assert e.value.status_code == 400
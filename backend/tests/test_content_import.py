@@ -0,0 +1,70 @@
+import csv
+import io
+import json
+
+from pydantic import BaseModel
+
+from services.content_import import NOT_UTF8, iter_upload_rows, _parse_batch
+
+
+class Sound(BaseModel):
+    sound: str
+    level: int = 1
+
+
+def _rows(data: bytes, filename: str):
+    return list(iter_upload_rows(io.BytesIO(data), filename, ""))
+
+
+def _errors(rows):
+    return [(n, str(raw)) for n, raw in rows if isinstance(raw, Exception)]
+
+
+def test_csv_rows_drop_empty_cells():
+    rows = _rows(b"\xef\xbb\xbfsound,level\nba,2\nda,\n", "sounds.csv")
+    assert rows == [(1, {"sound": "ba", "level": "2"}), (2, {"sound": "da"})]
+
+
+def test_malformed_csv_line_is_a_row_error():
+    limit = csv.field_size_limit(16)
+    try:
+        rows = _rows(b"sound,level\n" + b"x" * 32 + b",2\nda,1\n", "sounds.csv")
+    finally:
+        csv.field_size_limit(limit)
+    assert _errors(rows)[0][0] == 1 and _errors(rows)[0][1].startswith("Invalid CSV")
+    assert rows[-1] == (2, {"sound": "da", "level": "1"})
+
+
+def test_non_utf8_upload_ends_with_a_row_error():
+    uploads = {
+        "sounds.csv": ("sound\n" + "é\n" * 5000).encode("latin-1"),
+        "sounds.ndjson": '{"sound": "é"}\n'.encode("latin-1"),
+        "sounds.json": '[{"sound": "é"}]'.encode("latin-1"),
+    }
+    for filename, data in uploads.items():
+        assert _rows(data, filename)[-1][1].args == (NOT_UTF8,)
+
+
+def test_ndjson_skips_blank_lines_and_reports_bad_json():
+    rows = _rows(b'{"sound": "ba"}\n\nnot json\n{"sound": "da"}\n', "sounds.ndjson")
+    assert [n for n, _ in rows] == [1, 2, 3]
+    assert rows[0][1] == {"sound": "ba"} and rows[2][1] == {"sound": "da"}
+    assert _errors(rows)[0][1].startswith("Invalid JSON")
+
+
+def test_json_array_and_invalid_document():
+    rows = _rows(json.dumps([{"sound": "ba"}, {"sound": "da"}]).encode(), "sounds.json")
+    assert [r for _, r in rows] == [{"sound": "ba"}, {"sound": "da"}]
+    assert _errors(_rows(b"[{", "sounds.json"))[0][0] == 0
+
+
+def test_parse_batch_validates_and_stops_at_the_limit():
+    rows = iter([(1, {"sound": "ba", "level": "2"}), (2, {"level": 1}), (3, ValueError("Invalid CSV: x")), (4, {"sound": "da"})])
+    chunk, errors, read = _parse_batch(rows, Sound, lambda item: item.model_dump(), 3)
+    assert read == 3
+    assert [(n, doc["sound"], doc["level"]) for n, doc in chunk] == [(1, "ba", 2)]
+    assert "_id" in chunk[0][1]
+    assert [e["row"] for e in errors] == [2, 3]
+    assert errors[0]["error"].startswith("sound:")
+    # The remaining row is left for the next batch
+    assert next(rows)[0] == 4
@@ -0,0 +1,59 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import routes.dashboard as dashboard
+import services.rollups as rollups
+
+
+class FakeRollups:
+    """Daily buckets; aggregate() runs the window $match/$group in memory."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+
+    def aggregate(self, pipeline):
+        match, group = pipeline[0]["$match"], pipeline[1]["$group"]
+        rows = {}
+        for b in self.buckets:
+            if b["user_id"] != match["user_id"] or b["bucket_start"] < match["bucket_start"]["$gte"]:
+                continue
+            row = rows.setdefault(b["module_id"], {"_id": b["module_id"], **{k: 0 for k in group if k != "_id"}})
+            for k in row:
+                if k != "_id":
+                    row[k] += b[k]
+
+        class Cursor:
+            async def to_list(self, length):
+                return list(rows.values())
+
+        return Cursor()
+
+
+class FakeReadDb:
+    def __init__(self, buckets):
+        self.log_rollups = FakeRollups(buckets)
+
+
+def _bucket(days_ago, module_id, attempts, correct):
+    return {
+        "user_id": "child-1", "granularity": "day", "module_id": module_id,
+        "bucket_start": rollups.bucket_start(datetime.utcnow() - timedelta(days=days_ago), "day"),
+        "attempts": attempts, "correct": correct, "total_response_time_ms": attempts * 1000,
+    }
+
+
+def test_learning_issues_cover_the_whole_window(monkeypatch):
+    # More day buckets than MAX_BUCKETS: every one in the window must count
+    days = 365
+    modules = ["sound_safari", "word_builder"]
+    buckets = [_bucket(d, m, 2, 1) for d in range(days) for m in modules]
+    buckets.append(_bucket(days + 5, "sound_safari", 100, 0))  # outside the window
+    assert len(buckets) > dashboard.MAX_BUCKETS
+    monkeypatch.setattr(rollups, "read_db", FakeReadDb(buckets))
+
+    result = asyncio.run(dashboard.get_learning_issues("child-1", days))
+    issues = {i["id"]: i for i in result["issues"]}
+    assert issues["phonic"]["attempts"] == 2 * days
+    assert issues["phonic"]["progress"] == 50.0
+    assert issues["vocabulary"]["mean_response_time_ms"] == 1000
+    assert "writing" not in issues
@@ -0,0 +1,44 @@
+import asyncio
+import io
+
+from fastapi import UploadFile
+
+import routes.test as test_routes
+from services.analysis_cache import AnalysisCache
+from services.fluency import NO_SPEECH_RISK, trivial_result
+
+SENTENCE = "The big black dog dug a deep dark ditch"
+
+
+def _metrics(voiced_s: float) -> dict:
+    return {
+        "duration_s": voiced_s, "voiced_s": voiced_s, "voiced_ratio": 1.0,
+        "pause_count": 0, "mean_pause_s": 0.0, "longest_pause_s": 0.0, "onsets_per_s": 0.0,
+    }
+
+
+def test_trivial_results():
+    # Silence is a retry, not a score
+    assert trivial_result(_metrics(0.0), SENTENCE) == (None, "No speech detected. Try again.")
+    assert trivial_result(_metrics(0.5), SENTENCE)[0] == NO_SPEECH_RISK
+    assert trivial_result(_metrics(4.0), SENTENCE) is None
+
+
+def test_silent_recording_is_not_recorded(monkeypatch):
+    recorded = []
+
+    async def prepare_audio(audio_bytes, filename, content_type):
+        return {"metrics": _metrics(0.0)}
+
+    async def record_result(session_id, question_id, result):
+        recorded.append(result)
+        return True
+
+    monkeypatch.setattr(test_routes, "prepare_audio", prepare_audio)
+    monkeypatch.setattr(test_routes, "record_result", record_result)
+    monkeypatch.setattr(test_routes, "speaking_cache", AnalysisCache("speaking-test"))
+
+    upload = UploadFile(io.BytesIO(b"RIFF"), filename="take.wav")
+    result = asyncio.run(test_routes.analyze_speaking(upload, SENTENCE, "english", "session", "7"))
+    assert result["failed"] and result["risk_weight"] == 0
+    assert recorded == []
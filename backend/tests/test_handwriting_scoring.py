@@ -0,0 +1,67 @@
+import pytest
+import torch
+
+from services.handwriting_scoring import CONFUSION_MIN_MASS, ENGLISH_REVERSALS, WritingScorer
+
+LABELS = ["a", "b", "d", "p", "q", "s"]
+
+
+@pytest.fixture
+def scorer():
+    return WritingScorer(
+        LABELS, ENGLISH_REVERSALS, temperature=1.0, confusion_risk=100, error_risk=20,
+        correct_feedback="Correct!", confusion_feedback="Mirror/Rotation Error: Wrote '{predicted}' instead of '{target}'",
+    )
+
+
+def _probs(**mass) -> torch.Tensor:
+    rest = (1 - sum(mass.values())) / (len(LABELS) - len(mass))
+    return torch.tensor([mass.get(label, rest) for label in LABELS])
+
+
+def test_confusion_table_drops_letters_without_a_class(scorer):
+    b, d = scorer.index["b"], scorer.index["d"]
+    assert scorer.confusable[b, d] and scorer.confusable[d, b]
+    # 's' -> '5' has no '5' class
+    assert not scorer.confusable[scorer.index["s"]].any()
+
+
+def test_correct_answer(scorer):
+    result = scorer.score(_probs(b=0.9), "B")
+    assert result["is_correct"] and result["risk_weight"] == 0 and result["feedback"] == "Correct!"
+    assert result["target"] == "b" and result["top_k"][0] == {"label": "b", "probability": 0.9}
+    assert len(result["top_k"]) == 3
+
+
+def test_mirror_error_takes_the_confusion_risk(scorer):
+    result = scorer.score(_probs(d=0.8, b=0.1), "b")
+    assert result["predicted"] == "d" and result["risk_weight"] == 100
+    assert result["feedback"] == "Mirror/Rotation Error: Wrote 'd' instead of 'b'"
+    assert result["confusion_probability"] == pytest.approx(0.8)
+
+
+def test_confusion_mass_counts_even_when_another_letter_wins():
+    # 'p' wins, but most of the mass sits on a's look-alikes 'b' and 'd'
+    scorer = WritingScorer(LABELS, {"a": ["b", "d"]}, 1.0, 90, 30, "", "Confused '{predicted}' for '{target}'")
+    result = scorer.score(_probs(p=0.35, b=0.3, d=0.3), "a")
+    assert result["predicted"] == "p" and result["confusion_probability"] == pytest.approx(0.6)
+    assert 0.6 >= CONFUSION_MIN_MASS and result["risk_weight"] == 90
+
+
+def test_general_errors_scale_with_the_target_probability(scorer):
+    near = scorer.score(_probs(a=0.5, s=0.4), "s")
+    assert near["risk_weight"] == round(20 * (1 - 0.4))
+    assert near["feedback"] == "Almost. Looks like 'a', close to 's'"
+
+    wild = scorer.score(_probs(a=0.9, s=0.0), "s")
+    assert wild["risk_weight"] == 20 and wild["feedback"] == "Incorrect. Looks like 'a'"
+
+    unknown = scorer.score(_probs(a=0.9), "z")
+    assert unknown["target_probability"] == 0 and unknown["risk_weight"] == 20
+
+
+def test_temperature_softens_probabilities():
+    logits = torch.tensor([[4.0, 0.0, 0.0, 0.0, 0.0, 0.0]])
+    sharp = WritingScorer(LABELS, {}, 1.0, 100, 20, "", "").probabilities(logits)
+    soft = WritingScorer(LABELS, {}, 2.0, 100, 20, "", "").probabilities(logits)
+    assert soft[0, 0] < sharp[0, 0] and float(soft.sum()) == pytest.approx(1.0)
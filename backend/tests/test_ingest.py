@@ -0,0 +1,123 @@
+import asyncio
+import os
+
+import pytest
+
+import services.ingest as ingest
+from schemas import UserProgress
+
+
+class FakeLogStore:
+    """Log store and derived state; leveling fails while `fail_leveling` is set."""
+
+    def __init__(self):
+        self.logs = {}
+        self.recorded = []
+        self.leveled = []
+        self.fail_leveling = False
+
+    async def insert_logs(self, events):
+        fresh = [e for e in events if e["_id"] not in self.logs]
+        self.logs.update((e["_id"], e) for e in fresh)
+        return fresh
+
+    async def record_attempts(self, events):
+        self.recorded += [e["_id"] for e in events]
+
+    async def apply_performance_batch(self, events):
+        if self.fail_leveling:
+            raise RuntimeError("leveling failed")
+        self.leveled += [e["_id"] for e in events]
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = FakeLogStore()
+    monkeypatch.setattr(ingest, "TIMESERIES", False)
+    monkeypatch.setattr(ingest, "insert_logs", store.insert_logs)
+    monkeypatch.setattr(ingest, "record_attempts", store.record_attempts)
+    monkeypatch.setattr(ingest, "apply_performance_batch", store.apply_performance_batch)
+    return store
+
+
+def _progress(i: int) -> UserProgress:
+    return UserProgress(
+        user_id="child-1", module_id="sound_safari", level=1, epoch=1,
+        selected_id=f"choice-{i}", is_correct=True, response_time_ms=900,
+    )
+
+
+def test_derived_state_survives_a_restart(store, tmp_path):
+    async def first_process():
+        buffer = ingest.ProgressBuffer(str(tmp_path), flush_size=100, flush_interval=60)
+        await buffer.start()
+        ids = await asyncio.gather(*(buffer.add(_progress(i)) for i in range(3)))
+        # Logs are written, leveling fails: the events must stay on disk
+        store.fail_leveling = True
+        with pytest.raises(RuntimeError):
+            await buffer.flush()
+        # The process dies: its timer stops and the OS drops its lock
+        buffer._task.cancel()
+        buffer._owner.close()
+        return ids
+
+    ids = asyncio.run(first_process())
+    assert len(store.logs) == 3 and store.leveled == []
+    assert os.path.exists(os.path.join(tmp_path, f"progress.{os.getpid()}.flushing.ndjson"))
+
+    async def second_process():
+        store.fail_leveling = False
+        buffer = ingest.ProgressBuffer(str(tmp_path), flush_size=100, flush_interval=60)
+        await buffer.start()
+        await buffer.stop()
+
+    asyncio.run(second_process())
+    assert sorted(str(i) for i in store.leveled) == sorted(ids)
+    assert sorted(store.recorded) == sorted(store.logs)  # rollups were applied once
+    assert os.listdir(tmp_path) == []
+
+
+def test_orphaned_spill_of_a_dead_worker_is_adopted(store, tmp_path):
+    orphan = ingest.ProgressBuffer(str(tmp_path))
+    orphan.spill_path, orphan.flushing_path, _ = orphan._paths("999999")
+    record = _progress(0).model_dump(mode="json")
+    record["_id"] = "65a000000000000000000000"
+    orphan._spill([record])
+    open(os.path.join(tmp_path, "progress.999999.lock"), "w").close()
+
+    async def run():
+        buffer = ingest.ProgressBuffer(str(tmp_path), flush_size=100, flush_interval=60)
+        await buffer.start()
+        await buffer.stop()
+
+    asyncio.run(run())
+    assert [str(i) for i in store.leveled] == [record["_id"]]
+    assert os.listdir(tmp_path) == []
+
+
+def test_timeseries_looks_up_only_replayed_events(store, monkeypatch, tmp_path):
+    lookups = []
+
+    async def logged_ids(ids, timestamps):
+        lookups.append(set(ids))
+        return {i for i in ids if i in store.logs}
+
+    monkeypatch.setattr(ingest, "TIMESERIES", True)
+    monkeypatch.setattr(ingest, "logged_ids", logged_ids)
+
+    async def run():
+        buffer = ingest.ProgressBuffer(str(tmp_path), flush_size=100, flush_interval=60)
+        fresh = [await buffer.add(_progress(i)) for i in range(2)]
+        assert await buffer.flush() == 2
+        assert lookups == []  # ids minted here can't be in the log yet
+
+        # A replay of one logged and one unlogged event writes only the second
+        replayed = [dict(store.logs[next(iter(store.logs))]), {**_progress(9).model_dump(), "_id": ingest.ObjectId()}]
+        buffer.pending += replayed
+        buffer._replayed.update(e["_id"] for e in replayed)
+        assert await buffer.flush() == 1
+        assert lookups == [{e["_id"] for e in replayed}]
+        return fresh
+
+    asyncio.run(run())
+    assert len(store.logs) == 3
@@ -0,0 +1,62 @@
+import base64
+import json
+import os
+import struct
+import time
+
+import services.model_assets as model_assets
+
+
+def _data_uri(data: bytes, mime: str = "application/octet-stream") -> str:
+    return f"data:{mime};base64,{base64.b64encode(data).decode()}"
+
+
+def _chunks(glb: bytes) -> dict:
+    magic, version, length = struct.unpack_from("<III", glb)
+    assert (magic, version, length) == (model_assets.GLB_MAGIC, 2, len(glb))
+    chunks, offset = {}, 12
+    while offset < len(glb):
+        size, kind = struct.unpack_from("<II", glb, offset)
+        chunks[kind] = glb[offset + 8:offset + 8 + size]
+        offset += 8 + size
+    return chunks
+
+
+def test_gltf_to_glb_packs_buffers_and_images():
+    gltf = {
+        "asset": {"version": "2.0"},
+        "buffers": [{"uri": _data_uri(b"abcde"), "byteLength": 5}, {"uri": _data_uri(b"xyz"), "byteLength": 3}],
+        "bufferViews": [{"buffer": 0, "byteLength": 5}, {"buffer": 1, "byteOffset": 1, "byteLength": 2}],
+        "images": [{"uri": _data_uri(b"PNGDATA", "image/png")}],
+    }
+    budget = [1024]
+    chunks = _chunks(model_assets.gltf_to_glb(gltf, "https://example.org/scene.gltf", budget))
+    scene, binary = json.loads(chunks[model_assets.CHUNK_JSON]), chunks[model_assets.CHUNK_BIN]
+
+    assert scene["buffers"] == [{"byteLength": len(binary)}]
+    views = scene["bufferViews"]
+    assert all(v["buffer"] == 0 for v in views)
+    read = lambda v: binary[v["byteOffset"]:v["byteOffset"] + v["byteLength"]]
+    assert read(views[0]) == b"abcde" and read(views[1]) == b"yz"
+    image = scene["images"][0]
+    assert "uri" not in image and image["mimeType"] == "image/png"
+    assert read(views[image["bufferView"]]) == b"PNGDATA"
+    assert budget[0] == 1024 - 5 - 3 - 7
+
+
+def test_refresh_keeps_versions_until_unreferenced(monkeypatch, tmp_path):
+    monkeypatch.setattr(model_assets, "MODEL_ASSET_DIR", str(tmp_path))
+    source = "https://example.org/dog.gltf"
+    key = model_assets._source_key(source)
+    old, new = tmp_path / f"{key}-aaaaaaaaaaaa.glb", tmp_path / f"{key}-bbbbbbbbbbbb.glb"
+    old.write_bytes(b"old")
+    new.write_bytes(b"new")
+    week_ago = time.time() - 8 * 86400
+    os.utime(old, (week_ago, week_ago))
+
+    assert model_assets.cached_model_url(source) == f"/models/{new.name}"
+    # Still referenced by published content: kept however old
+    assert model_assets.prune_models({f"/models/{old.name}", f"/models/{new.name}"}) == 0
+    # Unreferenced but recent versions survive the grace period
+    assert model_assets.prune_models(set()) == 1
+    assert sorted(os.listdir(tmp_path)) == [new.name]
@@ -0,0 +1,49 @@
+from datetime import datetime, timedelta
+
+from starlette.requests import Request
+
+from services.responses import cache_headers, is_not_modified, make_etag, not_modified
+
+
+def _request(**headers) -> Request:
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [(k.replace("_", "-").encode(), v.encode()) for k, v in headers.items()],
+    }
+    return Request(scope)
+
+
+def test_make_etag_is_stable_and_tracks_its_parts():
+    etag = make_etag("modules", "child-1", 3)
+    assert etag == make_etag("modules", "child-1", 3)
+    assert etag != make_etag("modules", "child-1", 4)
+    assert etag.startswith('W/"') and make_etag("x", weak=False).startswith('"')
+
+
+def test_if_none_match_uses_weak_comparison():
+    etag = make_etag("curriculum", 7)
+    strong = etag.removeprefix("W/")
+    assert is_not_modified(_request(if_none_match=etag), etag)
+    assert is_not_modified(_request(if_none_match=f'"other", {strong}'), etag)
+    assert is_not_modified(_request(if_none_match="*"), etag)
+    assert not is_not_modified(_request(if_none_match='"other"'), etag)
+    assert not is_not_modified(_request(), etag)
+
+
+def test_if_modified_since():
+    changed = datetime(2024, 5, 1, 12, 0, 0, 500000)
+    date = cache_headers("x", changed)["Last-Modified"]
+    assert date == "Wed, 01 May 2024 12:00:00 GMT"
+    assert is_not_modified(_request(if_modified_since=date), "x", changed)
+    assert not is_not_modified(_request(if_modified_since=date), "x", changed + timedelta(seconds=1))
+    assert not is_not_modified(_request(if_modified_since="not a date"), "x", changed)
+    # If-None-Match wins when both are sent
+    assert not is_not_modified(_request(if_none_match='"other"', if_modified_since=date), "x", changed)
+
+
+def test_not_modified_has_no_body():
+    response = not_modified(cache_headers("x"))
+    assert response.status_code == 304 and response.body == b""
+    assert response.headers["etag"] == "x"
@@ -0,0 +1,71 @@
+import asyncio
+import io
+
+import pytest
+from fastapi import HTTPException, UploadFile
+
+import routes.test as test_routes
+import services.speech_assessment as speech
+from services.analysis_cache import AnalysisCache
+from services.speech_assessment import align_words, score_alignment
+
+
+def _ops(alignment):
+    return [a["op"] for a in alignment]
+
+
+def test_alignment_ops():
+    target = "The big black dog dug a deep dark ditch."
+    assert _ops(align_words(target, "the big black dog dug a deep dark ditch")) == ["match"] * 9
+    alignment = align_words(target, "the big black dug dug a dark ditch ditch")
+    assert alignment[3] == {"op": "similar", "target": "dog", "spoken": "dug"}
+    assert "skip" in _ops(alignment) and _ops(alignment)[-1] == "insert"
+
+
+def test_devanagari_words_keep_their_vowel_signs():
+    assert align_words("दिनदिनै नदी।", "दिनदिनै नदी") == [
+        {"op": "match", "target": "दिनदिनै", "spoken": "दिनदिनै"},
+        {"op": "match", "target": "नदी", "spoken": "नदी"},
+    ]
+
+
+def test_score_alignment_risk_scale():
+    target = "the big black dog dug a deep dark ditch"
+    score = lambda spoken, metrics={}: score_alignment(align_words(target, spoken), metrics)
+    assert score(target) == {"confidence": 1.0, "risk_weight": 0, "feedback": "Fluent reading!"}
+    assert score(target.replace("dog", "dug", 1))["risk_weight"] == 60
+    assert score("the big black dog dug a deep dark")["risk_weight"] == 20
+    assert score("the big dog")["risk_weight"] == 100
+    assert score(target + " ditch")["risk_weight"] == 20
+    assert score(target, {"longest_pause_s": 3.0})["risk_weight"] == 20
+    assert score_alignment([], {})["risk_weight"] == 100
+
+
+def test_local_backend_without_models_fails_at_startup(monkeypatch):
+    monkeypatch.setattr(speech, "SPEECH_BACKEND", "local")
+    monkeypatch.setattr(speech, "ASR_MODEL_PATHS", {"english": "/models/en", "nepali": None})
+    with pytest.raises(RuntimeError, match="nepali"):
+        speech.check_speech_backend()
+
+    monkeypatch.setattr(speech, "SPEECH_BACKEND", "whisper")
+    with pytest.raises(RuntimeError):
+        speech.check_speech_backend()
+
+    monkeypatch.setattr(speech, "SPEECH_BACKEND", "auto")
+    speech.check_speech_backend()
+    assert speech.get_assessor("nepali") is speech._gemini
+
+
+def test_unconfigured_language_is_a_503(monkeypatch):
+    async def prepare_audio(audio_bytes, filename, content_type):
+        return {"metrics": {"duration_s": 4.0, "voiced_s": 4.0}}
+
+    monkeypatch.setattr(speech, "SPEECH_BACKEND", "local")
+    monkeypatch.setattr(speech, "ASR_MODEL_PATHS", {"english": None, "nepali": None})
+    monkeypatch.setattr(test_routes, "prepare_audio", prepare_audio)
+    monkeypatch.setattr(test_routes, "speaking_cache", AnalysisCache("speaking-test"))
+
+    upload = UploadFile(io.BytesIO(b"RIFF"), filename="take.wav")
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(test_routes.analyze_speaking(upload, "the big dog", "english"))
+    assert e.value.status_code == 503
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from services.strokes import (
+    MAX_CANVAS_PX, MAX_STROKE_POINTS, STROKE_INK, StrokeError,
+    decode_strokes, normalize_for_model, rasterize_strokes,
+)
+
+
+def test_decode_strokes_accumulates_deltas():
+    decoded = decode_strokes([[10, 20, 5, 0, 0, -5], [0, 0]])
+    assert decoded[0].tolist() == [[10, 20], [15, 20], [15, 15]]
+    assert decoded[1].tolist() == [[0, 0]]
+    assert decode_strokes([]) == []
+
+
+@pytest.mark.parametrize("strokes", [
+    [[10]],                     # no pair
+    [[10, 20, 5]],              # odd length
+    [[10, 20, -20, 0]],         # walks off the left edge
+    [[MAX_CANVAS_PX, 0, 1, 0]], # walks off the right edge
+    [[0, 0] * (MAX_STROKE_POINTS + 1)],
+])
+def test_decode_strokes_rejects_bad_input(strokes):
+    with pytest.raises(StrokeError):
+        decode_strokes(strokes)
+
+
+def test_rasterized_glyph_is_centered_in_the_box():
+    # A vertical bar taller than the glyph box: scaled down to fit it
+    image = rasterize_strokes([[500, 100, 0, 40]], 12, 28, 20)
+    assert image.shape == (28, 28) and image.dtype == np.float32
+    assert image.max() == pytest.approx(STROKE_INK) and image.min() == 0
+
+    rows, cols = np.nonzero(image)
+    assert rows.min() >= 3 and rows.max() <= 24  # 20 px box in 28 px
+    assert abs((cols.min() + cols.max()) / 2 - 13.5) <= 1
+    assert abs((rows.min() + rows.max()) / 2 - 13.5) <= 1
+
+
+def test_small_glyphs_are_not_enlarged_and_dots_are_drawn():
+    image = rasterize_strokes([[100, 100]], 4, 32, 24)
+    ink = np.count_nonzero(image)
+    assert 0 < ink < 100
+    assert not rasterize_strokes([], 4, 32, 24).any()
+
+
+def test_stroke_width_bounds_and_normalization():
+    for width in (0, float("nan"), 1000):
+        with pytest.raises(StrokeError):
+            rasterize_strokes([[1, 1]], width, 28, 20)
+    normalized = normalize_for_model(np.array([[0, 255]], dtype=np.float32))
+    assert normalized.shape == (1, 1, 1, 2) and normalized.ravel().tolist() == [-1.0, 1.0]
@@ -0,0 +1,48 @@
+import asyncio
+
+from database import ensure_ttl_index
+
+
+class FakeCollection:
+    """Index bookkeeping of one collection, recording collMod commands."""
+
+    name = "things"
+
+    def __init__(self, indexes=None):
+        self.indexes = indexes or {}
+        self.commands = []
+        self.database = self
+
+    async def index_information(self):
+        return dict(self.indexes)
+
+    async def create_index(self, field, expireAfterSeconds, name, **options):
+        assert name not in self.indexes, "create_index on an existing name conflicts"
+        self.indexes[name] = {"key": [(field, 1)], "expireAfterSeconds": expireAfterSeconds, **options}
+
+    async def drop_index(self, name):
+        del self.indexes[name]
+
+    async def command(self, command, collection, index):
+        self.commands.append((command, collection, index))
+        self.indexes[index["name"]]["expireAfterSeconds"] = index["expireAfterSeconds"]
+
+
+def test_ttl_index_is_created_retuned_and_dropped():
+    things = FakeCollection()
+    asyncio.run(ensure_ttl_index(things, "at", 3600, "at_ttl"))
+    assert things.indexes["at_ttl"]["expireAfterSeconds"] == 3600
+
+    # Unchanged setting: nothing to do
+    asyncio.run(ensure_ttl_index(things, "at", 3600, "at_ttl"))
+    assert things.commands == []
+
+    # Changed setting: collMod instead of a conflicting create_index
+    asyncio.run(ensure_ttl_index(things, "at", 7200, "at_ttl"))
+    assert things.commands == [("collMod", "things", {"name": "at_ttl", "expireAfterSeconds": 7200})]
+    assert things.indexes["at_ttl"]["expireAfterSeconds"] == 7200
+
+    # 0 turns expiry off
+    asyncio.run(ensure_ttl_index(things, "at", 0, "at_ttl"))
+    assert "at_ttl" not in things.indexes
+    asyncio.run(ensure_ttl_index(things, "at", None, "at_ttl"))
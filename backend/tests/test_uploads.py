@@ -0,0 +1,86 @@
+import asyncio
+import io
+import json
+
+import pytest
+from fastapi import HTTPException, UploadFile
+
+from services.uploads import UploadLimitMiddleware, read_upload
+
+LIMIT = 10
+
+
+async def _echo_app(scope, receive, send):
+    """Reads the whole body, then answers 200 with its length."""
+    size = 0
+    while True:
+        message = await receive()
+        size += len(message.get("body", b""))
+        if not message.get("more_body"):
+            break
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": str(size).encode()})
+
+
+async def _form_parser_app(scope, receive, send):
+    """Like Starlette's form parsing: turns any receive error into a 400."""
+    try:
+        await _echo_app(scope, receive, send)
+    except Exception:
+        await send({"type": "http.response.start", "status": 400, "headers": []})
+        await send({"type": "http.response.body", "body": b"bad form"})
+
+
+def _call(app, path="/upload", chunks=(b"x" * 4,), content_length=None):
+    called = []
+
+    async def wrapped(scope, receive, send):
+        called.append(True)
+        await app(scope, receive, send)
+
+    messages = [{"type": "http.request", "body": c, "more_body": i < len(chunks) - 1} for i, c in enumerate(chunks)]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    headers = [(b"content-length", str(content_length).encode())] if content_length is not None else []
+    scope = {"type": "http", "method": "POST", "path": path, "headers": headers}
+    middleware = UploadLimitMiddleware(wrapped, limits={"/upload": LIMIT})
+    asyncio.run(middleware(scope, receive, send))
+    statuses = [m["status"] for m in sent if m["type"] == "http.response.start"]
+    return statuses, sent, bool(called)
+
+
+def test_declared_length_over_the_limit_is_rejected_up_front():
+    statuses, sent, called = _call(_echo_app, content_length=LIMIT + 1)
+    assert statuses == [413] and not called
+    assert json.loads(sent[-1]["body"])["detail"] == f"Upload too large (limit {LIMIT} bytes)"
+
+
+def test_streamed_body_over_the_limit_is_rejected():
+    statuses, _, called = _call(_echo_app, chunks=(b"x" * 6, b"x" * 6))
+    assert statuses == [413] and called
+
+
+def test_app_error_from_the_aborted_read_is_replaced_by_413():
+    statuses, sent, _ = _call(_form_parser_app, chunks=(b"x" * 6, b"x" * 6))
+    assert statuses == [413]
+    assert all(m.get("body") != b"bad form" for m in sent)
+
+
+def test_bodies_within_limits_pass_through():
+    assert _call(_echo_app, chunks=(b"x" * 5, b"x" * 5), content_length=LIMIT)[0] == [200]
+    # Paths without a limit are not counted
+    assert _call(_echo_app, path="/other", chunks=(b"x" * 50,), content_length=50)[0] == [200]
+
+
+def test_read_upload_enforces_its_own_limit():
+    upload = lambda data: UploadFile(io.BytesIO(data), filename="f.bin")
+    assert asyncio.run(read_upload(upload(b"x" * LIMIT), LIMIT)) == b"x" * LIMIT
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(read_upload(upload(b"x" * (LIMIT + 1)), LIMIT))
+    assert e.value.status_code == 413
@@ -8,6 +8,7 @@ import {
 
 // --- CONFIGURATION ---
 const API_BASE = "http://localhost:8000"; 
+const USER_ID = 'child_123'; // This should come from auth context
 
 // --- TYPES ---
 type Question = {
@@ -28,6 +29,7 @@ type AnalysisResult = {
   is_correct: boolean;
   risk_weight: number;
   feedback: string;
+  failed?: boolean;
 };
 
 type FinalScore = {
@@ -54,6 +56,7 @@ export default function DyslexiaAssessment() {
   
   // Results State
   const [results, setResults] = useState<AnalysisResult[]>([]); 
+  const [sessionId, setSessionId] = useState<string | null>(null);
   const [finalAnalysis, setFinalAnalysis] = useState<FinalScore | null>(null); 
 
   // --- 1. INITIAL FETCH ---
@@ -64,6 +67,14 @@ export default function DyslexiaAssessment() {
         if (!res.ok) throw new Error("Failed to connect to backend");
         const data = await res.json();
         setQuestions(data);
+
+        // Results are recorded server-side against this session
+        const sessionRes = await fetch(`${API_BASE}/api/test/sessions`, {
+          method: "POST",
+          headers: { "Content-Type": "application/json" },
+          body: JSON.stringify({ user_id: USER_ID })
+        });
+        if (sessionRes.ok) setSessionId((await sessionRes.json()).session_id);
         setAppState('active');
       } catch (e) {
         console.error("Backend Error:", e);
@@ -128,16 +139,27 @@ export default function DyslexiaAssessment() {
       
       // 1. Process Writing
       if (currentQ.type === 'writing') {
-        const imageBase64 = await canvasRef.current?.exportImage("png");
-        if (!imageBase64) return;
+        const paths = await canvasRef.current?.exportPaths();
+        if (!paths) return;
+
+        // Pen strokes as [x0, y0, dx1, dy1, ...] in whole pixels; the server rasterizes them
+        const strokes = paths
+          .filter(path => path.drawMode && path.paths.length > 0)
+          .map(path => {
+            const points = path.paths.map(p => [Math.round(p.x), Math.round(p.y)]);
+            return points.flatMap(([x, y], i) => i === 0 ? [x, y] : [x - points[i - 1][0], y - points[i - 1][1]]);
+          });
 
         const res = await fetch(`${API_BASE}/api/test/analyze/writing`, {
           method: "POST",
           headers: { "Content-Type": "application/json" },
           body: JSON.stringify({
             target_letter: currentQ.target,
-            image_base64: imageBase64,
-            language: currentQ.lang 
+            strokes,
+            stroke_width: 12,
+            language: currentQ.lang,
+            session_id: sessionId,
+            question_id: String(currentQ.id)
           })
         });
         resultData = await res.json();
@@ -151,6 +173,10 @@ export default function DyslexiaAssessment() {
         formData.append("file", audioBlob, "recording.mp3");
         formData.append("target_text", currentQ.target);
         formData.append("language", currentQ.lang);
+        if (sessionId) {
+          formData.append("session_id", sessionId);
+          formData.append("question_id", String(currentQ.id));
+        }
 
         const res = await fetch(`${API_BASE}/api/test/analyze/speaking`, {
           method: "POST",
@@ -159,6 +185,12 @@ export default function DyslexiaAssessment() {
         resultData = await res.json();
       }
 
+      // The server couldn't score it (nothing was recorded): retry the same question
+      if (resultData?.failed) {
+        alert(resultData.feedback);
+        return;
+      }
+
       // 3. Save & Advance
       const newResults = [...results, resultData];
       setResults(newResults);
@@ -174,7 +206,7 @@ export default function DyslexiaAssessment() {
         const scoreRes = await fetch(`${API_BASE}/api/test/finish-assessment`, {
           method: "POST",
           headers: { "Content-Type": "application/json" },
-          body: JSON.stringify({ results: newResults })
+          body: JSON.stringify(sessionId ? { session_id: sessionId } : { results: newResults })
         });
         const scoreData = await scoreRes.json();
         setFinalAnalysis(scoreData);